@@ -1,9 +1,16 @@
 # Mock data initialization
-from app.data.mock_destinations import MOCK_DESTINATIONS, get_all_destinations, get_destination_by_id, filter_destinations, get_photo_spots
-from app.data.mock_users import MOCK_USERS, get_all_users, get_user_by_id, create_user, filter_users_by_preferences
-from app.data.mock_itineraries import MOCK_ITINERARIES, get_all_itineraries, get_itinerary_by_id, get_itineraries_by_user, create_itinerary, delete_itinerary, filter_itineraries
+from app.data.records import Destination, User, Itinerary
+from app.data.mock_destinations import MOCK_DESTINATIONS, get_all_destinations, get_destination_by_id, filter_destinations, get_photo_spots, get_destinations_version, mark_destinations_changed, page_destinations, project_fields, DESTINATION_FIELDS
+from app.data.mock_users import MOCK_USERS, get_all_users, get_user_by_id, get_users_by_ids, create_user, create_users, filter_users_by_preferences
+from app.data.mock_itineraries import MOCK_ITINERARIES, get_all_itineraries, get_itinerary_by_id, get_itineraries_by_user, create_itinerary, create_itineraries, delete_itinerary, filter_itineraries, get_user_itineraries_version, get_user_itineraries_digest, subscribe_itinerary_changes, get_itineraries_in_date_range, get_visit_count
+from app.data.shared_store import SharedStore
+from app.data.snapshot import SnapshotError, read_snapshot, write_snapshot
+from app.data.write_log import WriteAheadLog
 
 __all__ = [
+    "Destination",
+    "User",
+    "Itinerary",
     "MOCK_DESTINATIONS",
     "MOCK_USERS", 
     "MOCK_ITINERARIES",
@@ -11,14 +18,32 @@ __all__ = [
     "get_destination_by_id",
     "filter_destinations",
     "get_photo_spots",
+    "get_destinations_version",
+    "mark_destinations_changed",
+    "page_destinations",
+    "project_fields",
+    "DESTINATION_FIELDS",
     "get_all_users",
     "get_user_by_id",
+    "get_users_by_ids",
     "create_user",
+    "create_users",
     "filter_users_by_preferences",
     "get_all_itineraries",
     "get_itinerary_by_id",
     "get_itineraries_by_user",
     "create_itinerary",
+    "create_itineraries",
     "delete_itinerary",
-    "filter_itineraries"
+    "filter_itineraries",
+    "get_user_itineraries_version",
+    "get_user_itineraries_digest",
+    "subscribe_itinerary_changes",
+    "get_itineraries_in_date_range",
+    "get_visit_count",
+    "SharedStore",
+    "SnapshotError",
+    "read_snapshot",
+    "write_snapshot",
+    "WriteAheadLog"
 ]
@@ -1,6 +1,10 @@
 # Dữ liệu mẫu các địa điểm du lịch tại Đà Lạt
+from bisect import bisect_right
 
-MOCK_DESTINATIONS = [
+from app.data.records import Destination
+from app.data.snapshot import take_snapshot_table
+
+_SEED_DESTINATIONS = [
     {
         "id": 1,
         "name": "Hồ Xuân Hương",
@@ -253,6 +257,35 @@ MOCK_DESTINATIONS = [
     }
 ]
 
+# Lưu dưới dạng bản ghi gọn thay cho dict; dùng snapshot nếu đặt DATA_SNAPSHOT_PATH
+_snapshot = take_snapshot_table("destinations")
+MOCK_DESTINATIONS = _snapshot[0] if _snapshot is not None else [Destination(**d) for d in _SEED_DESTINATIONS]
+del _SEED_DESTINATIONS, _snapshot
+
+# Các trường của một địa điểm, dùng cho tham số fields=
+DESTINATION_FIELDS = ("id", "name", "location", "category", "photo_spot", "estimated_cost", "estimated_time", "description")
+
+# Phiên bản danh mục địa điểm, tăng mỗi khi dữ liệu địa điểm thay đổi
+_destinations_version = 1
+
+# Địa điểm sắp xếp theo ID và danh sách ID tương ứng, dùng cho phân trang theo con trỏ
+_destinations_by_id = sorted(MOCK_DESTINATIONS, key=lambda d: d["id"])
+_destination_ids = [d["id"] for d in _destinations_by_id]
+
+
+def get_destinations_version():
+    """Lấy phiên bản hiện tại của danh mục địa điểm"""
+    return _destinations_version
+
+
+def mark_destinations_changed():
+    """Đánh dấu danh mục địa điểm đã thay đổi để làm mới cache"""
+    global _destinations_version, _destinations_by_id, _destination_ids
+    _destinations_by_id = sorted(MOCK_DESTINATIONS, key=lambda d: d["id"])
+    _destination_ids = [d["id"] for d in _destinations_by_id]
+    _destinations_version += 1
+    return _destinations_version
+
 
 def get_all_destinations():
     """Lấy tất cả địa điểm"""
@@ -283,6 +316,40 @@ def filter_destinations(category=None, photo_spot=None, max_cost=None):
     return filtered
 
 
+def project_fields(record: dict, fields=None):
+    """Chỉ giữ các trường được yêu cầu của một bản ghi (fields=None giữ nguyên bản ghi)"""
+    if fields is None:
+        return record
+    return {field: record[field] for field in fields}
+
+
+def page_destinations(category=None, photo_spot=None, max_cost=None, after_id=None, limit=None, fields=None):
+    """
+    Lấy một trang địa điểm có ID lớn hơn after_id, chỉ giữ các trường trong fields.
+    Trả về (danh sách địa điểm, ID để lấy trang tiếp theo hoặc None nếu đã hết).
+    """
+    destinations = _destinations_by_id
+    start = bisect_right(_destination_ids, after_id) if after_id is not None else 0
+    page = []
+    last_id = None
+    
+    for index in range(start, len(destinations)):
+        dest = destinations[index]
+        if category and dest["category"] != category:
+            continue
+        if photo_spot is not None and dest["photo_spot"] != photo_spot:
+            continue
+        if max_cost is not None and dest["estimated_cost"] > max_cost:
+            continue
+        if limit is not None and len(page) == limit:
+            # Còn ít nhất một địa điểm khớp sau trang này
+            return page, last_id
+        page.append(project_fields(dest, fields))
+        last_id = dest["id"]
+    
+    return page, None
+
+
 def get_photo_spots():
     """Lấy tất cả địa điểm chụp ảnh đẹp"""
     return [d for d in MOCK_DESTINATIONS if d["photo_spot"]]
@@ -1,8 +1,16 @@
 # Dữ liệu mẫu lịch trình du lịch
 
+import hashlib
+import threading
+from bisect import bisect_left, bisect_right, insort
 from datetime import datetime, date
+from itertools import count
+from operator import itemgetter
 
-MOCK_ITINERARIES = [
+from app.data.records import Itinerary
+from app.data.snapshot import take_snapshot_table
+
+_SEED_ITINERARIES = [
     {
         "id": 1,
         "user_id": 1,
@@ -68,53 +76,424 @@ MOCK_ITINERARIES = [
     }
 ]
 
-# Counter để tạo ID mới cho itinerary
-_itinerary_id_counter = len(MOCK_ITINERARIES) + 1
+# Lưu dưới dạng bản ghi gọn thay cho dict; dùng snapshot nếu đặt DATA_SNAPSHOT_PATH
+_snapshot = take_snapshot_table("itineraries")
+if _snapshot is not None:
+    MOCK_ITINERARIES, _next_itinerary_id = _snapshot
+else:
+    MOCK_ITINERARIES = [Itinerary(**i) for i in _SEED_ITINERARIES]
+    _next_itinerary_id = len(MOCK_ITINERARIES) + 1
+del _SEED_ITINERARIES, _snapshot
+
+# Bộ sinh ID mới cho itinerary (chỉ gọi khi giữ _write_lock)
+_itinerary_ids = count(_next_itinerary_id)
+
+# Khóa ghi: cấp ID, thêm/xóa lịch trình và cập nhật chỉ mục diễn ra tuần tự.
+# Luồng đọc không cần khóa: chỉ mục ngày của mỗi người dùng / địa điểm là một _DateIndex bất biến,
+# mỗi lần ghi thay bằng bản mới dùng lại các đoạn không đổi, nên luồng đọc luôn thấy một bản chụp nhất quán.
+_write_lock = threading.Lock()
+
+# Số khóa tối đa trong một đoạn của _DateIndex
+_CHUNK_SIZE = 512
+_index_date = itemgetter(0)
+
+
+class _DateIndex:
+    """
+    Danh sách khóa (visit_date, id) đã sắp xếp, bất biến, chia thành các đoạn tuple tối đa _CHUNK_SIZE khóa.
+    Thêm khóa chỉ chép lại đoạn bị chạm tới và tuple các đoạn: O(_CHUNK_SIZE + n / _CHUNK_SIZE)
+    thay vì chép cả chỉ mục O(n) như một tuple phẳng.
+    """
+
+    __slots__ = ("_chunks", "_maxes", "_length")
+
+    def __init__(self, chunks=(), maxes=(), length=0):
+        self._chunks = tuple(chunks)
+        self._maxes = tuple(maxes)
+        self._length = length
+
+    @classmethod
+    def from_sorted(cls, keys):
+        """Dựng chỉ mục từ danh sách khóa đã sắp xếp"""
+        chunks = _split_chunk(keys)
+        return cls(chunks, [chunk[-1] for chunk in chunks], len(keys))
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            yield from chunk
+
+    def with_keys(self, keys):
+        """Bản mới có thêm các khóa; mỗi đoạn bị chạm tới được chép lại một lần cho cả lô"""
+        if not self._chunks:
+            return _DateIndex.from_sorted(sorted(keys))
+        last = len(self._chunks) - 1
+        groups = {}
+        for key in keys:
+            groups.setdefault(min(bisect_left(self._maxes, key), last), []).append(key)
+        chunks = list(self._chunks)
+        maxes = list(self._maxes)
+        # Thay từ đoạn cuối lên để vị trí các đoạn chưa xử lý không đổi
+        for position in sorted(groups, reverse=True):
+            merged = list(chunks[position])
+            added = groups[position]
+            if len(added) * 16 < len(merged):
+                for key in added:
+                    insort(merged, key)
+            else:
+                merged.extend(added)
+                merged.sort()
+            pieces = _split_chunk(merged)
+            chunks[position:position + 1] = pieces
+            maxes[position:position + 1] = [piece[-1] for piece in pieces]
+        return _DateIndex(chunks, maxes, self._length + len(keys))
+
+    def ids_between(self, from_date, to_date):
+        """ID theo thứ tự ngày của các khóa có ngày trong [from_date, to_date], O(log n + k); None là không giới hạn"""
+        chunks = self._chunks
+        position = bisect_left(self._maxes, from_date, key=_index_date) if from_date is not None else 0
+        if position == len(chunks):
+            return
+        chunk = chunks[position]
+        start = bisect_left(chunk, from_date, key=_index_date) if from_date is not None else 0
+        for chunk in chunks[position:]:
+            if to_date is not None and chunk[-1][0] > to_date:
+                for _, itinerary_id in chunk[start:bisect_right(chunk, to_date, key=_index_date)]:
+                    yield itinerary_id
+                return
+            for _, itinerary_id in chunk[start:]:
+                yield itinerary_id
+            start = 0
+
+
+def _split_chunk(keys):
+    """Chia danh sách khóa đã sắp xếp thành các đoạn tuple; chỉ tách khi dài quá hai lần _CHUNK_SIZE"""
+    if len(keys) <= 2 * _CHUNK_SIZE:
+        return [tuple(keys)] if keys else []
+    return [tuple(keys[start:start + _CHUNK_SIZE]) for start in range(0, len(keys), _CHUNK_SIZE)]
+
+
+_EMPTY_INDEX = _DateIndex()
+
+# Chỉ mục lịch trình theo ID, vị trí trong MOCK_ITINERARIES, và _DateIndex theo người dùng / địa điểm
+_itineraries_by_id = {}
+_positions = {}
+_user_date_index = {}
+_destination_date_index = {}
+
+# Số khóa đã xóa (tombstone) còn nằm trong chỉ mục ngày của từng người dùng / địa điểm.
+# Xóa chỉ bỏ lịch trình khỏi _itineraries_by_id; chỉ mục được dọn khi tombstone vượt quá một nửa.
+_user_tombstones = {}
+_destination_tombstones = {}
+
+
+# Số lịch trình theo (destination_id, visit_date, time_slot), cập nhật khi tạo/xóa lịch trình
+_visit_counts = {}
+
+
+def _count_visit(itinerary, delta: int):
+    """Cộng delta vào bộ đếm lượt ghé của lịch trình"""
+    key = (itinerary["destination_id"], itinerary["visit_date"], itinerary["time_slot"])
+    count = _visit_counts.get(key, 0) + delta
+    if count > 0:
+        _visit_counts[key] = count
+    else:
+        _visit_counts.pop(key, None)
+
+
+def _index_insert(index_map: dict, grouped: dict):
+    """Thêm các khóa {owner: [khóa]} vào chỉ mục, mỗi owner thay bản mới một lần cho cả lô"""
+    for owner, keys in grouped.items():
+        index_map[owner] = index_map.get(owner, _EMPTY_INDEX).with_keys(keys)
+
+
+def _index_tombstone(index_map: dict, tombstones: dict, owner: int):
+    """Ghi nhận một khóa đã xóa trong chỉ mục của owner, dọn chỉ mục khi tombstone chiếm quá nửa (O(1) khấu hao)"""
+    dead = tombstones.get(owner, 0) + 1
+    current = index_map.get(owner, _EMPTY_INDEX)
+    if dead * 2 <= len(current):
+        tombstones[owner] = dead
+        return
+    
+    tombstones.pop(owner, None)
+    live = [key for key in current if key[1] in _itineraries_by_id]
+    if live:
+        index_map[owner] = _DateIndex.from_sorted(live)
+    else:
+        index_map.pop(owner, None)
+
+
+def _index_itineraries(itineraries):
+    """Thêm các lịch trình vào các chỉ mục, gom khóa theo người dùng / địa điểm"""
+    by_user = {}
+    by_destination = {}
+    for itinerary in itineraries:
+        key = (itinerary.visit_date, itinerary.id)
+        _itineraries_by_id[itinerary.id] = itinerary
+        by_user.setdefault(itinerary.user_id, []).append(key)
+        by_destination.setdefault(itinerary.destination_id, []).append(key)
+        _count_visit(itinerary, 1)
+    _index_insert(_user_date_index, by_user)
+    _index_insert(_destination_date_index, by_destination)
+
+
+def _unindex_itinerary(itinerary: dict):
+    """Xóa lịch trình khỏi các chỉ mục; khóa trong chỉ mục ngày thành tombstone"""
+    _itineraries_by_id.pop(itinerary["id"], None)
+    _count_visit(itinerary, -1)
+    _index_tombstone(_user_date_index, _user_tombstones, itinerary["user_id"])
+    _index_tombstone(_destination_date_index, _destination_tombstones, itinerary["destination_id"])
+
+
+def _index_all(itineraries):
+    """Dựng chỉ mục cho danh sách lịch trình ban đầu: gom khóa rồi sắp xếp một lần, O(n log n)"""
+    for position, itinerary in enumerate(itineraries):
+        _positions[itinerary.id] = position
+    _index_itineraries(itineraries)
+
+
+_index_all(MOCK_ITINERARIES)
+
+
+def _to_date_key(value):
+    """Chuyển date hoặc chuỗi ngày về chuỗi ISO để so sánh"""
+    if value is None or isinstance(value, str):
+        return value
+    return value.isoformat()
+
+
+def _range_in_index(index, from_date, to_date):
+    """Lấy các lịch trình trong khoảng ngày từ một chỉ mục đã sắp xếp bằng tìm kiếm nhị phân, O(log n + k)"""
+    return _resolve(index.ids_between(from_date, to_date))
+
+
+def _resolve(itinerary_ids):
+    """Đổi danh sách ID thành lịch trình, bỏ qua lịch trình vừa bị xóa bởi luồng khác"""
+    by_id = _itineraries_by_id
+    return [itinerary for itinerary in map(by_id.get, itinerary_ids) if itinerary is not None]
+
+
+# Bộ đếm thay đổi lịch trình theo từng người dùng (dùng cho ETag)
+_user_itinerary_versions = {}
+
+
+def get_user_itineraries_version(user_id: int):
+    """Lấy phiên bản lịch trình của một người dùng, tăng mỗi khi tạo hoặc xóa lịch trình"""
+    return _user_itinerary_versions.get(user_id, 0)
+
+
+def _bump_user_itineraries_version(user_id: int):
+    """Tăng phiên bản lịch trình của người dùng (gọi khi giữ _write_lock)"""
+    _user_itinerary_versions[user_id] = _user_itinerary_versions.get(user_id, 0) + 1
+
+
+# Dấu vân tay nội dung lịch trình theo người dùng (dùng cho ETag): XOR của băm (id, created_at) từng lịch trình.
+# Khác bộ đếm phiên bản (riêng từng tiến trình), giá trị chỉ phụ thuộc dữ liệu nên mọi worker dùng chung
+# dữ liệu cho cùng kết quả, và ID cấp lại sau khi khởi động lại vẫn khác created_at.
+# Chỉ tính khi có người hỏi lần đầu; sau đó cập nhật khi tạo/xóa.
+_user_itinerary_digests = {}
+
+
+def _itinerary_digest(itinerary) -> int:
+    key = f"{itinerary['id']}:{itinerary['created_at']}".encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def _update_user_digest(itinerary):
+    """Thêm hoặc bỏ một lịch trình khỏi dấu vân tay của người dùng (gọi khi giữ _write_lock)"""
+    user_id = itinerary["user_id"]
+    if user_id in _user_itinerary_digests:
+        _user_itinerary_digests[user_id] ^= _itinerary_digest(itinerary)
+
+
+def get_user_itineraries_digest(user_id: int) -> str:
+    """Dấu vân tay nội dung lịch trình của một người dùng, giống nhau ở mọi worker có cùng dữ liệu"""
+    digest = _user_itinerary_digests.get(user_id)
+    if digest is None:
+        with _write_lock:
+            digest = 0
+            for itinerary in get_itineraries_by_user(user_id):
+                digest ^= _itinerary_digest(itinerary)
+            _user_itinerary_digests[user_id] = digest
+    return f"{digest:016x}"
+
+
+# Các hàm được gọi khi lịch trình thay đổi, nhận (sự kiện "create"/"delete", lịch trình)
+_change_listeners = []
+
+
+def subscribe_itinerary_changes(listener):
+    """Đăng ký hàm nhận thông báo mỗi khi lịch trình được tạo hoặc xóa"""
+    _change_listeners.append(listener)
+
+
+def _notify_itinerary_change(event: str, itinerary: dict):
+    """Thông báo thay đổi lịch trình cho các hàm đã đăng ký"""
+    for listener in _change_listeners:
+        listener(event, itinerary)
 
 
 def get_all_itineraries():
-    """Lấy tất cả lịch trình"""
-    return MOCK_ITINERARIES
+    """Lấy bản chụp tất cả lịch trình"""
+    return list(MOCK_ITINERARIES)
 
 
 def get_itinerary_by_id(itinerary_id: int):
     """Lấy lịch trình theo ID"""
-    for itinerary in MOCK_ITINERARIES:
-        if itinerary["id"] == itinerary_id:
-            return itinerary
-    return None
+    return _itineraries_by_id.get(itinerary_id)
 
 
 def get_itineraries_by_user(user_id: int):
-    """Lấy tất cả lịch trình của một người dùng"""
-    return [i for i in MOCK_ITINERARIES if i["user_id"] == user_id]
+    """Lấy tất cả lịch trình của một người dùng, theo thứ tự tạo"""
+    index = _user_date_index.get(user_id, _EMPTY_INDEX)
+    return _resolve(sorted(itinerary_id for _, itinerary_id in index))
+
+
+# Kho dữ liệu dùng chung giữa các worker (SharedStore); None khi chạy một tiến trình
+_store = None
+
+# Nhật ký ghi (WriteAheadLog) nhận mọi lịch trình mới và lịch trình đã xóa; None khi không bật
+_write_log = None
+
+
+def _peek_next_itinerary_id():
+    """ID sẽ cấp cho lịch trình tiếp theo (gọi khi giữ _write_lock)"""
+    global _itinerary_ids
+    next_id = next(_itinerary_ids)
+    _itinerary_ids = count(next_id)
+    return next_id
+
+
+def _reserve_itinerary_ids(next_id: int):
+    """Đảm bảo ID mới cấp từ next_id trở lên, sau khi nạp lại nhật ký ghi (gọi khi giữ _write_lock)"""
+    global _itinerary_ids
+    _itinerary_ids = count(max(next(_itinerary_ids), next_id))
+
+
+def _add_itineraries(itineraries):
+    """Thêm các lịch trình đã có ID vào bộ nhớ, chỉ mục và thông báo (gọi khi giữ _write_lock)"""
+    # Cập nhật chỉ mục trước khi thêm vào danh sách để luồng đọc thấy lịch trình ở danh sách thì cũng tìm được theo ID
+    _index_itineraries(itineraries)
+    for itinerary in itineraries:
+        _positions[itinerary.id] = len(MOCK_ITINERARIES)
+        MOCK_ITINERARIES.append(itinerary)
+    
+    for user_id in {itinerary.user_id for itinerary in itineraries}:
+        _bump_user_itineraries_version(user_id)
+    for itinerary in itineraries:
+        _update_user_digest(itinerary)
+    for itinerary in itineraries:
+        _notify_itinerary_change("create", itinerary)
+
+
+def _remove_itinerary(itinerary_id: int):
+    """
+    Xóa lịch trình theo ID trong O(1): đổi chỗ với phần tử cuối rồi bỏ phần tử cuối (swap-remove),
+    sửa trực tiếp MOCK_ITINERARIES nên mọi module đã import danh sách đều thấy thay đổi.
+    Gọi khi giữ _write_lock; trả về lịch trình đã xóa hoặc None nếu không tìm thấy.
+    """
+    itinerary = _itineraries_by_id.get(itinerary_id)
+    if itinerary is None:
+        return None
+    
+    _unindex_itinerary(itinerary)
+    position = _positions.pop(itinerary_id)
+    last = MOCK_ITINERARIES[-1]
+    if last is not itinerary:
+        MOCK_ITINERARIES[position] = last
+        _positions[last["id"]] = position
+    MOCK_ITINERARIES.pop()
+    
+    _bump_user_itineraries_version(itinerary["user_id"])
+    _update_user_digest(itinerary)
+    _notify_itinerary_change("delete", itinerary)
+    return itinerary
+
+
+def _apply_itinerary_changes(created=(), deleted_ids=()):
+    """Áp dụng thay đổi đã ghi ở kho dùng chung (lịch trình mới và ID đã xóa) vào bộ nhớ của tiến trình này"""
+    with _write_lock:
+        created = [itinerary for itinerary in created if itinerary.id not in _itineraries_by_id]
+        if created:
+            _add_itineraries(created)
+        for itinerary_id in deleted_ids:
+            _remove_itinerary(itinerary_id)
 
 
 def create_itinerary(user_id: int, destination_id: int, visit_date: str, time_slot: str, emotion_tag: str = None):
-    """Tạo lịch trình mới"""
-    global _itinerary_id_counter
-    
-    new_itinerary = {
-        "id": _itinerary_id_counter,
-        "user_id": user_id,
-        "destination_id": destination_id,
-        "visit_date": visit_date,
-        "time_slot": time_slot,
-        "emotion_tag": emotion_tag,
-        "created_at": datetime.now().isoformat()
-    }
+    """Tạo lịch trình mới (an toàn khi nhiều luồng cùng gọi)"""
+    if _store is not None:
+        return _store.create_itineraries([{
+            "user_id": user_id,
+            "destination_id": destination_id,
+            "visit_date": visit_date,
+            "time_slot": time_slot,
+            "emotion_tag": emotion_tag
+        }])[0]
     
-    MOCK_ITINERARIES.append(new_itinerary)
-    _itinerary_id_counter += 1
+    created_at = datetime.now().isoformat()
+    
+    with _write_lock:
+        new_itinerary = Itinerary(
+            id=next(_itinerary_ids),
+            user_id=user_id,
+            destination_id=destination_id,
+            visit_date=visit_date,
+            time_slot=time_slot,
+            emotion_tag=emotion_tag,
+            created_at=created_at
+        )
+        _add_itineraries((new_itinerary,))
+        if _write_log is not None:
+            _write_log.log_itineraries((new_itinerary,))
     
     return new_itinerary
 
 
+def create_itineraries(entries):
+    """
+    Tạo nhiều lịch trình trong một lần ghi (giữ khóa một lần, tăng phiên bản mỗi người dùng một lần).
+    Mỗi phần tử là dict có user_id, destination_id, visit_date, time_slot và emotion_tag (tùy chọn).
+    Trả về danh sách lịch trình đã tạo theo đúng thứ tự.
+    """
+    if _store is not None:
+        return _store.create_itineraries(entries)
+    
+    created_at = datetime.now().isoformat()
+    
+    with _write_lock:
+        created = [
+            Itinerary(
+                id=next(_itinerary_ids),
+                user_id=entry["user_id"],
+                destination_id=entry["destination_id"],
+                visit_date=entry["visit_date"],
+                time_slot=entry["time_slot"],
+                emotion_tag=entry.get("emotion_tag"),
+                created_at=created_at
+            )
+            for entry in entries
+        ]
+        _add_itineraries(created)
+        if _write_log is not None:
+            _write_log.log_itineraries(created)
+    
+    return created
+
+
 def delete_itinerary(itinerary_id: int):
-    """Xóa lịch trình"""
-    global MOCK_ITINERARIES
-    MOCK_ITINERARIES = [i for i in MOCK_ITINERARIES if i["id"] != itinerary_id]
-    return True
+    """Xóa lịch trình theo ID trong O(1). Trả về True nếu đã xóa, False nếu không tìm thấy."""
+    if _store is not None:
+        return _store.delete_itinerary(itinerary_id)
+    
+    with _write_lock:
+        if _remove_itinerary(itinerary_id) is None:
+            return False
+        if _write_log is not None:
+            _write_log.log_deleted_itinerary(itinerary_id)
+        return True
 
 
 def filter_itineraries(user_id=None, destination_id=None, emotion_tag=None):
@@ -131,3 +510,33 @@ def filter_itineraries(user_id=None, destination_id=None, emotion_tag=None):
         filtered = [i for i in filtered if i["emotion_tag"] == emotion_tag]
     
     return filtered
+
+
+def get_itineraries_in_date_range(user_id=None, destination_id=None, from_date=None, to_date=None):
+    """
+    Lấy lịch trình của một người dùng và/hoặc một địa điểm có visit_date trong khoảng [from_date, to_date].
+    Kết quả sắp xếp theo ngày; from_date/to_date nhận date hoặc chuỗi ISO, None nghĩa là không giới hạn.
+    """
+    from_date, to_date = _to_date_key(from_date), _to_date_key(to_date)
+    
+    if user_id is None and destination_id is None:
+        return sorted(
+            (i for i in MOCK_ITINERARIES
+             if (from_date is None or i["visit_date"] >= from_date) and (to_date is None or i["visit_date"] <= to_date)),
+            key=lambda i: (i["visit_date"], i["id"])
+        )
+    
+    # Dùng chỉ mục nhỏ hơn rồi lọc theo điều kiện còn lại
+    user_index = _user_date_index.get(user_id, _EMPTY_INDEX) if user_id is not None else None
+    destination_index = _destination_date_index.get(destination_id, _EMPTY_INDEX) if destination_id is not None else None
+    if user_index is None or (destination_index is not None and len(destination_index) < len(user_index)):
+        matches = _range_in_index(destination_index, from_date, to_date)
+        return matches if user_id is None else [i for i in matches if i["user_id"] == user_id]
+    
+    matches = _range_in_index(user_index, from_date, to_date)
+    return matches if destination_id is None else [i for i in matches if i["destination_id"] == destination_id]
+
+
+def get_visit_count(destination_id: int, visit_date, time_slot: str):
+    """Số lịch trình ghé một địa điểm vào một ngày và buổi, đọc O(1) từ bộ đếm"""
+    return _visit_counts.get((destination_id, _to_date_key(visit_date), time_slot), 0)
@@ -1,8 +1,13 @@
 # Dữ liệu mẫu người dùng
 
+import threading
 from datetime import datetime
+from itertools import count
 
-MOCK_USERS = [
+from app.data.records import User
+from app.data.snapshot import take_snapshot_table
+
+_SEED_USERS = [
     {
         "id": 1,
         "name": "Nguyễn Văn An",
@@ -59,43 +64,136 @@ MOCK_USERS = [
     }
 ]
 
-# Counter để tạo ID mới cho user
-_user_id_counter = len(MOCK_USERS) + 1
+# Lưu dưới dạng bản ghi gọn thay cho dict; dùng snapshot nếu đặt DATA_SNAPSHOT_PATH
+_snapshot = take_snapshot_table("users")
+if _snapshot is not None:
+    MOCK_USERS, _next_user_id = _snapshot
+else:
+    MOCK_USERS = [User(**u) for u in _SEED_USERS]
+    _next_user_id = len(MOCK_USERS) + 1
+del _SEED_USERS, _snapshot
+
+# Bộ sinh ID mới cho user (chỉ gọi khi giữ _write_lock)
+_user_ids = count(_next_user_id)
+
+# Khóa ghi: cấp ID và thêm người dùng diễn ra tuần tự; luồng đọc không cần khóa
+_write_lock = threading.Lock()
+
+# Chỉ mục người dùng theo ID
+_users_by_id = {user["id"]: user for user in MOCK_USERS}
 
 
 def get_all_users():
-    """Lấy tất cả người dùng"""
-    return MOCK_USERS
+    """Lấy bản chụp tất cả người dùng"""
+    return list(MOCK_USERS)
 
 
 def get_user_by_id(user_id: int):
     """Lấy người dùng theo ID"""
-    for user in MOCK_USERS:
-        if user["id"] == user_id:
-            return user
-    return None
+    return _users_by_id.get(user_id)
+
+
+def get_users_by_ids(user_ids):
+    """Lấy nhiều người dùng theo danh sách ID; trả về danh sách cùng thứ tự, None nếu không tìm thấy"""
+    users_by_id = _users_by_id
+    return [users_by_id.get(user_id) for user_id in user_ids]
+
+
+# Kho dữ liệu dùng chung giữa các worker (SharedStore); None khi chạy một tiến trình
+_store = None
+
+# Nhật ký ghi (WriteAheadLog) nhận mọi người dùng mới; None khi không bật
+_write_log = None
+
+
+def _peek_next_user_id():
+    """ID sẽ cấp cho người dùng tiếp theo (gọi khi giữ _write_lock)"""
+    global _user_ids
+    next_id = next(_user_ids)
+    _user_ids = count(next_id)
+    return next_id
+
+
+def _reserve_user_ids(next_id: int):
+    """Đảm bảo ID mới cấp từ next_id trở lên, sau khi nạp lại nhật ký ghi (gọi khi giữ _write_lock)"""
+    global _user_ids
+    _user_ids = count(max(next(_user_ids), next_id))
+
+
+def _add_users(users):
+    """Thêm các người dùng đã có ID vào bộ nhớ (gọi khi giữ _write_lock)"""
+    for new_user in users:
+        _users_by_id[new_user.id] = new_user
+    MOCK_USERS.extend(users)
+
+
+def _apply_user_changes(created):
+    """Áp dụng người dùng mới đã ghi ở kho dùng chung vào bộ nhớ của tiến trình này"""
+    with _write_lock:
+        _add_users([user for user in created if user.id not in _users_by_id])
 
 
 def create_user(name: str, personality_type: str, travel_style: str, transport_type: str, has_itinerary: bool):
-    """Tạo người dùng mới"""
-    global _user_id_counter
+    """Tạo người dùng mới (an toàn khi nhiều luồng cùng gọi)"""
+    if _store is not None:
+        return _store.create_users([{
+            "name": name,
+            "personality_type": personality_type,
+            "travel_style": travel_style,
+            "transport_type": transport_type,
+            "has_itinerary": has_itinerary
+        }])[0]
     
-    new_user = {
-        "id": _user_id_counter,
-        "name": name,
-        "personality_type": personality_type,
-        "travel_style": travel_style,
-        "transport_type": transport_type,
-        "has_itinerary": has_itinerary,
-        "created_at": datetime.now().isoformat()
-    }
+    created_at = datetime.now().isoformat()
     
-    MOCK_USERS.append(new_user)
-    _user_id_counter += 1
+    with _write_lock:
+        new_user = User(
+            id=next(_user_ids),
+            name=name,
+            personality_type=personality_type,
+            travel_style=travel_style,
+            transport_type=transport_type,
+            has_itinerary=has_itinerary,
+            created_at=created_at
+        )
+        _add_users((new_user,))
+        if _write_log is not None:
+            _write_log.log_users((new_user,))
     
     return new_user
 
 
+def create_users(entries):
+    """
+    Tạo nhiều người dùng trong một lần ghi (giữ khóa một lần).
+    Mỗi phần tử là dict có name, personality_type, travel_style, transport_type và has_itinerary.
+    Trả về danh sách người dùng đã tạo theo đúng thứ tự.
+    """
+    if _store is not None:
+        return _store.create_users(entries)
+    
+    created_at = datetime.now().isoformat()
+    
+    with _write_lock:
+        created = [
+            User(
+                id=next(_user_ids),
+                name=entry["name"],
+                personality_type=entry["personality_type"],
+                travel_style=entry["travel_style"],
+                transport_type=entry["transport_type"],
+                has_itinerary=entry.get("has_itinerary", False),
+                created_at=created_at
+            )
+            for entry in entries
+        ]
+        _add_users(created)
+        if _write_log is not None:
+            _write_log.log_users(created)
+    
+    return created
+
+
 def filter_users_by_preferences(personality_type=None, travel_style=None):
     """Lọc người dùng theo tính cách và phong cách du lịch"""
     filtered = MOCK_USERS.copy()
@@ -0,0 +1,102 @@
+# Kiểu bản ghi gọn (dataclass có __slots__) cho người dùng, địa điểm và lịch trình
+#
+# Mỗi bản ghi là một đối tượng __slots__ bất biến thay cho dict: không có bảng băm và khóa chuỗi
+# lặp lại trên từng bản ghi. Các giá trị dạng enum (time_slot, category, personality_type, ...)
+# và visit_date được intern nên mọi bản ghi dùng chung một đối tượng chuỗi.
+#
+# Bộ nhớ mỗi bản ghi trên CPython 3.11 64-bit (sys.getsizeof, chưa tính các giá trị dùng chung):
+#   Itinerary   : 88 byte (dict tương đương: 272 byte)
+#   User        : 88 byte (dict tương đương: 272 byte)
+#   Destination : 96 byte (dict tương đương: 272 byte)
+#
+# Bản ghi vẫn đọc được theo kiểu dict (record["name"], record.get(...)) để mã hiện có không đổi;
+# chỉ tạo dict thật bằng to_dict() tại ranh giới API.
+
+import sys
+from collections import deque
+from dataclasses import dataclass, fields
+from itertools import repeat
+from typing import ClassVar, Optional, Tuple
+
+
+class _RecordAccess:
+    """Cho phép đọc bản ghi như dict"""
+    __slots__ = ()
+    _interned: ClassVar[Tuple[str, ...]] = ()
+
+    def __post_init__(self):
+        for name in self._interned:
+            value = getattr(self, name)
+            if isinstance(value, str):
+                object.__setattr__(self, name, sys.intern(value))
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+    def keys(self):
+        return [f.name for f in fields(self)]
+
+    def to_dict(self) -> dict:
+        """Tạo dict từ bản ghi (chỉ dùng tại ranh giới API)"""
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+    @classmethod
+    def from_columns(cls, columns):
+        """
+        Dựng nhiều bản ghi từ các cột giá trị (theo thứ tự trường), nhanh hơn gọi __init__ từng dòng ~3 lần.
+        Bỏ qua __post_init__: chuỗi ở các cột cần intern phải đã được intern sẵn (snapshot intern từ điển giá trị).
+        """
+        records = list(map(object.__new__, repeat(cls, len(columns[0]) if columns else 0)))
+        for name, values in zip(cls.__slots__, columns):
+            # Gán cả cột qua descriptor của slot, không có vòng lặp Python cho từng dòng
+            deque(map(getattr(cls, name).__set__, records, values), maxlen=0)
+        return records
+
+
+@dataclass(frozen=True, slots=True)
+class Destination(_RecordAccess):
+    """Địa điểm du lịch"""
+    _interned: ClassVar[Tuple[str, ...]] = ("category", "location")
+
+    id: int
+    name: str
+    location: str
+    category: str
+    photo_spot: bool
+    estimated_cost: Optional[float]
+    estimated_time: Optional[int]
+    description: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class User(_RecordAccess):
+    """Người dùng và sở thích du lịch"""
+    _interned: ClassVar[Tuple[str, ...]] = ("personality_type", "travel_style", "transport_type")
+
+    id: int
+    name: str
+    personality_type: str
+    travel_style: str
+    transport_type: str
+    has_itinerary: bool
+    created_at: str
+
+
+@dataclass(frozen=True, slots=True)
+class Itinerary(_RecordAccess):
+    """Một địa điểm trong lịch trình của người dùng vào một ngày và buổi"""
+    _interned: ClassVar[Tuple[str, ...]] = ("visit_date", "time_slot", "emotion_tag")
+
+    id: int
+    user_id: int
+    destination_id: int
+    visit_date: str
+    time_slot: str
+    emotion_tag: Optional[str]
+    created_at: str
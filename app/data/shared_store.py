@@ -0,0 +1,332 @@
+# Kho dữ liệu dùng chung cho chế độ nhiều worker (SQLite, chế độ WAL)
+#
+# Mỗi worker vẫn đọc từ bộ nhớ của mình (danh sách, chỉ mục, cache) nên đọc không đổi tốc độ.
+# Mọi lệnh ghi người dùng/lịch trình đi qua một tệp SQLite chung: ID do SQLite cấp nên không
+# trùng giữa các worker, và mỗi lệnh ghi thêm một dòng vào bảng change_log (seq tăng dần).
+#
+# Kênh làm mới cache: mỗi worker nhớ seq cuối đã áp dụng. PRAGMA data_version cho biết khi có
+# tiến trình khác commit; khi đó worker đọc các dòng change_log mới và áp dụng vào bộ nhớ qua
+# cùng đường tạo/xóa như khi chạy một tiến trình, nên mọi hàm đăng ký thay đổi lịch trình
+# (cache view, bộ đếm đám đông, bộ gợi ý, ...) được cập nhật giống hệt.
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from app.data import mock_itineraries, mock_users
+from app.data.records import Itinerary, User
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    personality_type TEXT NOT NULL,
+    travel_style TEXT NOT NULL,
+    transport_type TEXT NOT NULL,
+    has_itinerary INTEGER NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS itineraries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    destination_id INTEGER NOT NULL,
+    visit_date TEXT NOT NULL,
+    time_slot TEXT NOT NULL,
+    emotion_tag TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS change_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    entity TEXT NOT NULL,
+    op TEXT NOT NULL,
+    entity_id INTEGER NOT NULL
+);
+"""
+
+_USER_COLUMNS = ("id", "name", "personality_type", "travel_style", "transport_type", "has_itinerary", "created_at")
+_ITINERARY_COLUMNS = ("id", "user_id", "destination_id", "visit_date", "time_slot", "emotion_tag", "created_at")
+
+
+def _user_from_row(row):
+    values = dict(zip(_USER_COLUMNS, row))
+    values["has_itinerary"] = bool(values["has_itinerary"])
+    return User(**values)
+
+
+def _itinerary_from_row(row):
+    return Itinerary(**dict(zip(_ITINERARY_COLUMNS, row)))
+
+
+class SharedStore:
+    """Kho SQLite dùng chung giữa các worker, đồng bộ bộ nhớ từng worker qua bảng change_log"""
+
+    def __init__(self, path: str, log_retention: int = 10000, trim_every: int = 1000):
+        self.path = path
+        self.log_retention = log_retention
+        self.trim_every = trim_every
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.RLock()
+        self._last_seq = 0
+        self._data_version = None
+        self._writes = 0
+        self._applied = 0
+        self._reloads = 0
+        # Lỗi của luồng nền được ghi lại và báo qua stats() thay vì in ra stdout
+        self._failures = 0
+        self._last_error = None
+        self._poller = None
+        self._stop = threading.Event()
+        self._conn.executescript(_SCHEMA)
+        self._seed()
+
+    @contextmanager
+    def _transaction(self):
+        """Giao dịch ghi (BEGIN IMMEDIATE giữ khóa ghi của tệp ngay từ đầu)"""
+        cursor = self._conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            yield cursor
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+        cursor.execute("COMMIT")
+
+    def _seed(self):
+        """Worker đầu tiên chép dữ liệu mẫu vào tệp; các worker sau bỏ qua"""
+        with self._lock, self._transaction() as cursor:
+            if cursor.execute("SELECT 1 FROM meta WHERE key = 'seeded'").fetchone():
+                return
+            cursor.executemany(
+                f"INSERT OR IGNORE INTO users VALUES ({', '.join('?' * len(_USER_COLUMNS))})",
+                [tuple(user[c] for c in _USER_COLUMNS) for user in mock_users.get_all_users()]
+            )
+            cursor.executemany(
+                f"INSERT OR IGNORE INTO itineraries VALUES ({', '.join('?' * len(_ITINERARY_COLUMNS))})",
+                [tuple(itinerary[c] for c in _ITINERARY_COLUMNS) for itinerary in mock_itineraries.get_all_itineraries()]
+            )
+            cursor.execute("INSERT INTO meta VALUES ('seeded', ?)", (datetime.now().isoformat(),))
+
+    def attach(self):
+        """Nạp toàn bộ dữ liệu từ tệp vào bộ nhớ và chuyển mọi lệnh ghi sang kho dùng chung"""
+        with self._lock:
+            self._reload()
+            mock_users._store = self
+            mock_itineraries._store = self
+
+    def detach(self):
+        """Quay lại ghi trong bộ nhớ của tiến trình và dừng luồng đồng bộ"""
+        self.stop_polling()
+        with self._lock:
+            if mock_users._store is self:
+                mock_users._store = None
+            if mock_itineraries._store is self:
+                mock_itineraries._store = None
+
+    def close(self):
+        self.detach()
+        with self._lock:
+            self._conn.close()
+
+    def _reload(self):
+        """Đối chiếu toàn bộ bộ nhớ với tệp (khi khởi động hoặc khi change_log đã bị cắt bớt)"""
+        conn = self._conn
+        # Đọc data_version trước khi đọc dữ liệu: commit xen vào giữa sẽ làm lần kiểm tra sau thấy thay đổi
+        data_version = self._read_data_version()
+        conn.execute("BEGIN")
+        try:
+            last_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+            users = [_user_from_row(row) for row in conn.execute("SELECT * FROM users ORDER BY id")]
+            itineraries = [_itinerary_from_row(row) for row in conn.execute("SELECT * FROM itineraries ORDER BY id")]
+        finally:
+            conn.execute("COMMIT")
+
+        stored_ids = {itinerary.id for itinerary in itineraries}
+        stale_ids = [i["id"] for i in mock_itineraries.get_all_itineraries() if i["id"] not in stored_ids]
+        mock_users._apply_user_changes(users)
+        mock_itineraries._apply_itinerary_changes(created=itineraries, deleted_ids=stale_ids)
+        self._last_seq = last_seq
+        self._data_version = data_version
+        self._reloads += 1
+
+    def _read_data_version(self):
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def sync_if_changed(self, blocking: bool = True):
+        """
+        Đồng bộ nếu tiến trình khác đã ghi vào tệp (một lệnh PRAGMA, rất rẻ); trả về số thay đổi đã áp dụng.
+        blocking=False bỏ qua ngay nếu luồng khác đang ghi hoặc đồng bộ (luồng đó sẽ áp dụng thay đổi).
+        """
+        if not self._lock.acquire(blocking):
+            return 0
+        try:
+            data_version = self._read_data_version()
+            if data_version == self._data_version:
+                return 0
+            self._data_version = data_version
+            return self.sync()
+        finally:
+            self._lock.release()
+
+    def sync(self):
+        """Áp dụng các dòng change_log mới vào bộ nhớ; trả về số thay đổi đã áp dụng"""
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                first_seq = conn.execute("SELECT MIN(seq) FROM change_log").fetchone()[0]
+                if first_seq is not None and first_seq > self._last_seq + 1:
+                    # Đã bỏ lỡ các dòng bị cắt: nạp lại toàn bộ
+                    reload = True
+                else:
+                    reload = False
+                    changes = conn.execute(
+                        "SELECT seq, entity, op, entity_id FROM change_log WHERE seq > ? ORDER BY seq",
+                        (self._last_seq,)
+                    ).fetchall()
+                    created_user_ids = [c[3] for c in changes if c[1] == "user"]
+                    created_itinerary_ids = [c[3] for c in changes if c[1] == "itinerary" and c[2] == "create"]
+                    users = self._fetch(conn, "users", created_user_ids, _user_from_row)
+                    itineraries = self._fetch(conn, "itineraries", created_itinerary_ids, _itinerary_from_row)
+            finally:
+                conn.execute("COMMIT")
+
+            if reload:
+                self._reload()
+                return 0
+            if not changes:
+                return 0
+
+            deleted_ids = [c[3] for c in changes if c[1] == "itinerary" and c[2] == "delete"]
+            mock_users._apply_user_changes(users)
+            mock_itineraries._apply_itinerary_changes(created=itineraries, deleted_ids=deleted_ids)
+            self._last_seq = changes[-1][0]
+            self._applied += len(changes)
+            return len(changes)
+
+    @staticmethod
+    def _fetch(conn, table, ids, from_row):
+        """Đọc các dòng theo ID (dòng đã bị xóa sau đó thì bỏ qua)"""
+        rows = []
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows.extend(conn.execute(
+                f"SELECT * FROM {table} WHERE id IN ({', '.join('?' * len(chunk))}) ORDER BY id", chunk
+            ))
+        return [from_row(row) for row in rows]
+
+    def create_users(self, entries):
+        """Ghi nhiều người dùng vào tệp trong một giao dịch rồi áp dụng vào bộ nhớ"""
+        created_at = datetime.now().isoformat()
+        with self._lock:
+            created = []
+            with self._transaction() as cursor:
+                for entry in entries:
+                    values = (
+                        entry["name"], entry["personality_type"], entry["travel_style"],
+                        entry["transport_type"], int(entry.get("has_itinerary", False)), created_at
+                    )
+                    cursor.execute(
+                        "INSERT INTO users (name, personality_type, travel_style, transport_type, has_itinerary, created_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?)", values
+                    )
+                    created.append(_user_from_row((cursor.lastrowid,) + values))
+                cursor.executemany(
+                    "INSERT INTO change_log (entity, op, entity_id) VALUES ('user', 'create', ?)",
+                    [(user.id,) for user in created]
+                )
+            self._after_write()
+            return [mock_users.get_user_by_id(user.id) or user for user in created]
+
+    def create_itineraries(self, entries):
+        """Ghi nhiều lịch trình vào tệp trong một giao dịch rồi áp dụng vào bộ nhớ"""
+        created_at = datetime.now().isoformat()
+        with self._lock:
+            created = []
+            with self._transaction() as cursor:
+                for entry in entries:
+                    values = (
+                        entry["user_id"], entry["destination_id"], entry["visit_date"],
+                        entry["time_slot"], entry.get("emotion_tag"), created_at
+                    )
+                    cursor.execute(
+                        "INSERT INTO itineraries (user_id, destination_id, visit_date, time_slot, emotion_tag, created_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?)", values
+                    )
+                    created.append(_itinerary_from_row((cursor.lastrowid,) + values))
+                cursor.executemany(
+                    "INSERT INTO change_log (entity, op, entity_id) VALUES ('itinerary', 'create', ?)",
+                    [(itinerary.id,) for itinerary in created]
+                )
+            self._after_write()
+            return [mock_itineraries.get_itinerary_by_id(itinerary.id) or itinerary for itinerary in created]
+
+    def delete_itinerary(self, itinerary_id: int):
+        """Xóa lịch trình trong tệp rồi áp dụng vào bộ nhớ; trả về False nếu không tìm thấy"""
+        with self._lock:
+            with self._transaction() as cursor:
+                deleted = cursor.execute("DELETE FROM itineraries WHERE id = ?", (itinerary_id,)).rowcount
+                if deleted:
+                    cursor.execute(
+                        "INSERT INTO change_log (entity, op, entity_id) VALUES ('itinerary', 'delete', ?)",
+                        (itinerary_id,)
+                    )
+            if deleted:
+                self._after_write()
+            return bool(deleted)
+
+    def _after_write(self):
+        """Áp dụng ngay thay đổi của chính worker này (và của worker khác ghi trước đó), thỉnh thoảng cắt change_log"""
+        # Như sync_if_changed: data_version đọc trước sync() để không bỏ lỡ commit xen vào giữa
+        data_version = self._read_data_version()
+        self.sync()
+        self._data_version = data_version
+        self._writes += 1
+        if self._writes % self.trim_every == 0:
+            with self._transaction() as cursor:
+                cursor.execute("DELETE FROM change_log WHERE seq <= ?", (self._last_seq - self.log_retention,))
+
+    def start_polling(self, interval: float):
+        """Chạy luồng nền kiểm tra thay đổi của worker khác mỗi `interval` giây"""
+        if self._poller is not None:
+            return
+        self._stop.clear()
+
+        def poll():
+            while not self._stop.wait(interval):
+                try:
+                    self.sync_if_changed()
+                except sqlite3.Error as e:
+                    self._record_error("Sync", e)
+
+        self._poller = threading.Thread(target=poll, name="shared-store-sync", daemon=True)
+        self._poller.start()
+
+    def _record_error(self, context: str, error: Exception):
+        self._failures += 1
+        self._last_error = f"{context}: {type(error).__name__}: {error}"
+
+    def stop_polling(self):
+        self._stop.set()
+        if self._poller is not None:
+            self._poller.join(timeout=5)
+            self._poller = None
+
+    def stats(self):
+        """Thống kê đồng bộ cho /metrics"""
+        with self._lock:
+            return {
+                "path": self.path,
+                "last_seq": self._last_seq,
+                "writes": self._writes,
+                "applied_changes": self._applied,
+                "reloads": self._reloads,
+                "failures": self._failures,
+                "last_error": self._last_error
+            }
@@ -0,0 +1,295 @@
+# Ảnh chụp dữ liệu nhị phân dạng cột (snapshot) để worker khởi động nhanh
+#
+# Định dạng tệp (little-endian, mọi đoạn dữ liệu cột căn lề 8 byte):
+#   8 byte   magic b"DLSNAP01"
+#   4 byte   độ dài phần đầu (uint32)
+#   phần đầu JSON: mỗi bảng có số dòng, next_id và danh sách cột (tên, kiểu, vị trí, độ dài)
+#   các đoạn dữ liệu cột, vị trí tính từ đầu phần dữ liệu
+#
+# Kiểu cột (lấy từ kiểu trường của bản ghi trong records.py):
+#   int   : mảng int64 ('q'); None lưu bằng INT64_MIN
+#   float : mảng float64 ('d'); None lưu bằng NaN
+#   bool  : mảng int8 ('b')
+#   str   : mã hóa từ điển: mảng mã uint32 ('I', 0xFFFFFFFF là None) + mảng vị trí uint32 và khối UTF-8
+#           của các giá trị khác nhau. Giá trị lặp (buổi, ngày, loại, ...) chỉ lưu và giải mã một lần.
+#
+# Khi khởi động, worker ánh xạ tệp vào bộ nhớ (mmap chỉ đọc): các worker dùng chung trang của tệp
+# trong page cache, cột được đọc bằng memoryview.cast (không sao chép, không phân tích cú pháp, không
+# kiểm tra lại) rồi bản ghi được dựng trong một lượt. Việc kiểm tra dữ liệu chỉ làm một lần khi tạo snapshot.
+#
+# Tạo/xem snapshot bằng scripts/data_snapshot.py, rồi đặt DATA_SNAPSHOT_PATH để worker khởi động từ snapshot.
+
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from dataclasses import fields
+from datetime import datetime
+from typing import Optional, Union, get_args, get_origin
+
+from app.data.records import Destination, Itinerary, User
+
+MAGIC = b"DLSNAP01"
+_HEADER_LENGTH = struct.Struct("<I")
+_INT_NULL = -(2 ** 63)
+_STR_NULL = 0xFFFFFFFF
+
+# Tên bảng -> kiểu bản ghi, theo thứ tự ghi trong tệp
+TABLES = {
+    "destinations": Destination,
+    "users": User,
+    "itineraries": Itinerary
+}
+
+_KINDS = {int: "int", float: "float", bool: "bool", str: "str"}
+
+
+class SnapshotError(Exception):
+    """Tệp snapshot hỏng, sai định dạng hoặc dữ liệu đầu vào không hợp lệ"""
+
+
+def _columns_of(record_type):
+    """Danh sách (tên cột, kiểu, cho phép None) theo thứ tự trường của bản ghi"""
+    columns = []
+    for field in fields(record_type):
+        field_type, nullable = field.type, False
+        if get_origin(field_type) is Union:
+            args = [arg for arg in get_args(field_type) if arg is not type(None)]
+            field_type, nullable = args[0], True
+        columns.append((field.name, _KINDS[field_type], nullable))
+    return columns
+
+
+def _pad(length: int) -> bytes:
+    return b"\0" * (-length % 8)
+
+
+def _native(values: array) -> bytes:
+    """Bytes little-endian của một mảng"""
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _encode_column(kind: str, values):
+    """Mã hóa một cột thành danh sách đoạn bytes (mỗi đoạn sẽ được căn lề 8 byte)"""
+    if kind == "int":
+        return [_native(array("q", (_INT_NULL if v is None else v for v in values)))]
+    if kind == "float":
+        return [_native(array("d", (math.nan if v is None else v for v in values)))]
+    if kind == "bool":
+        return [_native(array("b", (1 if v else 0 for v in values)))]
+
+    codes = array("I")
+    dictionary = {}
+    for value in values:
+        if value is None:
+            codes.append(_STR_NULL)
+            continue
+        code = dictionary.get(value)
+        if code is None:
+            code = dictionary[value] = len(dictionary)
+        codes.append(code)
+    encoded = [value.encode("utf-8") for value in dictionary]
+    offsets = array("I", [0])
+    for chunk in encoded:
+        offsets.append(offsets[-1] + len(chunk))
+    return [_native(codes), _native(offsets), b"".join(encoded)]
+
+
+def write_snapshot(path: str, tables: dict, next_ids: Optional[dict] = None) -> dict:
+    """
+    Ghi snapshot từ {tên bảng: danh sách bản ghi hoặc dict}; bảng thiếu được ghi rỗng.
+    Dict được kiểm tra bằng cách dựng bản ghi (thiếu/thừa trường, sai kiểu, trùng ID báo SnapshotError).
+    Ghi nguyên tử (tệp tạm rồi os.replace) nên worker đang đọc tệp cũ không bị ảnh hưởng.
+    Trả về phần đầu (metadata) đã ghi.
+    """
+    next_ids = next_ids or {}
+    header = {"format": 1, "created_at": datetime.now().isoformat(), "tables": {}}
+    chunks = []
+    position = 0
+
+    for table, record_type in TABLES.items():
+        records = []
+        for row in tables.get(table, ()):
+            if isinstance(row, record_type):
+                records.append(row)
+                continue
+            try:
+                records.append(record_type(**row))
+            except TypeError as e:
+                raise SnapshotError(f"{table}: invalid row {row!r}: {e}") from None
+        ids = [record.id for record in records]
+        if len(set(ids)) != len(ids):
+            raise SnapshotError(f"{table}: duplicate ids")
+
+        columns = []
+        for name, kind, nullable in _columns_of(record_type):
+            values = [getattr(record, name) for record in records]
+            if not nullable and any(v is None for v in values):
+                raise SnapshotError(f"{table}.{name}: missing value")
+            try:
+                parts = _encode_column(kind, values)
+            except (TypeError, OverflowError, AttributeError) as e:
+                raise SnapshotError(f"{table}.{name}: expected {kind} values: {e}") from None
+            spans = []
+            for part in parts:
+                spans.append([position, len(part)])
+                chunks.append(part + _pad(len(part)))
+                position += len(chunks[-1])
+            columns.append({"name": name, "kind": kind, "spans": spans})
+
+        header["tables"][table] = {
+            "rows": len(records),
+            "next_id": max(next_ids.get(table, 0), max(ids, default=0) + 1),
+            "columns": columns
+        }
+
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    prefix = MAGIC + _HEADER_LENGTH.pack(len(header_bytes)) + header_bytes
+    prefix += _pad(len(prefix))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".snapshot-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(prefix)
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp tạo tệp 0600; snapshot cần đọc được như tệp thường
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return header
+
+
+def _read_array(view: memoryview, typecode: str, span) -> list:
+    """Đọc một đoạn của tệp thành list Python (cast trực tiếp trên trang đã ánh xạ)"""
+    start, length = span
+    with view[start:start + length] as raw, raw.cast(typecode) as values:
+        if sys.byteorder == "little":
+            return values.tolist()
+        swapped = array(typecode, values)
+    swapped.byteswap()
+    return swapped.tolist()
+
+
+def _decode_column(view: memoryview, column: dict, intern: bool) -> list:
+    kind, spans = column["kind"], column["spans"]
+    if kind == "int":
+        return [None if v == _INT_NULL else v for v in _read_array(view, "q", spans[0])]
+    if kind == "float":
+        return [None if v != v else v for v in _read_array(view, "d", spans[0])]
+    if kind == "bool":
+        return [v != 0 for v in _read_array(view, "b", spans[0])]
+
+    offsets = _read_array(view, "I", spans[1])
+    start = spans[2][0]
+    blob = view[start:start + spans[2][1]]
+    try:
+        values = [str(blob[a:b], "utf-8") for a, b in zip(offsets, offsets[1:])]
+    finally:
+        blob.release()
+    if intern:
+        values = [sys.intern(value) for value in values]
+    # Mã None (0xFFFFFFFF) được đổi thành chỉ số của phần tử None thêm vào cuối
+    values.append(None)
+    null_index = len(values) - 1
+    return [values[null_index if code == _STR_NULL else code] for code in _read_array(view, "I", spans[0])]
+
+
+def _parse_header(data) -> tuple:
+    """Tách (metadata, vị trí bắt đầu phần dữ liệu) từ đầu tệp"""
+    fixed = len(MAGIC) + _HEADER_LENGTH.size
+    if len(data) < fixed or bytes(data[:len(MAGIC)]) != MAGIC:
+        raise SnapshotError("not a data snapshot")
+    (length,) = _HEADER_LENGTH.unpack(data[len(MAGIC):fixed])
+    if len(data) < fixed + length:
+        raise SnapshotError("truncated snapshot header")
+    header = json.loads(bytes(data[fixed:fixed + length]))
+    data_start = fixed + length
+    return header, data_start + (-data_start % 8)
+
+
+def read_header(path: str) -> dict:
+    """Đọc phần đầu (metadata) của snapshot"""
+    with open(path, "rb") as f:
+        fixed = f.read(len(MAGIC) + _HEADER_LENGTH.size)
+        if len(fixed) == len(MAGIC) + _HEADER_LENGTH.size:
+            fixed += f.read(_HEADER_LENGTH.unpack(fixed[len(MAGIC):])[0])
+    return _parse_header(fixed)[0]
+
+
+def read_snapshot(path: str) -> dict:
+    """
+    Đọc snapshot bằng mmap chỉ đọc.
+    Trả về {tên bảng: (danh sách bản ghi, next_id)}.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise SnapshotError(f"{path} is empty")
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    tables = {}
+    try:
+        header, data_start = _parse_header(mapped)
+        with memoryview(mapped) as whole, whole[data_start:] as view:
+            for table, record_type in TABLES.items():
+                meta = header["tables"].get(table)
+                if meta is None:
+                    tables[table] = ([], 1)
+                    continue
+                expected = [name for name, _, _ in _columns_of(record_type)]
+                if [column["name"] for column in meta["columns"]] != expected:
+                    raise SnapshotError(f"{path}: {table} columns do not match {record_type.__name__}")
+                columns = [
+                    _decode_column(view, column, column["name"] in record_type._interned)
+                    for column in meta["columns"]
+                ]
+                records = record_type.from_columns(columns)
+                tables[table] = (records, meta["next_id"])
+    finally:
+        mapped.close()
+    return tables
+
+
+def configured_snapshot_path():
+    """DATA_SNAPSHOT_PATH; khi chỉ bật nhật ký ghi (DATA_WAL_PATH) thì snapshot nằm cạnh nhật ký"""
+    path = os.getenv("DATA_SNAPSHOT_PATH")
+    if not path and os.getenv("DATA_WAL_PATH"):
+        path = os.getenv("DATA_WAL_PATH") + ".snap"
+    return path
+
+
+# Snapshot đọc khi module dữ liệu đầu tiên cần (mỗi bảng chỉ được lấy một lần)
+_configured = None
+
+
+def take_snapshot_table(table: str):
+    """
+    Lấy (danh sách bản ghi, next_id) của một bảng từ snapshot cấu hình (xem configured_snapshot_path).
+    Trả về None nếu không cấu hình hoặc tệp chưa tồn tại (khi đó dùng dữ liệu mẫu).
+    """
+    global _configured
+    if _configured is None:
+        _configured = {}
+        path = configured_snapshot_path()
+        if path and os.path.exists(path):
+            started = time.perf_counter()
+            _configured = read_snapshot(path)
+            rows = sum(len(records) for records, _ in _configured.values())
+            print(f"Loaded data snapshot {path}: {rows} rows in {(time.perf_counter() - started) * 1000:.1f} ms")
+        elif path:
+            print(f"Data snapshot {path} not found - using built-in sample data")
+    return _configured.pop(table, None)
@@ -0,0 +1,296 @@
+# Nhật ký ghi trước (write-ahead log) cho người dùng và lịch trình khi chạy trong bộ nhớ
+#
+# Mỗi lệnh ghi (tạo người dùng, tạo lịch trình, xóa lịch trình) được thêm vào cuối tệp nhật ký dưới
+# dạng một khung: 4 byte độ dài + 4 byte CRC32 + JSON một dòng. Lệnh ghi chỉ thêm khung vào bộ đệm
+# trong bộ nhớ; luồng nền ghi bộ đệm ra tệp và fsync một lần cho cả nhóm mỗi `sync_interval` giây,
+# nên lệnh ghi vẫn nhanh như trong bộ nhớ và tối đa `sync_interval` giây dữ liệu gần nhất có thể mất
+# khi máy sập. sync_interval = 0 thì fsync ngay trong từng lệnh ghi (không mất dữ liệu, chậm hơn).
+#
+# Khi khởi động: snapshot (xem snapshot.py) đã được nạp lúc import, open() đọc lại phần nhật ký sau
+# snapshot và áp dụng qua cùng đường tạo/xóa như SharedStore nên mọi hàm đăng ký thay đổi được cập nhật.
+# Khung cuối bị ghi dở (độ dài hoặc CRC sai) bị cắt bỏ.
+#
+# Nén nhật ký (compaction): sau `compact_every` lệnh ghi, dữ liệu hiện tại được chụp lại (chỉ giữ khóa
+# ghi trong lúc sao chép danh sách), ghi thành snapshot mới ở luồng nền trong khi các lệnh ghi vẫn tiếp
+# tục vào nhật ký, rồi nhật ký được thay bằng phần đuôi ghi sau thời điểm chụp. Áp dụng lại nhật ký là
+# lũy đẳng (ID đã có thì bỏ qua), nên sập ở bất kỳ bước nào cũng khôi phục đúng.
+
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows: không khóa tệp
+    fcntl = None
+
+from app.data import mock_destinations, mock_itineraries, mock_users
+from app.data.records import Itinerary, User
+from app.data.snapshot import write_snapshot
+
+_FRAME = struct.Struct("<II")
+
+
+def _encode(entry) -> bytes:
+    payload = json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _values(record):
+    return [getattr(record, name) for name in record.__slots__]
+
+
+def read_log(path: str):
+    """
+    Đọc các lệnh ghi hợp lệ trong tệp nhật ký.
+    Trả về (danh sách lệnh ghi, số byte hợp lệ); dừng ở khung đầu tiên bị ghi dở hoặc hỏng.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return [], 0
+
+    entries = []
+    offset = 0
+    while offset + _FRAME.size <= len(data):
+        length, crc = _FRAME.unpack_from(data, offset)
+        start = offset + _FRAME.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            break
+        entries.append(json.loads(payload))
+        offset = start + length
+    return entries, offset
+
+
+class WriteAheadLog:
+    """Nhật ký ghi trước với fsync theo nhóm và nén định kỳ thành snapshot"""
+
+    def __init__(self, path: str, snapshot_path: str, sync_interval: float = 0.1, compact_every: int = 100000):
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self.sync_interval = sync_interval
+        self.compact_every = compact_every
+        self._file = None
+        # Khung chờ ghi ra tệp; _lock bảo vệ bộ đệm, _io_lock giữ thứ tự ghi/fsync/thay tệp.
+        # Thứ tự khóa: khóa ghi dữ liệu -> _io_lock -> _lock.
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._since_compaction = 0
+        self._compacting = False
+        self._appended = 0
+        self._replayed = 0
+        self._fsyncs = 0
+        self._last_fsync_ms = 0.0
+        self._compactions = 0
+        # Lỗi của luồng nền được ghi lại và báo qua stats() thay vì in ra stdout
+        self._failures = 0
+        self._last_error = None
+        self._stop = threading.Event()
+        self._flusher = None
+
+    def open(self):
+        """Áp dụng lại nhật ký sau snapshot, bắt đầu ghi nhận mọi lệnh ghi và chạy luồng fsync"""
+        leftover = self.path + ".tmp"
+        if os.path.exists(leftover):
+            os.unlink(leftover)
+        entries, valid_bytes = read_log(self.path)
+        self._file = open(self.path, "ab")
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                self._file.close()
+                raise RuntimeError(f"{self.path} is already used by another process; run one worker per write log") from None
+        if valid_bytes < self._file.tell():
+            print(f"Write log {self.path}: dropping {self._file.tell() - valid_bytes} bytes of an incomplete entry")
+            self._file.truncate(valid_bytes)
+            self._file.seek(valid_bytes)
+
+        started = time.perf_counter()
+        with mock_users._write_lock, mock_itineraries._write_lock:
+            self._replay(entries)
+            mock_users._write_log = self
+            mock_itineraries._write_log = self
+        self._replayed = len(entries)
+        self._since_compaction = len(entries)
+        print(f"Replayed {len(entries)} write log entries in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        if self.sync_interval > 0:
+            self._stop.clear()
+            self._flusher = threading.Thread(target=self._run, name="write-log-sync", daemon=True)
+            self._flusher.start()
+
+    def _replay(self, entries):
+        """Áp dụng các lệnh ghi đã đọc (gọi khi giữ khóa ghi của cả hai module)"""
+        users, itineraries, deleted_ids = [], [], []
+        for entry in entries:
+            if entry[0] == "user":
+                users.append(User(*entry[1]))
+            elif entry[0] == "itinerary":
+                itineraries.append(Itinerary(*entry[1]))
+            elif entry[0] == "delete_itinerary":
+                deleted_ids.append(entry[1])
+
+        # Lịch trình được tạo rồi xóa ngay trong nhật ký thì không cần dựng lại
+        deleted = set(deleted_ids)
+        mock_users._add_users([user for user in users if user.id not in mock_users._users_by_id])
+        created = [
+            itinerary for itinerary in itineraries
+            if itinerary.id not in deleted and itinerary.id not in mock_itineraries._itineraries_by_id
+        ]
+        if created:
+            mock_itineraries._add_itineraries(created)
+        for itinerary_id in deleted_ids:
+            mock_itineraries._remove_itinerary(itinerary_id)
+
+        mock_users._reserve_user_ids(max((user.id for user in users), default=0) + 1)
+        mock_itineraries._reserve_itinerary_ids(max((i.id for i in itineraries), default=0) + 1)
+
+    def log_users(self, users):
+        """Ghi nhận người dùng mới (gọi khi giữ khóa ghi của mock_users)"""
+        self._append([["user", _values(user)] for user in users])
+
+    def log_itineraries(self, itineraries):
+        """Ghi nhận lịch trình mới (gọi khi giữ khóa ghi của mock_itineraries)"""
+        self._append([["itinerary", _values(itinerary)] for itinerary in itineraries])
+
+    def log_deleted_itinerary(self, itinerary_id: int):
+        """Ghi nhận lịch trình đã xóa (gọi khi giữ khóa ghi của mock_itineraries)"""
+        self._append([["delete_itinerary", itinerary_id]])
+
+    def _append(self, entries):
+        if not entries:
+            return
+        frames = [_encode(entry) for entry in entries]
+        with self._lock:
+            self._buffer.extend(frames)
+            self._appended += len(frames)
+            self._since_compaction += len(frames)
+            compact = self._since_compaction >= self.compact_every and not self._compacting
+            if compact:
+                self._compacting = True
+        if self.sync_interval <= 0:
+            self.flush()
+        if compact:
+            threading.Thread(target=self._compact_in_background, name="write-log-compact", daemon=True).start()
+
+    def flush(self):
+        """Ghi bộ đệm ra tệp và fsync (một lần cho cả nhóm)"""
+        with self._io_lock:
+            with self._lock:
+                frames, self._buffer = self._buffer, []
+            if not frames or self._file is None:
+                return
+            started = time.perf_counter()
+            self._file.write(b"".join(frames))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._fsyncs += 1
+            self._last_fsync_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    def compact(self):
+        """Ghi dữ liệu hiện tại thành snapshot mới rồi chỉ giữ phần nhật ký ghi sau thời điểm chụp"""
+        with self._compact_lock:
+            # Chụp dữ liệu: chỉ giữ khóa ghi trong lúc sao chép danh sách và ghi nốt bộ đệm
+            with mock_users._write_lock, mock_itineraries._write_lock:
+                tables = {
+                    "destinations": list(mock_destinations.get_all_destinations()),
+                    "users": mock_users.get_all_users(),
+                    "itineraries": mock_itineraries.get_all_itineraries()
+                }
+                next_ids = {
+                    "users": mock_users._peek_next_user_id(),
+                    "itineraries": mock_itineraries._peek_next_itinerary_id()
+                }
+                self.flush()
+                with self._io_lock, self._lock:
+                    self._since_compaction = 0
+                    offset = self._file.tell()
+
+            write_snapshot(self.snapshot_path, tables, next_ids)
+
+            # Thay nhật ký bằng phần đuôi ghi trong lúc tạo snapshot
+            with self._io_lock:
+                with self._lock:
+                    frames, self._buffer = self._buffer, []
+                self._file.write(b"".join(frames))
+                self._file.flush()
+                with open(self.path, "rb") as f:
+                    f.seek(offset)
+                    tail = f.read()
+                temp_path = self.path + ".tmp"
+                with open(temp_path, "wb") as f:
+                    f.write(tail)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+                old_file, self._file = self._file, open(self.path, "ab")
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                old_file.close()
+                self._fsyncs += 1
+            self._compactions += 1
+
+    def _compact_in_background(self):
+        try:
+            self.compact()
+        except Exception as e:
+            self._record_error("Compaction", e)
+        finally:
+            with self._lock:
+                self._compacting = False
+
+    def _run(self):
+        while not self._stop.wait(self.sync_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                self._record_error("Sync", e)
+
+    def _record_error(self, context: str, error: Exception):
+        self._failures += 1
+        self._last_error = f"{context}: {type(error).__name__}: {error}"
+
+    def close(self):
+        """Ngừng ghi nhận, ghi nốt bộ đệm và đóng tệp"""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+            self._flusher = None
+        with mock_users._write_lock, mock_itineraries._write_lock:
+            if mock_users._write_log is self:
+                mock_users._write_log = None
+            if mock_itineraries._write_log is self:
+                mock_itineraries._write_log = None
+        self.flush()
+        with self._io_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self):
+        """Thống kê nhật ký ghi cho /metrics"""
+        with self._lock:
+            pending = len(self._buffer)
+        return {
+            "path": self.path,
+            "snapshot_path": self.snapshot_path,
+            "sync_interval_seconds": self.sync_interval,
+            "log_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            "pending_entries": pending,
+            "appended": self._appended,
+            "replayed": self._replayed,
+            "since_compaction": self._since_compaction,
+            "fsyncs": self._fsyncs,
+            "last_fsync_ms": self._last_fsync_ms,
+            "compactions": self._compactions,
+            "failures": self._failures,
+            "last_error": self._last_error
+        }
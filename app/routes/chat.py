@@ -1,10 +1,15 @@
 from fastapi import APIRouter, HTTPException, status
 from typing import Optional, Dict, Any, List
+from datetime import date
 import re
 
 from app.data import get_user_by_id, get_all_destinations
 from app.schemas.chat import ChatRequest, ChatResponse
 from app.services.ai_service import ai_service
+from app.services.chat_session import chat_session_store
+from app.services.crowd import crowd_service
+from app.services.recommender import destination_recommender
+from app.services.emotion_rankings import emotion_rankings
 
 router = APIRouter(prefix="/api", tags=["chat"])
 
@@ -119,6 +124,14 @@ def chat_with_assistant(request: ChatRequest):
     # Build user context
     user_context = get_user_context(user)
     
+    # Load rolling conversation context for multi-turn chat
+    if request.new_session:
+        chat_session_store.clear(request.user_id)
+    history = chat_session_store.get_history(request.user_id)
+    
+    # One time budget for every AI call made while answering this message
+    deadline = ai_service.new_deadline()
+    
     # Initialize response components
     ai_response = ""
     suggested_destinations = None
@@ -127,53 +140,31 @@ def chat_with_assistant(request: ChatRequest):
     try:
         # Handle emotion-based destination suggestions
         if detected_emotion:
-            # Get destinations from mock data
-            destinations = get_all_destinations()
-            destinations_list = [
-                {
-                    "id": dest["id"],
-                    "name": dest["name"],
-                    "location": dest["location"],
-                    "category": dest["category"],
-                    "photo_spot": dest["photo_spot"],
-                    "estimated_cost": dest["estimated_cost"],
-                    "estimated_time": dest["estimated_time"],
-                    "description": dest["description"]
-                }
-                for dest in destinations[:15]
-            ]
-            
-            # Get emotion-based suggestions from AI
-            emotion_suggestions = ai_service.suggest_destinations_by_emotion(
-                detected_emotion,
-                destinations_list
-            )
+            # Precomputed ranking for this emotion and personality (no AI call on the request path)
+            emotion_suggestions = emotion_rankings.lookup(detected_emotion, user["personality_type"])
             
             # Format suggested destinations
             suggested_destinations = []
-            for rec in emotion_suggestions.get("recommendations", [])[:5]:
-                # Find matching destination
-                matching_dest = next(
-                    (d for d in destinations_list if d["name"] == rec.get("destination_name")),
-                    None
-                )
-                if matching_dest:
-                    suggested_destinations.append({
-                        "id": matching_dest["id"],
-                        "name": matching_dest["name"],
-                        "location": matching_dest["location"],
-                        "reason": rec.get("reason", "Suitable for your mood"),
-                        "priority": rec.get("priority", "medium"),
-                        "cost": matching_dest["estimated_cost"],
-                        "time": matching_dest["estimated_time"],
-                        "photo_spot": matching_dest["photo_spot"]
-                    })
+            for rec in emotion_suggestions["recommendations"]:
+                matching_dest = rec["destination"]
+                suggested_destinations.append({
+                    "id": matching_dest["id"],
+                    "name": matching_dest["name"],
+                    "location": matching_dest["location"],
+                    "reason": rec["reason"],
+                    "priority": rec["priority"],
+                    "cost": matching_dest["estimated_cost"],
+                    "time": matching_dest["estimated_time"],
+                    "photo_spot": matching_dest["photo_spot"]
+                })
             
             # Build response with emotion context
             emotion_context = f"\n\nEmotion detected: {detected_emotion}. {emotion_suggestions.get('emotion_analysis', '')}"
             ai_response = ai_service.chat_with_gemini(
                 request.message + emotion_context,
-                user_context
+                user_context,
+                history,
+                deadline
             )
         
         # Handle photo spot requests
@@ -198,7 +189,9 @@ def chat_with_assistant(request: ChatRequest):
             
             ai_response = ai_service.chat_with_gemini(
                 request.message + "\n\nContext: User is looking for photo spots in Da Lat.",
-                user_context
+                user_context,
+                history,
+                deadline
             )
         
         # Handle destination suggestions
@@ -211,26 +204,45 @@ def chat_with_assistant(request: ChatRequest):
                 # Prefer less crowded, peaceful spots
                 all_destinations = [d for d in all_destinations if d["category"] == "local"]
             
-            suggested_destinations = [
-                {
+            # Personalized ranking learned from everyone's itineraries (no AI call)
+            ranked = destination_recommender.recommend(user, all_destinations, k=len(all_destinations))
+            
+            quiet_slots = {}
+            if user["personality_type"] == "introvert":
+                # Steer away from crowds: keep the ranking but move busy places down (O(1) counter reads)
+                today = date.today()
+                quiet_slots = {r["destination"]["id"]: crowd_service.quietest_slot(r["destination"]["id"], today) for r in ranked}
+                crowd_order = {"quiet": 0, "busy": 1, "crowded": 2}
+                ranked.sort(key=lambda r: crowd_order[crowd_service.level(quiet_slots[r["destination"]["id"]][1])])
+            
+            suggested_destinations = []
+            for recommendation in ranked[:5]:
+                dest = recommendation["destination"]
+                suggestion = {
                     "id": dest["id"],
                     "name": dest["name"],
                     "location": dest["location"],
                     "category": dest["category"],
-                    "reason": f"Matches your {user['personality_type']} personality",
+                    "reason": recommendation["reason"],
                     "priority": "high",
                     "cost": dest["estimated_cost"],
                     "time": dest["estimated_time"],
                     "photo_spot": dest["photo_spot"]
                 }
-                for dest in all_destinations[:5]
-            ]
+                if dest["id"] in quiet_slots:
+                    quiet_slot, visitors = quiet_slots[dest["id"]]
+                    suggestion["quiet_time_slot"] = quiet_slot
+                    suggestion["crowd_level"] = crowd_service.level(visitors)
+                suggested_destinations.append(suggestion)
             
-            ai_response = ai_service.chat_with_gemini(request.message, user_context)
+            ai_response = ai_service.chat_with_gemini(request.message, user_context, history, deadline)
         
         # Handle general queries
         else:
-            ai_response = ai_service.chat_with_gemini(request.message, user_context)
+            ai_response = ai_service.chat_with_gemini(request.message, user_context, history, deadline)
+        
+        # Remember this exchange for the next turn
+        chat_session_store.record_turn(request.user_id, request.message, ai_response)
         
         # Build response
         return ChatResponse(
@@ -241,7 +253,8 @@ def chat_with_assistant(request: ChatRequest):
                 "detected_emotion": detected_emotion,
                 "detected_intents": detected_intents,
                 "user_personality": user["personality_type"],
-                "user_travel_style": user["travel_style"]
+                "user_travel_style": user["travel_style"],
+                "context_turns": len(history.turns) if history else 0
             }
         )
     
@@ -261,6 +274,7 @@ def chat_with_assistant(request: ChatRequest):
             metadata={
                 "detected_emotion": detected_emotion,
                 "detected_intents": detected_intents,
+                "ai_mode": "degraded" if ai_service.degraded else "normal",
                 "error": str(e)
             }
         )
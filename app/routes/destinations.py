@@ -1,16 +1,28 @@
-from fastapi import APIRouter, HTTPException, status, Query
+from fastapi import APIRouter, HTTPException, status, Query, Request, Response
 from typing import Optional, List
-from app.data import get_all_destinations, filter_destinations, get_photo_spots as get_photo_spots_data
+from datetime import date
 from app.schemas.destination import DestinationResponse
+from app.services.catalog import catalog_snapshot
+from app.services.http_cache import make_etag, etag_matches, cache_headers, not_modified
+from app.services.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor, parse_fields
+from app.services.crowd import crowd_service
+from app.data import DESTINATION_FIELDS, get_destination_by_id
+
+# Longest date range accepted by the per-destination crowd outlook
+MAX_CROWD_OUTLOOK_DAYS = 31
 
 router = APIRouter(prefix="/api/destinations", tags=["destinations"])
 
 
 @router.get("", response_model=List[DestinationResponse])
 def get_destinations(
+    request: Request,
     category: Optional[str] = Query(None, description="Filter by category: local or famous"),
     photo_spot: Optional[bool] = Query(None, description="Filter by photo spot availability"),
-    max_cost: Optional[float] = Query(None, description="Filter by maximum cost", ge=0)
+    max_cost: Optional[float] = Query(None, description="Filter by maximum cost", ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=100, description="Page size; omit to return every match"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. name,estimated_cost")
 ):
     """
     List all Da Lat destinations with optional filters.
@@ -19,95 +31,119 @@ def get_destinations(
     - category: Filter by 'local' or 'famous' destinations
     - photo_spot: Filter destinations that are photo spots (true/false)
     - max_cost: Filter destinations with cost less than or equal to specified amount
+    
+    Pagination and projection:
+    - limit: Return at most this many destinations, ordered by ID. When more remain, the
+      X-Next-Cursor response header holds the cursor for the next page
+    - cursor: Continue after the page that returned this cursor
+    - fields: Only return these fields (id is always included)
+    
+    Served from the pre-encoded catalog snapshot; rows are not re-validated per request.
+    Supports conditional GET: the ETag tracks the catalog version and content, and a matching
+    If-None-Match returns 304 Not Modified.
     """
-    destinations = filter_destinations(category=category, photo_spot=photo_spot, max_cost=max_cost)
-    return destinations
+    etag = make_etag("catalog", catalog_snapshot.fingerprint)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    if limit is None and cursor is None and fields is None:
+        return Response(
+            content=catalog_snapshot.destinations_json(category=category, photo_spot=photo_spot, max_cost=max_cost),
+            media_type="application/json",
+            headers=cache_headers(etag)
+        )
+    
+    content, next_after = catalog_snapshot.destinations_page_json(
+        category=category,
+        photo_spot=photo_spot,
+        max_cost=max_cost,
+        after_id=decode_cursor(cursor, "destinations", int),
+        limit=limit,
+        fields=parse_fields(fields, DESTINATION_FIELDS, always=("id",))
+    )
+    headers = cache_headers(etag)
+    if next_after is not None:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor("destinations", next_after)
+    return Response(content=content, media_type="application/json", headers=headers)
 
 
 @router.get("/photo-spots")
-def get_photo_spots():
+def get_photo_spots(request: Request):
     """
     Get all destinations that are great photo spots with descriptions of why they are photogenic.
     Perfect for Instagram-worthy locations and photography enthusiasts.
     
     Returns destinations with photo_spot=True, including details about their visual appeal.
+    The payload is built once per catalog version and served as pre-encoded JSON.
     """
-    photo_destinations = get_photo_spots_data()
-    
-    if not photo_destinations:
-        return {
-            "message": "No photo spots found",
-            "photo_spots": []
-        }
+    etag = make_etag("photo-spots", catalog_snapshot.fingerprint)
+    if etag_matches(request, etag):
+        return not_modified(etag)
     
-    # Enhance with photogenic reasons
-    photo_reasons = {
-        "Hồ Xuân Hương": "Serene lake reflections, swan boats, and pine trees create picture-perfect scenes",
-        "Lang Biang Mountain": "Panoramic mountain views, misty peaks, and sweeping valley vistas",
-        "Thung Lũng Tình Yêu (Valley of Love)": "Colorful flower gardens, romantic scenery, and artistic installations",
-        "The Florest": "European-style architecture, vibrant flower arrangements, and Instagram-worthy café aesthetics",
-        "God Valley (Thung Lũng Vàng)": "Golden grass fields, dramatic lighting at sunset, untouched natural beauty",
-        "Crazy House (Hằng Nga Villa)": "Surreal architecture, whimsical designs, unique angles and structures",
-        "Datanla Waterfall": "Cascading water, lush greenery, and dramatic natural formations",
-        "Trúc Lâm Zen Monastery": "Peaceful temple architecture, Tuyền Lâm Lake views, cable car perspectives",
-        "Da Lat Railway Station": "French colonial charm, vintage trains, historic architectural details",
-        "Bảo Đại Summer Palace": "Art Deco elegance, historical ambiance, manicured gardens",
-        "XQ Historical Village": "Stunning silk embroidery art, traditional Vietnamese craftsmanship displays",
-        "Linh Phước Pagoda": "Colorful mosaic details, 49-meter dragon sculpture, intricate glass work",
-        "Da Lat Flower Gardens": "Vibrant flower displays, seasonal blooms, creative topiary designs",
-        "Mê Linh Coffee Garden": "Scenic coffee plantations, mountain backdrop, terraced landscapes",
-        "Elephant Falls": "Powerful cascades, natural rock formations, jungle surroundings",
-        "Pongour Waterfall": "Seven-tiered falls, wide cascades, best during rainy season",
-        "Ana Mandara Villas": "Colonial French architecture, elegant villa exteriors, luxury aesthetics",
-        "Clay Tunnel (Hầm Đất Sét)": "Quirky clay sculptures, creative art installations, unique textures"
-    }
-    
-    enhanced_spots = []
-    for destination in photo_destinations:
-        enhanced_spots.append({
-            "id": destination["id"],
-            "name": destination["name"],
-            "location": destination["location"],
-            "category": destination["category"],
-            "estimated_cost": destination["estimated_cost"],
-            "estimated_time": destination["estimated_time"],
-            "description": destination["description"],
-            "photogenic_features": photo_reasons.get(
-                destination["name"],
-                "Beautiful scenery perfect for photography and creating lasting memories"
-            ),
-            "photography_tips": _get_photography_tips(destination["name"], destination["category"])
-        })
+    return Response(
+        content=catalog_snapshot.photo_spots_json(),
+        media_type="application/json",
+        headers=cache_headers(etag)
+    )
+
+
+@router.get("/crowd")
+def get_crowd_heatmap(
+    visit_date: Optional[date] = Query(None, description="Day to report (defaults to today)")
+):
+    """
+    Crowd heatmap: planned visitors per destination and time slot for one day.
     
+    Each slot is labelled quiet, busy or crowded from the number of saved itineraries
+    for that destination, date and slot. Destinations are listed busiest first.
+    Counts are kept up to date on every itinerary create and delete, so this does not
+    scan itineraries.
+    """
+    visit_date = visit_date or date.today()
     return {
-        "total_photo_spots": len(enhanced_spots),
-        "photo_spots": enhanced_spots,
-        "general_tips": [
-            "Best lighting: Early morning (6-8 AM) or golden hour (4-6 PM)",
-            "Da Lat weather can change quickly - bring protective gear for your camera",
-            "Respect local customs and ask permission before photographing people",
-            "Many spots get crowded during holidays - visit on weekdays for better shots"
-        ]
+        "visit_date": visit_date.isoformat(),
+        "thresholds": {
+            "busy": crowd_service.busy_threshold,
+            "crowded": crowd_service.crowded_threshold
+        },
+        "destinations": crowd_service.heatmap(visit_date)
     }
 
 
-def _get_photography_tips(destination_name: str, category: str) -> List[str]:
-    """Generate specific photography tips for each destination."""
-    tips_map = {
-        "Hồ Xuân Hương": ["Visit at sunrise for misty lake shots", "Capture swan boats for romantic compositions"],
-        "Lang Biang Mountain": ["Use wide-angle lens for panoramic views", "Morning fog creates dramatic atmosphere"],
-        "Thung Lũng Tình Yêu (Valley of Love)": ["Afternoon light enhances flower colors", "Use props and installations creatively"],
-        "The Florest": ["Soft natural lighting ideal for portraits", "Focus on floral details and architecture"],
-        "God Valley (Thung Lũng Vàng)": ["Golden hour is essential", "Bring wide-angle lens for landscape shots"],
-        "Crazy House (Hằng Nga Villa)": ["Explore different angles and levels", "Early morning avoids crowds"],
-        "Datanla Waterfall": ["Use slow shutter for silky water effect", "Bring waterproof protection"],
-        "Linh Phước Pagoda": ["Capture mosaic details up close", "Colorful dragon sculpture is main feature"]
-    }
+@router.get("/{destination_id}/crowd")
+def get_destination_crowd(
+    destination_id: int,
+    from_date: Optional[date] = Query(None, description="First day (defaults to today)"),
+    to_date: Optional[date] = Query(None, description="Last day (defaults to from_date)")
+):
+    """
+    Crowd outlook for one destination: planned visitors and level per day and time slot.
     
-    default_tips = [
-        f"Great for {category} destination photography",
-        "Arrive early to avoid crowds"
-    ]
+    The range is inclusive and limited to 31 days. The quietest slot of each day is
+    flagged so visitors who prefer calm places can pick it.
+    """
+    destination = get_destination_by_id(destination_id)
+    if not destination:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Destination with id {destination_id} not found"
+        )
     
-    return tips_map.get(destination_name, default_tips)
-
+    from_date = from_date or date.today()
+    to_date = to_date or from_date
+    if from_date > to_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="from_date must be on or before to_date"
+        )
+    if (to_date - from_date).days >= MAX_CROWD_OUTLOOK_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range is limited to {MAX_CROWD_OUTLOOK_DAYS} days"
+        )
+    
+    return {
+        "destination_id": destination_id,
+        "name": destination["name"],
+        "days": crowd_service.outlook(destination_id, from_date, to_date)
+    }
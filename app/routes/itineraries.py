@@ -1,13 +1,28 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, HTTPException, status, Query, Request, Response, Header
+from typing import Optional, List, Dict, Any, Tuple
+from pydantic import BaseModel, Field, HttpUrl
 from datetime import date, datetime
+from concurrent.futures import ThreadPoolExecutor
 
-from app.data import get_user_by_id, get_destination_by_id, create_itinerary, get_itineraries_by_user, filter_itineraries
+from app.data import (
+    get_user_by_id, get_destination_by_id, create_itineraries, filter_itineraries,
+    get_itinerary_by_id, delete_itinerary,
+    get_user_itineraries_digest, DESTINATION_FIELDS
+)
 from app.services.ai_service import ai_service
+from app.services.ai_scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+from app.services.catalog import catalog_snapshot
+from app.services.itinerary_views import itinerary_view_cache
+from app.services.http_cache import make_etag, etag_matches, cache_headers, not_modified
+from app.services.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor, parse_fields
+from app.services.jobs import Job, job_manager
+from app.services.idempotency import IDEMPOTENCY_KEY_HEADER, idempotency_store
 
 router = APIRouter(prefix="/api/itineraries", tags=["itineraries"])
 
+# Most generation requests accepted by POST /batch
+MAX_BATCH_SIZE = 100
+
 
 class ItineraryGenerateRequest(BaseModel):
     user_id: int = Field(..., gt=0)
@@ -16,19 +31,25 @@ class ItineraryGenerateRequest(BaseModel):
     visit_date: date = Field(..., description="Date for the itinerary")
 
 
-@router.post("/generate", status_code=status.HTTP_201_CREATED)
-def generate_itinerary(request: ItineraryGenerateRequest):
+class ItineraryBatchRequest(BaseModel):
+    requests: List[ItineraryGenerateRequest] = Field(
+        ..., min_items=1, max_items=MAX_BATCH_SIZE, description="Generation requests, one per traveler"
+    )
+
+
+class ItineraryJobRequest(ItineraryGenerateRequest):
+    webhook_url: Optional[HttpUrl] = Field(None, description="URL that receives the finished job as a JSON POST")
+
+
+def load_generation_inputs(request: ItineraryGenerateRequest) -> Tuple[Any, List[Any]]:
     """
-    Generate complete itinerary with time slots, costs, and locations using AI.
-    
-    Args:
-        user_id: ID of the user
-        emotion: Optional emotion tag (happy, sad, stressed, excited)
-        destination_ids: List of destination IDs to visit
-        visit_date: Date for the itinerary
+    Look up the user and destinations of a generation request.
     
     Returns:
-        Generated itinerary with schedule, costs, and recommendations
+        (user, destinations) in the requested order
+    
+    Raises:
+        HTTPException: 404 if the user or any destination does not exist
     """
     # Validate user exists
     user = get_user_by_id(request.user_id)
@@ -54,6 +75,11 @@ def generate_itinerary(request: ItineraryGenerateRequest):
             detail=f"Destinations not found: {missing_ids}"
         )
     
+    return user, destinations
+
+
+def build_ai_inputs(user: Any, destinations: List[Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Return the user preferences and destination details sent to the AI planner."""
     # Prepare user preferences for AI
     user_preferences = {
         "personality_type": user["personality_type"],
@@ -75,65 +101,122 @@ def generate_itinerary(request: ItineraryGenerateRequest):
         }
         for dest in destinations
     ]
+    return user_preferences, selected_destinations
+
+
+def plan_entries(
+    request: ItineraryGenerateRequest,
+    destinations: List[Any],
+    ai_itinerary: Dict[str, Any]
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Match an AI schedule to the requested destinations.
+    
+    Returns:
+        (itinerary rows to save, schedule items for the response)
+    """
+    entries = []
+    saved_itineraries = []
+    
+    for schedule_item in ai_itinerary.get("schedule", []):
+        # Find matching destination by name
+        destination_name = schedule_item.get("destination")
+        matching_dest = next(
+            (d for d in destinations if d["name"] == destination_name),
+            None
+        )
+        
+        if matching_dest:
+            time_slot = schedule_item.get("time_slot", "morning")
+            entries.append({
+                "user_id": request.user_id,
+                "destination_id": matching_dest["id"],
+                "visit_date": request.visit_date.isoformat(),
+                "time_slot": time_slot,
+                "emotion_tag": request.emotion
+            })
+            
+            saved_itineraries.append({
+                "destination_id": matching_dest["id"],
+                "destination_name": matching_dest["name"],
+                "time_slot": time_slot,
+                "time_range": schedule_item.get("time_range", ""),
+                "activity": schedule_item.get("activity", ""),
+                "duration": schedule_item.get("duration", ""),
+                "cost": schedule_item.get("cost", 0),
+                "directions": schedule_item.get("directions", ""),
+                "tips": schedule_item.get("tips", "")
+            })
+    
+    return entries, saved_itineraries
+
+
+def generation_response(
+    request: ItineraryGenerateRequest,
+    ai_itinerary: Dict[str, Any],
+    saved_itineraries: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Build the POST /generate response body."""
+    return {
+        "status": "success",
+        "message": "Itinerary generated and saved successfully",
+        "user_id": request.user_id,
+        "visit_date": request.visit_date.isoformat(),
+        "emotion_tag": request.emotion,
+        "itinerary": {
+            "title": ai_itinerary.get("itinerary_title", "Your Da Lat Day Trip"),
+            "total_estimated_cost": ai_itinerary.get("total_estimated_cost", 0),
+            "total_duration": ai_itinerary.get("total_duration", "Full day"),
+            "schedule": saved_itineraries,
+            "meal_suggestions": ai_itinerary.get("meal_suggestions", [])
+        },
+        "destinations_count": len(saved_itineraries)
+    }
+
+
+def generate_and_save(
+    request: ItineraryGenerateRequest,
+    user: Any,
+    destinations: List[Any],
+    job: Optional[Job] = None,
+    priority: int = PRIORITY_INTERACTIVE
+) -> Dict[str, Any]:
+    """
+    Ask the AI service for a day plan, save its entries and build the response body.
+    
+    Args:
+        request: Validated generation request
+        user: User record from load_generation_inputs
+        destinations: Destination records from load_generation_inputs
+        job: Background job to report progress to, if any
+        priority: AI scheduler priority; background jobs pass PRIORITY_BACKGROUND
+    
+    Returns:
+        Response body of POST /generate
+    
+    Raises:
+        HTTPException: 500 if generation or saving fails
+    """
+    user_preferences, selected_destinations = build_ai_inputs(user, destinations)
     
     try:
         # Generate itinerary using AI service
+        if job:
+            job.report(0.1, "generating")
         ai_itinerary = ai_service.generate_itinerary(
             user_preferences,
-            selected_destinations
+            selected_destinations,
+            priority
         )
+        if job:
+            job.report(0.8, "saving")
         
-        # Process itinerary items
-        saved_itineraries = []
-        destination_lookup = {dest["id"]: dest for dest in destinations}
-        
-        for schedule_item in ai_itinerary.get("schedule", []):
-            # Find matching destination by name
-            destination_name = schedule_item.get("destination")
-            matching_dest = next(
-                (d for d in destinations if d["name"] == destination_name),
-                None
-            )
-            
-            if matching_dest:
-                # Create itinerary entry
-                time_slot = schedule_item.get("time_slot", "morning")
-                itinerary_entry = create_itinerary(
-                    user_id=request.user_id,
-                    destination_id=matching_dest["id"],
-                    visit_date=request.visit_date.isoformat(),
-                    time_slot=time_slot,
-                    emotion_tag=request.emotion
-                )
-                
-                saved_itineraries.append({
-                    "destination_id": matching_dest["id"],
-                    "destination_name": matching_dest["name"],
-                    "time_slot": time_slot,
-                    "time_range": schedule_item.get("time_range", ""),
-                    "activity": schedule_item.get("activity", ""),
-                    "duration": schedule_item.get("duration", ""),
-                    "cost": schedule_item.get("cost", 0),
-                    "directions": schedule_item.get("directions", ""),
-                    "tips": schedule_item.get("tips", "")
-                })
+        # Save all entries of the plan in one write
+        entries, saved_itineraries = plan_entries(request, destinations, ai_itinerary)
+        create_itineraries(entries)
         
         # Build complete response
-        return {
-            "status": "success",
-            "message": "Itinerary generated and saved successfully",
-            "user_id": request.user_id,
-            "visit_date": request.visit_date.isoformat(),
-            "emotion_tag": request.emotion,
-            "itinerary": {
-                "title": ai_itinerary.get("itinerary_title", "Your Da Lat Day Trip"),
-                "total_estimated_cost": ai_itinerary.get("total_estimated_cost", 0),
-                "total_duration": ai_itinerary.get("total_duration", "Full day"),
-                "schedule": saved_itineraries,
-                "meal_suggestions": ai_itinerary.get("meal_suggestions", [])
-            },
-            "destinations_count": len(saved_itineraries)
-        }
+        return generation_response(request, ai_itinerary, saved_itineraries)
     
     except Exception as e:
         raise HTTPException(
@@ -142,10 +225,214 @@ def generate_itinerary(request: ItineraryGenerateRequest):
         )
 
 
+@router.post("/generate", status_code=status.HTTP_201_CREATED)
+def generate_itinerary(
+    request: ItineraryGenerateRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_KEY_HEADER, max_length=255)
+):
+    """
+    Generate complete itinerary with time slots, costs, and locations using AI.
+    
+    Args:
+        user_id: ID of the user
+        emotion: Optional emotion tag (happy, sad, stressed, excited)
+        destination_ids: List of destination IDs to visit
+        visit_date: Date for the itinerary
+        Idempotency-Key: Optional header; retries with the same key wait for or
+            replay the first response instead of generating and saving again
+    
+    Returns:
+        Generated itinerary with schedule, costs, and recommendations
+    """
+    def run() -> Dict[str, Any]:
+        user, destinations = load_generation_inputs(request)
+        return generate_and_save(request, user, destinations)
+    
+    return idempotency_store.run(
+        "POST /api/itineraries/generate", idempotency_key, request.model_dump(mode="json"),
+        run, response, status.HTTP_201_CREATED
+    )
+
+
+@router.post("/batch", status_code=status.HTTP_201_CREATED)
+def generate_itinerary_batch(
+    batch: ItineraryBatchRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_KEY_HEADER, max_length=255)
+):
+    """
+    Generate itineraries for many users in one request (e.g. a tour operator's customers).
+    
+    Requests with the same traveler profile (personality, travel style, transport)
+    and destination list are planned once and the plan is reused. Distinct plans are
+    generated concurrently, never more at a time than the AI concurrency limit, and
+    every resulting entry is saved in a single data-layer write.
+    
+    Args:
+        requests: Up to MAX_BATCH_SIZE bodies of POST /generate
+    
+    Returns:
+        One result per request, in order: the POST /generate response, or an
+        error with status_code and detail. Unknown users or destinations fail only
+        their own request. Supports the Idempotency-Key header like POST /generate.
+    """
+    return idempotency_store.run(
+        "POST /api/itineraries/batch", idempotency_key, batch.model_dump(mode="json"),
+        lambda: _generate_batch(batch), response, status.HTTP_201_CREATED
+    )
+
+
+def _generate_batch(batch: ItineraryBatchRequest) -> Dict[str, Any]:
+    # Look up each distinct user and destination once
+    users = {user_id: get_user_by_id(user_id) for user_id in {r.user_id for r in batch.requests}}
+    destination_lookup = {
+        dest_id: get_destination_by_id(dest_id)
+        for dest_id in {dest_id for r in batch.requests for dest_id in r.destination_ids}
+    }
+    
+    results: List[Optional[Dict[str, Any]]] = [None] * len(batch.requests)
+    planned = []
+    problems: Dict[Tuple[Any, ...], Tuple[Dict[str, Any], List[Dict[str, Any]]]] = {}
+    for index, request in enumerate(batch.requests):
+        user = users[request.user_id]
+        missing_ids = [dest_id for dest_id in request.destination_ids if not destination_lookup[dest_id]]
+        if not user or missing_ids:
+            detail = f"User with id {request.user_id} not found" if not user else f"Destinations not found: {missing_ids}"
+            results[index] = {"status": "error", "status_code": status.HTTP_404_NOT_FOUND, "detail": detail}
+            continue
+        
+        destinations = [destination_lookup[dest_id] for dest_id in request.destination_ids]
+        user_preferences, selected_destinations = build_ai_inputs(user, destinations)
+        # The AI prompt depends only on these, so identical problems share one plan
+        key = (*user_preferences.values(), tuple(request.destination_ids))
+        problems.setdefault(key, (user_preferences, selected_destinations))
+        planned.append((index, request, destinations, key))
+    
+    # One AI call per distinct planning problem, bounded by the AI concurrency limit
+    plans: Dict[Tuple[Any, ...], Any] = {}
+    if problems:
+        workers = min(len(problems), ai_service.scheduler.max_concurrency)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as pool:
+            futures = {
+                key: pool.submit(
+                    ai_service.generate_itinerary, user_preferences, selected_destinations, PRIORITY_BACKGROUND
+                )
+                for key, (user_preferences, selected_destinations) in problems.items()
+            }
+            for key, future in futures.items():
+                try:
+                    plans[key] = future.result()
+                except Exception as e:
+                    plans[key] = e
+    
+    # Save every entry of the batch in one write
+    entries = []
+    responses = []
+    for index, request, destinations, key in planned:
+        ai_itinerary = plans[key]
+        if isinstance(ai_itinerary, Exception):
+            results[index] = {
+                "status": "error",
+                "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                "detail": f"Failed to generate itinerary: {str(ai_itinerary)}"
+            }
+            continue
+        request_entries, saved_itineraries = plan_entries(request, destinations, ai_itinerary)
+        entries.extend(request_entries)
+        responses.append((index, request, ai_itinerary, saved_itineraries))
+    create_itineraries(entries)
+    
+    for index, request, ai_itinerary, saved_itineraries in responses:
+        results[index] = generation_response(request, ai_itinerary, saved_itineraries)
+    
+    succeeded = len(responses)
+    return {
+        "status": "success" if succeeded == len(results) else "partial",
+        "total_requests": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "unique_plans": len(problems),
+        "itineraries_saved": len(entries),
+        "results": results
+    }
+
+
+@router.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+def submit_itinerary_job(
+    request: ItineraryJobRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_KEY_HEADER, max_length=255)
+):
+    """
+    Queue itinerary generation and return immediately with a job id.
+    
+    Takes the same body as POST /generate plus an optional `webhook_url`. The
+    user and destinations are validated before the job is queued, so unknown
+    IDs still fail fast with 404. Poll `status_url` for progress and the result,
+    which has the same shape as the POST /generate response.
+    
+    Returns:
+        202 with job_id, status and status_url (also sent as the Location header).
+        A retry with the same Idempotency-Key returns the original job instead of
+        queueing another one.
+    """
+    def submit() -> Dict[str, Any]:
+        user, destinations = load_generation_inputs(request)
+        webhook_url = str(request.webhook_url) if request.webhook_url else None
+        
+        job = job_manager.submit(
+            "itinerary_generation",
+            lambda job: generate_and_save(request, user, destinations, job, PRIORITY_BACKGROUND),
+            webhook_url=webhook_url
+        )
+        return {
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"{router.prefix}/jobs/{job.id}"
+        }
+    
+    body = idempotency_store.run(
+        "POST /api/itineraries/jobs", idempotency_key, request.model_dump(mode="json"),
+        submit, response, status.HTTP_202_ACCEPTED
+    )
+    response.headers["Location"] = body["status_url"]
+    return body
+
+
+@router.get("/jobs/{job_id}")
+def get_itinerary_job(job_id: str):
+    """
+    Report the status, progress and result of an itinerary generation job.
+    
+    Args:
+        job_id: ID returned by POST /jobs
+    
+    Returns:
+        Job state: status (queued, running, succeeded, failed), stage, progress
+        from 0 to 1, and the result or error once finished. Finished jobs
+        expire after JOB_TTL_SECONDS.
+    """
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found or expired"
+        )
+    return job.to_dict()
+
+
 @router.get("/{user_id}")
 def get_user_itineraries(
     user_id: int,
-    visit_date: Optional[date] = None
+    request: Request,
+    response: Response,
+    visit_date: Optional[date] = None,
+    from_date: Optional[date] = Query(None, description="Earliest visit date to include"),
+    to_date: Optional[date] = Query(None, description="Latest visit date to include"),
+    limit: Optional[int] = Query(None, ge=1, le=100, description="Number of days per page; omit for all days"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    fields: Optional[str] = Query(None, description="Comma-separated destination fields, e.g. name,estimated_cost")
 ):
     """
     Retrieve saved itineraries for a user with destination details and total cost calculation.
@@ -153,9 +440,20 @@ def get_user_itineraries(
     Args:
         user_id: ID of the user
         visit_date: Optional date filter for specific itinerary
+        from_date: Optional start of a visit-date range (inclusive)
+        to_date: Optional end of a visit-date range (inclusive)
+        limit: Return at most this many days, in visit-date order
+        cursor: Continue after the page that returned this cursor
+        fields: Only return these destination fields (id is always included)
     
     Returns:
-        User's itineraries with complete destination information and cost totals
+        User's itineraries with complete destination information and cost totals.
+        The ETag is built from content digests of the user's itineraries and the
+        catalog, so every worker gives the same one; a matching If-None-Match
+        returns 304 Not Modified without rebuilding the response.
+        The summary covers every itinerary in the requested date range, including
+        ones on later pages; next_cursor (also sent as X-Next-Cursor) is null on the
+        last page.
     """
     # Validate user exists
     user = get_user_by_id(user_id)
@@ -165,14 +463,36 @@ def get_user_itineraries(
             detail=f"User with id {user_id} not found"
         )
     
-    # Get all itineraries for user
-    user_itineraries = get_itineraries_by_user(user_id)
-    
-    # Filter by date if provided
+    # An exact visit_date is a one-day range
     if visit_date:
-        user_itineraries = [i for i in user_itineraries if i["visit_date"] == visit_date.isoformat()]
+        from_date = to_date = visit_date
+    if from_date and to_date and from_date > to_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="from_date must be on or before to_date"
+        )
+    from_key = from_date.isoformat() if from_date else None
+    to_key = to_date.isoformat() if to_date else None
+    
+    # Reject a malformed cursor or unknown fields before answering 304
+    after_date = decode_cursor(cursor, f"itineraries:{user_id}", str)
+    projection = parse_fields(fields, DESTINATION_FIELDS, always=("id",))
+    
+    etag = make_etag(
+        "itineraries", user_id, get_user_itineraries_digest(user_id), catalog_snapshot.fingerprint
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(cache_headers(etag))
+    
+    # Grouped itineraries and totals come from the user's cached view
+    view = itinerary_view_cache.get(user_id)
+    itineraries_list, next_after = view.page(
+        after_date=after_date, limit=limit, fields=projection, from_date=from_key, to_date=to_key
+    )
+    summary = view.summary_between(from_key, to_key)
     
-    if not user_itineraries:
+    if not itineraries_list and after_date is None:
         return {
             "user_id": user_id,
             "user_name": user["name"],
@@ -181,73 +501,7 @@ def get_user_itineraries(
             "message": "No itineraries found"
         }
     
-    # Group itineraries by date
-    itineraries_by_date = {}
-    
-    # Time slot order for sorting
-    time_slot_order = {
-        "morning": 1,
-        "afternoon": 2,
-        "evening": 3
-    }
-    
-    for itinerary in user_itineraries:
-        date_key = itinerary["visit_date"]
-        destination = get_destination_by_id(itinerary["destination_id"])
-        
-        if not destination:
-            continue
-        
-        if date_key not in itineraries_by_date:
-            itineraries_by_date[date_key] = {
-                "visit_date": date_key,
-                "emotion_tag": itinerary["emotion_tag"],
-                "destinations": [],
-                "total_cost": 0.0,
-                "total_time": 0,
-                "created_at": itinerary["created_at"]
-            }
-        
-        # Add destination to this date's itinerary
-        dest_cost = destination["estimated_cost"] or 0.0
-        dest_time = destination["estimated_time"] or 0
-        
-        itineraries_by_date[date_key]["destinations"].append({
-            "itinerary_id": itinerary["id"],
-            "destination": {
-                "id": destination["id"],
-                "name": destination["name"],
-                "location": destination["location"],
-                "category": destination["category"],
-                "photo_spot": destination["photo_spot"],
-                "estimated_cost": dest_cost,
-                "estimated_time": dest_time,
-                "description": destination["description"]
-            },
-            "time_slot": itinerary["time_slot"],
-            "time_slot_order": time_slot_order.get(itinerary["time_slot"], 0)
-        })
-        
-        itineraries_by_date[date_key]["total_cost"] += dest_cost
-        itineraries_by_date[date_key]["total_time"] += dest_time
-    
-    # Sort destinations within each date by time slot
-    for date_key in itineraries_by_date:
-        itineraries_by_date[date_key]["destinations"].sort(
-            key=lambda x: x["time_slot_order"]
-        )
-        # Remove time_slot_order from response
-        for dest in itineraries_by_date[date_key]["destinations"]:
-            del dest["time_slot_order"]
-    
-    # Convert to list
-    itineraries_list = list(itineraries_by_date.values())
-    
-    # Calculate overall statistics
-    total_cost = sum(itin["total_cost"] for itin in itineraries_list)
-    total_destinations = sum(len(itin["destinations"]) for itin in itineraries_list)
-    
-    return {
+    result = {
         "user_id": user_id,
         "user_name": user["name"],
         "user_preferences": {
@@ -256,10 +510,41 @@ def get_user_itineraries(
             "transport_type": user["transport_type"]
         },
         "itineraries": itineraries_list,
-        "summary": {
-            "total_itineraries": len(itineraries_list),
-            "total_destinations": total_destinations,
-            "total_cost": round(total_cost, 2),
-            "average_cost_per_day": round(total_cost / len(itineraries_list), 2) if itineraries_list else 0
-        }
+        "summary": summary
+    }
+    
+    if limit is not None or cursor is not None:
+        next_cursor = encode_cursor(f"itineraries:{user_id}", next_after) if next_after else None
+        result["next_cursor"] = next_cursor
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    
+    return result
+
+
+@router.delete("/{itinerary_id}")
+def remove_itinerary(itinerary_id: int):
+    """
+    Delete a single saved itinerary entry (one destination on one day).
+    
+    Args:
+        itinerary_id: ID of the itinerary entry, as returned in `itinerary_id`
+    
+    Returns:
+        Confirmation with the deleted entry's user, destination and date. The
+        user's cached itinerary view and ETag are updated immediately.
+    """
+    itinerary = get_itinerary_by_id(itinerary_id)
+    if not itinerary or not delete_itinerary(itinerary_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Itinerary with id {itinerary_id} not found"
+        )
+    
+    return {
+        "message": "Itinerary deleted successfully",
+        "itinerary_id": itinerary_id,
+        "user_id": itinerary["user_id"],
+        "destination_id": itinerary["destination_id"],
+        "visit_date": itinerary["visit_date"]
     }
@@ -1,16 +1,49 @@
-from fastapi import APIRouter, HTTPException, status
-from app.data import get_user_by_id, create_user
+from fastapi import APIRouter, HTTPException, status, Header, Response, Request, Query
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from typing import Optional, List, Dict, Any
+from app.data import get_user_by_id, get_users_by_ids, create_user, create_users
 from app.schemas.user import UserCreate, UserResponse
+from app.services.idempotency import IDEMPOTENCY_KEY_HEADER, idempotency_store
+from app.services.pagination import InvalidQueryError
 
 router = APIRouter(prefix="/api", tags=["users"])
 
+# Rows accepted by one POST /survey/bulk request; reading stops at the first row past the limit
+MAX_IMPORT_ROWS = 10000
+
+# Longest NDJSON line accepted by POST /survey/bulk; longer lines are rejected without being buffered
+MAX_IMPORT_LINE_BYTES = 64 * 1024
+
+# Valid rows are saved in chunks of this size while the body is still streaming in
+IMPORT_CHUNK_ROWS = 500
+
+# Most IDs accepted by GET /users?ids=
+MAX_LOOKUP_IDS = 100
+
 
 @router.post("/survey", response_model=dict, status_code=status.HTTP_201_CREATED)
-def save_user_survey(user_data: UserCreate):
+def save_user_survey(
+    user_data: UserCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_KEY_HEADER, max_length=255)
+):
     """
     Save user survey data including personality type, travel style, transport type, and itinerary status.
     Returns user_id and confirmation message.
+    A retry with the same Idempotency-Key returns the original user_id instead of creating another user.
     """
+    return idempotency_store.run(
+        "POST /api/survey",
+        idempotency_key,
+        user_data.model_dump(mode="json"),
+        lambda: _save_survey(user_data),
+        response,
+        status.HTTP_201_CREATED
+    )
+
+
+def _save_survey(user_data: UserCreate) -> dict:
     try:
         # Create new user from survey data
         new_user = create_user(
@@ -33,6 +66,134 @@ def save_user_survey(user_data: UserCreate):
         )
 
 
+def _row_errors(error: ValidationError) -> List[Dict[str, str]]:
+    return [
+        {"field": ".".join(str(part) for part in item["loc"]) or "row", "message": item["msg"]}
+        for item in error.errors()
+    ]
+
+
+@router.post("/survey/bulk", status_code=status.HTTP_200_OK)
+async def import_surveys(request: Request):
+    """
+    Import many survey results from an NDJSON body (one POST /survey JSON object per line).
+    
+    The body is read as a stream and valid rows are saved in chunks through one
+    bulk data-layer write each, so large partner files never sit in memory whole.
+    Invalid rows are skipped and reported individually; blank lines are ignored.
+    Lines longer than MAX_IMPORT_LINE_BYTES are rejected. At most MAX_IMPORT_ROWS
+    rows are imported per request: the first row past the limit is reported once
+    and the rest of the body is not read.
+    
+    Returns:
+        Counts plus, per line number, the created user_id or the validation errors
+    """
+    created: List[Dict[str, int]] = []
+    errors: List[Dict[str, Any]] = []
+    pending: List[Dict[str, Any]] = []
+    pending_lines: List[int] = []
+    line_number = 0
+    rows = 0
+    limit_reached = False
+    
+    async def flush() -> None:
+        users = await run_in_threadpool(create_users, pending)
+        created.extend({"line": line, "user_id": user.id} for line, user in zip(pending_lines, users))
+        pending.clear()
+        pending_lines.clear()
+    
+    def handle(line: Optional[bytes]) -> None:
+        """Process one line; None stands for a line that was longer than MAX_IMPORT_LINE_BYTES."""
+        nonlocal line_number, rows, limit_reached
+        line_number += 1
+        if line is not None and not line.strip():
+            return
+        rows += 1
+        if rows > MAX_IMPORT_ROWS:
+            limit_reached = True
+            errors.append({"line": line_number, "errors": [{
+                "field": "row",
+                "message": f"Row limit of {MAX_IMPORT_ROWS} exceeded at line {line_number}; the rest of the body was not read"
+            }]})
+            return
+        if line is None:
+            errors.append({"line": line_number, "errors": [{"field": "row", "message": f"Line is longer than {MAX_IMPORT_LINE_BYTES} bytes"}]})
+            return
+        try:
+            survey = UserCreate.model_validate_json(line)
+        except ValidationError as e:
+            errors.append({"line": line_number, "errors": _row_errors(e)})
+            return
+        pending.append(survey.model_dump(mode="json"))
+        pending_lines.append(line_number)
+    
+    # Only each new chunk is scanned for newlines; the partial last line is kept in
+    # `buffer`, and dropped (oversized = True) once it grows past MAX_IMPORT_LINE_BYTES
+    buffer = bytearray()
+    oversized = False
+    async for chunk in request.stream():
+        start = 0
+        while not limit_reached:
+            end = chunk.find(b"\n", start)
+            if not oversized:
+                buffer += chunk[start:] if end == -1 else chunk[start:end]
+                if len(buffer) > MAX_IMPORT_LINE_BYTES:
+                    oversized = True
+                    buffer.clear()
+            if end == -1:
+                break
+            handle(None if oversized else bytes(buffer))
+            buffer.clear()
+            oversized = False
+            start = end + 1
+        if limit_reached:
+            break
+        if len(pending) >= IMPORT_CHUNK_ROWS:
+            await flush()
+    if not limit_reached and (buffer or oversized):
+        handle(None if oversized else bytes(buffer))
+    if pending:
+        await flush()
+    
+    return {
+        "status": "success" if not errors else "partial",
+        "imported": len(created),
+        "failed": len(errors),
+        "created": created,
+        "errors": errors
+    }
+
+
+@router.get("/users")
+def get_users(ids: str = Query(..., description="Comma-separated user IDs, e.g. 1,2,3")):
+    """
+    Retrieve many user profiles in one request (e.g. a list of travel buddies).
+    
+    Args:
+        ids: Up to MAX_LOOKUP_IDS comma-separated user IDs
+    
+    Returns:
+        Found users in the requested order (duplicates removed) and the IDs that do not exist
+    """
+    try:
+        user_ids = list(dict.fromkeys(int(part) for part in ids.split(",") if part.strip()))
+    except ValueError:
+        raise InvalidQueryError("ids must be comma-separated integers")
+    if not user_ids:
+        raise InvalidQueryError("ids must list at least one user ID")
+    if len(user_ids) > MAX_LOOKUP_IDS:
+        raise InvalidQueryError(f"At most {MAX_LOOKUP_IDS} ids can be requested at once")
+    
+    users = get_users_by_ids(user_ids)
+    return {
+        "users": [
+            UserResponse.model_validate(user.to_dict()).model_dump(mode="json")
+            for user in users if user
+        ],
+        "missing_ids": [user_id for user_id, user in zip(user_ids, users) if not user]
+    }
+
+
 @router.get("/users/{user_id}", response_model=UserResponse)
 def get_user_profile(user_id: int):
     """
@@ -47,4 +208,4 @@ def get_user_profile(user_id: int):
             detail=f"User with id {user_id} not found"
         )
     
-    return user
+    return user.to_dict()
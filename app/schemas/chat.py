@@ -6,6 +6,10 @@ from datetime import date
 class ChatRequest(BaseModel):
     message: str = Field(..., min_length=1, description="User's chat message")
     user_id: int = Field(..., gt=0, description="ID of the user sending the message")
+    new_session: bool = Field(
+        default=False,
+        description="Forget earlier turns and start a fresh conversation"
+    )
 
 
 class ItineraryItem(BaseModel):
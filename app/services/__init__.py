@@ -1,4 +1,47 @@
-from .ai_service import AIService, ai_service
+from .ai_service import AIService, AIUnavailableError, ai_service
 from .matching import MatchingService, get_matching_service
+from .chat_session import ChatSessionStore, ChatHistory, get_chat_session_store
+from .ai_scheduler import AIScheduler, AIOverloadedError, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .catalog import CatalogSnapshot, get_catalog_snapshot
+from .itinerary_views import ItineraryViewCache, get_itinerary_view_cache
+from .crowd import CrowdService, get_crowd_service
+from .recommender import DestinationRecommender, get_destination_recommender
+from .emotion_rankings import EmotionRankingTable, get_emotion_rankings
+from .jobs import Job, JobManager, JobQueueFullError, WebhookURLError, get_job_manager
+from .idempotency import IdempotencyStore, IdempotencyError, get_idempotency_store
 
-__all__ = ["AIService", "ai_service", "MatchingService", "get_matching_service"]
+__all__ = [
+    "AIService",
+    "AIUnavailableError",
+    "ai_service",
+    "MatchingService",
+    "get_matching_service",
+    "ChatSessionStore",
+    "ChatHistory",
+    "get_chat_session_store",
+    "AIScheduler",
+    "AIOverloadedError",
+    "PRIORITY_INTERACTIVE",
+    "PRIORITY_BACKGROUND",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "CatalogSnapshot",
+    "get_catalog_snapshot",
+    "ItineraryViewCache",
+    "get_itinerary_view_cache",
+    "CrowdService",
+    "get_crowd_service",
+    "DestinationRecommender",
+    "get_destination_recommender",
+    "EmotionRankingTable",
+    "get_emotion_rankings",
+    "Job",
+    "JobManager",
+    "JobQueueFullError",
+    "WebhookURLError",
+    "get_job_manager",
+    "IdempotencyStore",
+    "IdempotencyError",
+    "get_idempotency_store",
+]
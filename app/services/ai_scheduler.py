@@ -0,0 +1,244 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+
+# Lower value runs first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_BACKGROUND: "background",
+}
+
+
+class AIOverloadedError(Exception):
+    """Raised when the scheduler rejects a Gemini call instead of queueing it."""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Token-bucket rate limiter that hands out reservations instead of blocking."""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        """
+        Take one token, returning how long the caller must wait before using it.
+
+        Returns None (and takes nothing) if the wait would exceed `max_wait`.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "granted", "cancelled")
+
+    def __init__(self, priority: int, seq: int):
+        self.priority = priority
+        self.seq = seq
+        self.granted = False
+        self.cancelled = False
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class SlotLease:
+    """Handle yielded by AIScheduler.slot; lets a call outlive the `with` block that admitted it."""
+
+    __slots__ = ("_release", "detached")
+
+    def __init__(self, release: Callable[[bool], None]):
+        self._release = release
+        self.detached = False
+
+    def release_when_done(self, future: Future) -> None:
+        """
+        Keep the slot until `future` finishes instead of releasing it on exit.
+
+        Used when a call is abandoned (timed out or beaten by a hedge) but is still
+        running in a worker thread, so it keeps counting against max_concurrency.
+        """
+        self.detached = True
+        future.add_done_callback(lambda f: self._release(not f.cancelled() and f.exception() is None))
+
+
+class AIScheduler:
+    """
+    Admission control for outbound Gemini calls.
+
+    At most `max_concurrency` calls run at once and calls start no faster than
+    `requests_per_minute` (with bursts up to `burst`). Waiting callers are served
+    by priority, then arrival order, so interactive chat overtakes itinerary
+    generation. Work is rejected with AIOverloadedError as soon as the queue is
+    full or the expected wait exceeds the caller's timeout, rather than piling
+    up until Gemini returns quota errors.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        requests_per_minute: float = 60,
+        burst: int = 10,
+        max_queue_depth: int = 32,
+        max_queue_wait: float = 10.0
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.max_queue_wait = max_queue_wait
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst)
+        self._cond = threading.Condition()
+        self._heap: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._active = 0
+        self._queued = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._completed = 0
+        self._wait_times: Deque[float] = deque(maxlen=1024)
+        self._queued_by_priority: Dict[int, int] = {}
+
+    @contextmanager
+    def slot(self, priority: int = PRIORITY_INTERACTIVE, timeout: Optional[float] = None) -> Iterator[SlotLease]:
+        """
+        Hold a concurrency slot and a rate-limit token for the duration of a call.
+
+        The slot is released when the block exits, unless it was handed to a still
+        running call with SlotLease.release_when_done.
+
+        Args:
+            priority: PRIORITY_INTERACTIVE or PRIORITY_BACKGROUND (lower runs first)
+            timeout: Maximum seconds to wait for admission (defaults to max_queue_wait)
+
+        Raises:
+            AIOverloadedError: If the call cannot be admitted in time
+        """
+        timeout = self.max_queue_wait if timeout is None else min(timeout, self.max_queue_wait)
+        started = time.monotonic()
+        self._acquire(priority, started + timeout)
+        admitted = False
+        lease = SlotLease(self._release)
+        try:
+            wait = self.bucket.reserve(max(0.0, started + timeout - time.monotonic()))
+            if wait is None:
+                with self._cond:
+                    self._rejected += 1
+                raise AIOverloadedError("AI request rate limit reached", retry_after=1.0 / self.bucket.rate)
+            if wait:
+                time.sleep(wait)
+            with self._cond:
+                self._admitted += 1
+                self._wait_times.append(time.monotonic() - started)
+            admitted = True
+            yield lease
+        finally:
+            if not lease.detached:
+                self._release(admitted)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return queue depth, wait times and counters for monitoring."""
+        with self._cond:
+            waits = sorted(self._wait_times)
+            return {
+                "active": self._active,
+                "queue_depth": self._queued,
+                "queue_depth_by_priority": {
+                    PRIORITY_NAMES.get(p, str(p)): n for p, n in self._queued_by_priority.items() if n
+                },
+                "max_concurrency": self.max_concurrency,
+                "max_queue_depth": self.max_queue_depth,
+                "requests_per_minute": round(self.bucket.rate * 60, 2),
+                "admitted_total": self._admitted,
+                "rejected_total": self._rejected,
+                "completed_total": self._completed,
+                "wait_seconds": {
+                    "avg": round(sum(waits) / len(waits), 4) if waits else 0.0,
+                    "p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 4) if waits else 0.0,
+                    "max": round(waits[-1], 4) if waits else 0.0
+                }
+            }
+
+    def _acquire(self, priority: int, deadline: float) -> None:
+        with self._cond:
+            if self._active < self.max_concurrency and not self._queued:
+                self._active += 1
+                return
+
+            if self._queued >= self.max_queue_depth and not self._shed_lower_priority(priority):
+                self._rejected += 1
+                raise AIOverloadedError("AI request queue is full", retry_after=self.max_queue_wait)
+
+            waiter = _Waiter(priority, next(self._seq))
+            heapq.heappush(self._heap, waiter)
+            self._queued += 1
+            self._queued_by_priority[priority] = self._queued_by_priority.get(priority, 0) + 1
+
+            while not waiter.granted:
+                if waiter.cancelled:
+                    raise AIOverloadedError("Displaced by higher-priority AI requests", retry_after=self.max_queue_wait)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._cancel(waiter)
+                    raise AIOverloadedError("Timed out waiting for an AI request slot")
+                self._cond.wait(remaining)
+
+    def _cancel(self, waiter: _Waiter) -> None:
+        """Withdraw a queued waiter; it is lazily removed from the heap by _dispatch."""
+        waiter.cancelled = True
+        self._queued -= 1
+        self._queued_by_priority[waiter.priority] -= 1
+        self._rejected += 1
+
+    def _shed_lower_priority(self, priority: int) -> bool:
+        """Drop the newest lowest-priority waiter to make room for more urgent work."""
+        candidates = [w for w in self._heap if not w.cancelled and w.priority > priority]
+        if not candidates:
+            return False
+        self._cancel(max(candidates))
+        self._cond.notify_all()
+        return True
+
+    def _release(self, completed: bool) -> None:
+        with self._cond:
+            self._active -= 1
+            if completed:
+                self._completed += 1
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Hand free slots to the highest-priority waiters."""
+        granted = False
+        while self._heap and self._active < self.max_concurrency:
+            waiter = heapq.heappop(self._heap)
+            if waiter.cancelled:
+                continue
+            waiter.granted = True
+            self._active += 1
+            self._queued -= 1
+            self._queued_by_priority[waiter.priority] -= 1
+            granted = True
+        if granted:
+            self._cond.notify_all()
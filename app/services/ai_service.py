@@ -1,34 +1,39 @@
 import os
-from google import genai
-from google.genai import types
-from typing import Dict, List, Any, Optional
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Set, Tuple
 from dotenv import load_dotenv
 
+from app.services.chat_session import ChatHistory
+from app.services.ai_scheduler import (
+    AIScheduler, AIOverloadedError, SlotLease, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+)
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.retry import (
+    Deadline, DeadlineExceededError, RetryBudget, LatencyTracker, backoff_delay, is_retryable
+)
+
+if TYPE_CHECKING:
+    from google.genai import types
+
 load_dotenv()
 
 
-class AIService:
-    def __init__(self):
-        """Initialize AIService with Google Gemini client."""
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment variables")
-        self.client = genai.Client(api_key=api_key)
-        self.model = 'gemini-2.0-flash'
-    
-    def chat_with_gemini(self, message: str, user_context: Optional[Dict[str, Any]] = None) -> str:
-        """
-        Chat with Google Gemini assistant for travel-related queries.
-        
-        Args:
-            message: User's message/question
-            user_context: Optional context about user (personality_type, travel_style, etc.)
-        
-        Returns:
-            AI assistant's response as string
-        """
-        # Build system prompt for travel assistant role
-        system_prompt = """You are DasiLari, a friendly and knowledgeable travel assistant specializing in Da Lat, Vietnam.
+class AIUnavailableError(Exception):
+    """Raised when AI features are called but no Gemini API key is configured."""
+
+
+def _genai_types():
+    """Import the Gemini SDK types on first use; the SDK is slow to import."""
+    from google.genai import types
+    return types
+
+
+# Static system prompts, built once and sent as Gemini system instructions
+CHAT_SYSTEM_PROMPT = """You are DasiLari, a friendly and knowledgeable travel assistant specializing in Da Lat, Vietnam.
 Your role is to help travelers discover the beauty of Da Lat and create memorable experiences.
 
 IMPORTANT: You must ALWAYS respond in English only, regardless of what language the user uses to ask questions.
@@ -48,50 +53,481 @@ Communication style:
 - Be encouraging and supportive
 - Always reply in English, even if the user asks in Vietnamese or another language"""
 
-        # Add user context to system prompt if available
+EMOTION_SYSTEM_PROMPT = "You are an expert travel psychologist who matches destinations to emotional states."
+
+ITINERARY_SYSTEM_PROMPT = "You are an expert Da Lat travel planner who creates optimized, personalized itineraries."
+
+
+@lru_cache(maxsize=256)
+def _render_profile_context(
+    personality_type: Optional[str],
+    travel_style: Optional[str],
+    transport_type: Optional[str],
+    has_itinerary: Optional[bool]
+) -> str:
+    """Render the user profile block; there are only a handful of distinct profiles."""
+    context_info = "User Profile:"
+    if personality_type is not None:
+        context_info += f"\n- Personality: {personality_type}"
+    if travel_style is not None:
+        context_info += f"\n- Travel Style: {travel_style}"
+    if transport_type is not None:
+        context_info += f"\n- Transport: {transport_type}"
+    if has_itinerary is not None:
+        itinerary_status = "Yes" if has_itinerary else "No"
+        context_info += f"\n- Has existing itinerary: {itinerary_status}"
+    return context_info
+
+
+class AIService:
+    def __init__(self):
+        """
+        Initialize AIService configuration.
+        
+        The Gemini client (and the google-genai import) is created lazily on the
+        first AI call, so workers start fast and the app still serves non-AI
+        endpoints when GEMINI_API_KEY is not set.
+        """
+        self.api_key = os.getenv("GEMINI_API_KEY")
+        self._client = None
+        self._client_lock = threading.Lock()
+        self.model = 'gemini-2.0-flash'
+        # Explicit context caching is opt-in: Gemini only caches prompts above a
+        # minimum token count, so short system prompts fall back to system_instruction
+        self.use_context_cache = os.getenv("GEMINI_CONTEXT_CACHE", "").lower() in ("1", "true", "yes")
+        self.context_cache_ttl = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL_SECONDS", "3600"))
+        # System prompt -> (cache name, refresh at, valid until), all monotonic times
+        self._context_caches: Dict[str, Tuple[Optional[str], float, float]] = {}
+        self._context_cache_pending: Set[str] = set()
+        self._context_cache_failures: Dict[str, int] = {}
+        self._context_cache_error: Optional[str] = None
+        self._context_cache_lock = threading.Lock()
+        # Admission control for outbound calls, tuned to the Gemini quota. The limits
+        # cover the whole deployment, so each of the WEB_CONCURRENCY worker processes
+        # takes an equal share (at least one call in flight per worker)
+        workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+        self.scheduler = AIScheduler(
+            max_concurrency=max(1, int(os.getenv("AI_MAX_CONCURRENCY", "4")) // workers),
+            requests_per_minute=float(os.getenv("AI_REQUESTS_PER_MINUTE", "60")) / workers,
+            burst=max(1, int(os.getenv("AI_RATE_BURST", "10")) // workers),
+            max_queue_depth=int(os.getenv("AI_MAX_QUEUE_DEPTH", "32")),
+            max_queue_wait=float(os.getenv("AI_MAX_QUEUE_WAIT_SECONDS", "10"))
+        )
+        # Fail fast to local fallbacks while Gemini is erroring or slow
+        self.breaker = CircuitBreaker(
+            "gemini",
+            failure_threshold=int(os.getenv("AI_CIRCUIT_FAILURE_THRESHOLD", "5")),
+            slow_call_seconds=float(os.getenv("AI_CIRCUIT_SLOW_CALL_SECONDS", "10")),
+            reset_timeout=float(os.getenv("AI_CIRCUIT_RESET_SECONDS", "30"))
+        )
+        # Per-call deadlines, bounded retries and optional hedging for tail latency
+        self.request_budget = float(os.getenv("AI_REQUEST_BUDGET_SECONDS", "20"))
+        self.attempt_timeout = float(os.getenv("AI_ATTEMPT_TIMEOUT_SECONDS", "8"))
+        self.max_retries = int(os.getenv("AI_MAX_RETRIES", "2"))
+        self.retry_budget = RetryBudget(ratio=float(os.getenv("AI_RETRY_BUDGET_RATIO", "0.2")))
+        self.hedging_enabled = os.getenv("AI_HEDGING", "").lower() in ("1", "true", "yes")
+        self.latency = LatencyTracker()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.scheduler.max_concurrency * 2,
+            thread_name_prefix="gemini"
+        )
+    
+    @property
+    def available(self) -> bool:
+        """True if a Gemini API key is configured."""
+        return bool(self.api_key)
+    
+    @property
+    def client(self):
+        """
+        Gemini client, created on first access.
+        
+        Raises:
+            AIUnavailableError: If GEMINI_API_KEY is not configured
+        """
+        if self._client is None:
+            if not self.available:
+                raise AIUnavailableError("GEMINI_API_KEY not found in environment variables")
+            with self._client_lock:
+                if self._client is None:
+                    from google import genai
+                    self._client = genai.Client(api_key=self.api_key)
+        return self._client
+    
+    @client.setter
+    def client(self, client) -> None:
+        self._client = client
+    
+    def _ensure_client(self) -> None:
+        """
+        Create the client before building a request, so that a missing API key fails
+        fast (without importing the SDK or touching the circuit breaker).
+        
+        Raises:
+            AIUnavailableError: If GEMINI_API_KEY is not configured
+        """
+        self.client
+    
+    def _cached_content_name(self, system_prompt: str) -> Optional[str]:
+        """
+        Return the name of a Gemini context cache holding the system prompt, if one is ready.
+        
+        Never blocks on the network: a missing or soon-to-expire cache is (re)created by
+        a single background task per prompt, and callers use system_instruction until it
+        is ready. If the model rejects caching (e.g. the prompt is below its minimum size)
+        the prompt is remembered as uncacheable; transient failures are retried with backoff.
+        """
+        if not self.use_context_cache:
+            return None
+        
+        now = time.monotonic()
+        with self._context_cache_lock:
+            name, refresh_at, valid_until = self._context_caches.get(system_prompt, (None, 0.0, 0.0))
+            if now >= refresh_at and system_prompt not in self._context_cache_pending:
+                self._context_cache_pending.add(system_prompt)
+                self._executor.submit(self._create_context_cache, system_prompt)
+        return name if now < valid_until else None
+    
+    def _create_context_cache(self, system_prompt: str) -> None:
+        """Create a context cache through the circuit breaker and scheduler, recording the outcome."""
+        types = _genai_types()
+        reached_upstream = False
+        try:
+            self.breaker.before_call()
+            try:
+                with self.scheduler.slot(PRIORITY_BACKGROUND, timeout=self.attempt_timeout):
+                    reached_upstream = True
+                    started = time.monotonic()
+                    cache = self.client.caches.create(
+                        model=self.model,
+                        config=types.CreateCachedContentConfig(
+                            system_instruction=system_prompt,
+                            ttl=f"{self.context_cache_ttl}s",
+                            http_options=types.HttpOptions(timeout=int(self.attempt_timeout * 1000))
+                        )
+                    )
+            except Exception as e:
+                if reached_upstream:
+                    self.breaker.record_failure(type(e).__name__)
+                else:
+                    self.breaker.record_ignored()
+                raise
+            self.breaker.record_success(time.monotonic() - started)
+        except Exception as e:
+            now = time.monotonic()
+            with self._context_cache_lock:
+                self._context_cache_pending.discard(system_prompt)
+                self._context_cache_error = f"{type(e).__name__}: {e}"
+                name, _, valid_until = self._context_caches.get(system_prompt, (None, 0.0, 0.0))
+                if reached_upstream and not is_retryable(e):
+                    # Gemini rejected the request itself: use system_instruction from now on
+                    self._context_caches[system_prompt] = (None, float("inf"), 0.0)
+                    return
+                failures = self._context_cache_failures.get(system_prompt, 0) + 1
+                self._context_cache_failures[system_prompt] = failures
+                backoff = min(float(self.context_cache_ttl), 30.0 * 2 ** (failures - 1))
+                self._context_caches[system_prompt] = (name, now + backoff, valid_until)
+            return
+        
+        now = time.monotonic()
+        with self._context_cache_lock:
+            self._context_cache_pending.discard(system_prompt)
+            self._context_cache_failures.pop(system_prompt, None)
+            self._context_cache_error = None
+            # Refresh a minute early so requests never reference an expired cache
+            self._context_caches[system_prompt] = (
+                cache.name, now + max(self.context_cache_ttl - 60, 1), now + self.context_cache_ttl
+            )
+    
+    def _build_config(self, system_prompt: str, **kwargs: Any) -> "types.GenerateContentConfig":
+        """Build a generation config that carries the static system prompt."""
+        self._ensure_client()
+        types = _genai_types()
+        cached_content = self._cached_content_name(system_prompt)
+        if cached_content:
+            return types.GenerateContentConfig(cached_content=cached_content, **kwargs)
+        return types.GenerateContentConfig(system_instruction=system_prompt, **kwargs)
+    
+    @property
+    def degraded(self) -> bool:
+        """True while AI calls are answered by local fallbacks (no API key or circuit open)."""
+        return not self.available or self.breaker.state == CircuitBreaker.OPEN
+    
+    def status(self) -> Dict[str, Any]:
+        """Summarize AI availability for the health check."""
+        return {
+            "mode": "degraded" if self.degraded else "normal",
+            "configured": self.available,
+            "client_initialized": self._client is not None,
+            "model": self.model,
+            "circuit_breaker": self.breaker.snapshot(),
+            "context_cache": self._context_cache_status()
+        }
+    
+    def _context_cache_status(self) -> Dict[str, Any]:
+        with self._context_cache_lock:
+            now = time.monotonic()
+            return {
+                "enabled": self.use_context_cache,
+                "ready": sum(1 for _, _, valid_until in self._context_caches.values() if now < valid_until),
+                "creating": len(self._context_cache_pending),
+                "last_error": self._context_cache_error
+            }
+    
+    def latency_metrics(self) -> Dict[str, Any]:
+        """Report upstream latency percentiles and retry budget usage."""
+        return {
+            "p50_seconds": self.latency.percentile(0.5),
+            "p95_seconds": self.latency.percentile(0.95),
+            "hedging_enabled": self.hedging_enabled,
+            "retry_budget": self.retry_budget.snapshot()
+        }
+    
+    def new_deadline(self) -> Deadline:
+        """Start the time budget for one API request; share it across its AI calls."""
+        return Deadline(self.request_budget)
+    
+    def _generate(
+        self,
+        contents: Any,
+        config: "types.GenerateContentConfig",
+        priority: int,
+        deadline: Optional[Deadline] = None
+    ) -> Any:
+        """
+        Run a generate_content call with deadline, retries and optional hedging.
+        
+        Transient failures are retried with exponential backoff and full jitter while
+        both the request deadline and the process-wide retry budget allow it.
+        
+        Raises:
+            CircuitOpenError: Immediately, while the circuit is open
+            AIOverloadedError: If the scheduler rejects the call
+            DeadlineExceededError: If the request budget runs out
+        """
+        deadline = deadline or self.new_deadline()
+        self.retry_budget.record_request()
+        attempt = 0
+        while True:
+            try:
+                return self._attempt(contents, config, priority, deadline)
+            except (CircuitOpenError, AIOverloadedError):
+                raise
+            except Exception as e:
+                attempt += 1
+                if attempt > self.max_retries or not is_retryable(e):
+                    raise
+                delay = backoff_delay(attempt)
+                if delay >= deadline.remaining() or not self.retry_budget.try_spend():
+                    raise
+                time.sleep(delay)
+    
+    def _attempt(
+        self,
+        contents: Any,
+        config: "types.GenerateContentConfig",
+        priority: int,
+        deadline: Deadline
+    ) -> Any:
+        """Make one attempt through the circuit breaker and scheduler."""
+        deadline.timeout_for_attempt(self.attempt_timeout)
+        self.breaker.before_call()
+        reached_upstream = False
+        try:
+            with self.scheduler.slot(priority, timeout=deadline.remaining()) as lease:
+                timeout = deadline.timeout_for_attempt(self.attempt_timeout)
+                started = time.monotonic()
+                reached_upstream = True
+                response = self._call_with_hedge(contents, config, priority, timeout, lease)
+        except Exception as e:
+            if reached_upstream:
+                self.breaker.record_failure(type(e).__name__)
+            else:
+                # Rejected locally; says nothing about Gemini's health
+                self.breaker.record_ignored()
+            raise
+        
+        elapsed = time.monotonic() - started
+        self.breaker.record_success(elapsed)
+        self.latency.record(elapsed)
+        return response
+    
+    def _call_with_hedge(
+        self,
+        contents: Any,
+        config: "types.GenerateContentConfig",
+        priority: int,
+        timeout: float,
+        lease: SlotLease
+    ) -> Any:
+        """
+        Call Gemini with a hard timeout, hedging once the call outlives the p95 latency.
+        
+        The hedged call needs a free scheduler slot and a retry-budget token; whichever
+        call succeeds first wins. Python threads cannot be interrupted, so a primary call
+        that is abandoned still running keeps `lease` (its scheduler slot) until it ends.
+        """
+        types = _genai_types()
+        config = config.model_copy(update={"http_options": types.HttpOptions(timeout=int(timeout * 1000))})
+        call_deadline = time.monotonic() + timeout
+        primary = self._executor.submit(self._call_gemini, contents, config)
+        pending = {primary}
+        
+        hedge_delay = self.latency.percentile(0.95) if self.hedging_enabled else None
+        if hedge_delay is not None and hedge_delay < timeout:
+            done, _ = wait(pending, timeout=hedge_delay)
+            if not done and self.retry_budget.try_spend():
+                pending.add(self._executor.submit(self._hedged_call, contents, config, priority))
+        
+        try:
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = wait(pending, timeout=max(0.0, call_deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    if future.exception() is None:
+                        return future.result()
+                    error = error or future.exception()
+            if error is not None and not pending:
+                raise error
+            raise DeadlineExceededError(f"Gemini call timed out after {timeout:.1f}s")
+        finally:
+            if not primary.done():
+                lease.release_when_done(primary)
+    
+    def _hedged_call(self, contents: Any, config: "types.GenerateContentConfig", priority: int) -> Any:
+        with self.scheduler.slot(priority, timeout=0):
+            return self._call_gemini(contents, config)
+    
+    def _call_gemini(self, contents: Any, config: "types.GenerateContentConfig") -> Any:
+        return self.client.models.generate_content(
+            model=self.model,
+            contents=contents,
+            config=config
+        )
+    
+    def chat_with_gemini(
+        self,
+        message: str,
+        user_context: Optional[Dict[str, Any]] = None,
+        history: Optional[ChatHistory] = None,
+        deadline: Optional[Deadline] = None
+    ) -> str:
+        """
+        Chat with Google Gemini assistant for travel-related queries.
+        
+        Args:
+            message: User's message/question
+            user_context: Optional context about user (personality_type, travel_style, etc.)
+            history: Optional rolling summary and recent turns of this user's conversation
+            deadline: Optional request-level time budget shared with other AI calls
+        
+        Returns:
+            AI assistant's response as string
+        """
+        self._ensure_client()
+        types = _genai_types()
+        contents = []
+        
+        # Replay recent turns so follow-up questions need no repetition
+        if history:
+            for user_turn, assistant_turn in history.turns:
+                contents.append(types.Content(role="user", parts=[types.Part(text=user_turn)]))
+                contents.append(types.Content(role="model", parts=[types.Part(text=assistant_turn)]))
+        
+        # Per-request context goes with the message; the system prompt stays static
+        parts = []
         if user_context:
-            context_info = "\n\nUser Profile:"
-            if "personality_type" in user_context:
-                context_info += f"\n- Personality: {user_context['personality_type']}"
-            if "travel_style" in user_context:
-                context_info += f"\n- Travel Style: {user_context['travel_style']}"
-            if "transport_type" in user_context:
-                context_info += f"\n- Transport: {user_context['transport_type']}"
-            if "has_itinerary" in user_context:
-                itinerary_status = "Yes" if user_context['has_itinerary'] else "No"
-                context_info += f"\n- Has existing itinerary: {itinerary_status}"
-            
-            system_prompt += context_info
+            parts.append(types.Part(text=_render_profile_context(
+                user_context.get("personality_type"),
+                user_context.get("travel_style"),
+                user_context.get("transport_type"),
+                user_context.get("has_itinerary")
+            )))
+        if history and history.summary:
+            parts.append(types.Part(text=f"Earlier in this conversation:\n{history.summary}"))
+        parts.append(types.Part(text=message))
+        contents.append(types.Content(role="user", parts=parts))
         
         try:
-            # Combine system prompt and user message for Gemini
-            full_prompt = f"{system_prompt}\n\nUser: {message}\n\nAssistant:"
-            
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=full_prompt,
-                config=types.GenerateContentConfig(
+            response = self._generate(
+                contents,
+                self._build_config(
+                    CHAT_SYSTEM_PROMPT,
                     temperature=0.7,
                     max_output_tokens=500,
-                )
+                ),
+                PRIORITY_INTERACTIVE,
+                deadline
             )
             
             return response.text.strip()
         
+        except (AIOverloadedError, CircuitOpenError, DeadlineExceededError, AIUnavailableError):
+            raise
         except Exception as e:
             raise Exception(f"Gemini API error: {str(e)}")
     
-    def suggest_destinations_by_emotion(self, emotion: str, destinations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def suggest_destinations_by_emotion(
+        self,
+        emotion: str,
+        destinations: List[Dict[str, Any]],
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
         """
         Analyze user emotion and suggest 3-5 suitable Da Lat destinations with reasoning.
         
         Args:
             emotion: User's current emotion (happy, sad, stressed, excited, etc.)
             destinations: List of available destinations from database
+            deadline: Optional request-level time budget shared with other AI calls
         
         Returns:
             Dict with suggested destinations and reasoning
         """
+        try:
+            return self.rank_destinations_by_emotion(emotion, destinations, PRIORITY_INTERACTIVE, deadline)
+        
+        except Exception as e:
+            # Fallback recommendations if API fails
+            return {
+                "emotion_analysis": f"Analyzing destinations for {emotion} emotion",
+                "recommendations": [
+                    {
+                        "destination_name": dest["name"],
+                        "reason": f"Suitable for {emotion} mood",
+                        "priority": "medium"
+                    }
+                    for dest in destinations[:3]
+                ]
+            }
+    
+    def rank_destinations_by_emotion(
+        self,
+        emotion: str,
+        destinations: List[Dict[str, Any]],
+        priority: int = PRIORITY_BACKGROUND,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """
+        Ask Gemini which destinations suit an emotion, without a local fallback.
+        
+        Used directly by the offline emotion ranking job, which keeps its own
+        local ranking when this call fails.
+        
+        Args:
+            emotion: Emotion to match (happy, sad, stressed, excited, etc.)
+            destinations: List of available destinations from database
+            priority: Scheduler priority of the call
+            deadline: Optional time budget
+        
+        Returns:
+            Dict with emotion_analysis and recommendations
+        
+        Raises:
+            Exception: If the call fails or the response is not valid JSON
+        """
         # Create prompt for emotion-based destination matching
         destinations_info = "\n".join([
             f"- {dest['name']}: {dest['description']} (Category: {dest['category']}, "
@@ -123,39 +559,26 @@ Provide your response in JSON format:
     ]
 }}"""
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert travel psychologist who matches destinations to emotional states."},
-                    {"role": "user", "content": prompt}
-                ],
+        response = self._generate(
+            prompt,
+            self._build_config(
+                EMOTION_SYSTEM_PROMPT,
                 temperature=0.8,
-                max_tokens=600
-            )
-            
-            import json
-            result = json.loads(response.choices[0].message.content.strip())
-            return result
+                max_output_tokens=600,
+                response_mime_type="application/json",
+            ),
+            priority,
+            deadline
+        )
         
-        except Exception as e:
-            # Fallback recommendations if API fails
-            return {
-                "emotion_analysis": f"Analyzing destinations for {emotion} emotion",
-                "recommendations": [
-                    {
-                        "destination_name": dest["name"],
-                        "reason": f"Suitable for {emotion} mood",
-                        "priority": "medium"
-                    }
-                    for dest in destinations[:3]
-                ]
-            }
+        return json.loads(response.text.strip())
     
     def generate_itinerary(
         self, 
         user_preferences: Dict[str, Any], 
-        selected_destinations: List[Dict[str, Any]]
+        selected_destinations: List[Dict[str, Any]],
+        priority: int = PRIORITY_INTERACTIVE,
+        deadline: Optional[Deadline] = None
     ) -> Dict[str, Any]:
         """
         Generate a day plan itinerary with time slots, costs, and directions.
@@ -163,6 +586,9 @@ Provide your response in JSON format:
         Args:
             user_preferences: User profile (personality_type, travel_style, transport_type)
             selected_destinations: List of destinations to include in itinerary
+            priority: PRIORITY_INTERACTIVE when a user is waiting on the response,
+                PRIORITY_BACKGROUND for batch and background job work
+            deadline: Optional request-level time budget
         
         Returns:
             Dict with complete itinerary including time slots, costs, and routing
@@ -221,18 +647,19 @@ Provide response in JSON format:
 }}"""
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert Da Lat travel planner who creates optimized, personalized itineraries."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=1000
+            response = self._generate(
+                prompt,
+                self._build_config(
+                    ITINERARY_SYSTEM_PROMPT,
+                    temperature=0.7,
+                    max_output_tokens=1000,
+                    response_mime_type="application/json",
+                ),
+                priority,
+                deadline
             )
             
-            import json
-            result = json.loads(response.choices[0].message.content.strip())
+            result = json.loads(response.text.strip())
             return result
         
         except Exception as e:
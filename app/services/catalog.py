@@ -0,0 +1,251 @@
+import hashlib
+import json
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.data.records import Destination
+from app.data import get_all_destinations, filter_destinations, get_destinations_version, page_destinations
+from app.schemas.destination import DestinationResponse
+
+
+# Why each photo spot is photogenic, keyed by destination name
+PHOTO_REASONS = {
+    "Hồ Xuân Hương": "Serene lake reflections, swan boats, and pine trees create picture-perfect scenes",
+    "Lang Biang Mountain": "Panoramic mountain views, misty peaks, and sweeping valley vistas",
+    "Thung Lũng Tình Yêu (Valley of Love)": "Colorful flower gardens, romantic scenery, and artistic installations",
+    "The Florest": "European-style architecture, vibrant flower arrangements, and Instagram-worthy café aesthetics",
+    "God Valley (Thung Lũng Vàng)": "Golden grass fields, dramatic lighting at sunset, untouched natural beauty",
+    "Crazy House (Hằng Nga Villa)": "Surreal architecture, whimsical designs, unique angles and structures",
+    "Datanla Waterfall": "Cascading water, lush greenery, and dramatic natural formations",
+    "Trúc Lâm Zen Monastery": "Peaceful temple architecture, Tuyền Lâm Lake views, cable car perspectives",
+    "Da Lat Railway Station": "French colonial charm, vintage trains, historic architectural details",
+    "Bảo Đại Summer Palace": "Art Deco elegance, historical ambiance, manicured gardens",
+    "XQ Historical Village": "Stunning silk embroidery art, traditional Vietnamese craftsmanship displays",
+    "Linh Phước Pagoda": "Colorful mosaic details, 49-meter dragon sculpture, intricate glass work",
+    "Da Lat Flower Gardens": "Vibrant flower displays, seasonal blooms, creative topiary designs",
+    "Mê Linh Coffee Garden": "Scenic coffee plantations, mountain backdrop, terraced landscapes",
+    "Elephant Falls": "Powerful cascades, natural rock formations, jungle surroundings",
+    "Pongour Waterfall": "Seven-tiered falls, wide cascades, best during rainy season",
+    "Ana Mandara Villas": "Colonial French architecture, elegant villa exteriors, luxury aesthetics",
+    "Clay Tunnel (Hầm Đất Sét)": "Quirky clay sculptures, creative art installations, unique textures"
+}
+
+# Destination-specific photography tips, keyed by destination name
+PHOTOGRAPHY_TIPS = {
+    "Hồ Xuân Hương": ["Visit at sunrise for misty lake shots", "Capture swan boats for romantic compositions"],
+    "Lang Biang Mountain": ["Use wide-angle lens for panoramic views", "Morning fog creates dramatic atmosphere"],
+    "Thung Lũng Tình Yêu (Valley of Love)": ["Afternoon light enhances flower colors", "Use props and installations creatively"],
+    "The Florest": ["Soft natural lighting ideal for portraits", "Focus on floral details and architecture"],
+    "God Valley (Thung Lũng Vàng)": ["Golden hour is essential", "Bring wide-angle lens for landscape shots"],
+    "Crazy House (Hằng Nga Villa)": ["Explore different angles and levels", "Early morning avoids crowds"],
+    "Datanla Waterfall": ["Use slow shutter for silky water effect", "Bring waterproof protection"],
+    "Linh Phước Pagoda": ["Capture mosaic details up close", "Colorful dragon sculpture is main feature"]
+}
+
+GENERAL_PHOTO_TIPS = [
+    "Best lighting: Early morning (6-8 AM) or golden hour (4-6 PM)",
+    "Da Lat weather can change quickly - bring protective gear for your camera",
+    "Respect local customs and ask permission before photographing people",
+    "Many spots get crowded during holidays - visit on weekdays for better shots"
+]
+
+
+def get_photography_tips(destination_name: str, category: str) -> List[str]:
+    """Generate specific photography tips for each destination."""
+    default_tips = [
+        f"Great for {category} destination photography",
+        "Arrive early to avoid crowds"
+    ]
+
+    return PHOTOGRAPHY_TIPS.get(destination_name, default_tips)
+
+
+def encode_json(content: Any) -> bytes:
+    """Encode content exactly as FastAPI's JSONResponse would."""
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _encode_destination(destination: Destination) -> bytes:
+    """Validate one destination through DestinationResponse and encode it."""
+    return encode_json(DestinationResponse.model_validate(destination.to_dict()).model_dump(mode="json"))
+
+
+def build_photo_spots_payload(destinations: List[Destination]) -> Dict[str, Any]:
+    """Build the photo-spots response for destinations with photo_spot=True."""
+    photo_destinations = [d for d in destinations if d["photo_spot"]]
+
+    if not photo_destinations:
+        return {
+            "message": "No photo spots found",
+            "photo_spots": []
+        }
+
+    enhanced_spots = []
+    for destination in photo_destinations:
+        enhanced_spots.append({
+            "id": destination["id"],
+            "name": destination["name"],
+            "location": destination["location"],
+            "category": destination["category"],
+            "estimated_cost": destination["estimated_cost"],
+            "estimated_time": destination["estimated_time"],
+            "description": destination["description"],
+            "photogenic_features": PHOTO_REASONS.get(
+                destination["name"],
+                "Beautiful scenery perfect for photography and creating lasting memories"
+            ),
+            "photography_tips": get_photography_tips(destination["name"], destination["category"])
+        })
+
+    return {
+        "total_photo_spots": len(enhanced_spots),
+        "photo_spots": enhanced_spots,
+        "general_tips": GENERAL_PHOTO_TIPS
+    }
+
+
+class CatalogSnapshot:
+    """
+    Pre-serialized responses for the static destination catalog.
+
+    Destinations are validated through DestinationResponse and encoded to JSON
+    bytes once per catalog version. Unfiltered listings and the photo-spots
+    payload are served as stored bytes; filtered listings join the stored
+    per-destination fragments, so no request re-validates or re-encodes rows.
+    The snapshot rebuilds itself when the destination data version changes.
+    """
+
+    def __init__(self):
+        self._version: Optional[int] = None
+        self._destination_json: Dict[int, bytes] = {}
+        self._all_json = b"[]"
+        self._photo_spots_json = b""
+        self._fingerprint = ""
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        """Catalog version the current snapshot was built from."""
+        self._ensure_fresh()
+        return self._version
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        Short content hash of the catalog.
+        
+        Unlike the version counter, this depends only on the destination data, so
+        every worker serving the same catalog (and every restart) gives the same
+        value and it is safe to use in ETags.
+        """
+        self._ensure_fresh()
+        return self._fingerprint
+
+    def refresh(self) -> None:
+        """Rebuild all pre-encoded responses from the current destination data."""
+        with self._lock:
+            self._build()
+
+    def destinations_json(
+        self,
+        category: Optional[str] = None,
+        photo_spot: Optional[bool] = None,
+        max_cost: Optional[float] = None
+    ) -> bytes:
+        """
+        Return the JSON array for GET /api/destinations.
+
+        Args:
+            category: Filter by 'local' or 'famous'
+            photo_spot: Filter by photo spot availability
+            max_cost: Filter by maximum cost
+
+        Returns:
+            UTF-8 JSON bytes of the matching destinations
+        """
+        self._ensure_fresh()
+        if category is None and photo_spot is None and max_cost is None:
+            return self._all_json
+
+        fragments = self._destination_json
+        matching = filter_destinations(category=category, photo_spot=photo_spot, max_cost=max_cost)
+        return b"[" + b",".join(
+            fragments.get(d["id"]) or _encode_destination(d) for d in matching
+        ) + b"]"
+
+    def destinations_page_json(
+        self,
+        category: Optional[str] = None,
+        photo_spot: Optional[bool] = None,
+        max_cost: Optional[float] = None,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> Tuple[bytes, Optional[int]]:
+        """
+        Return one page of GET /api/destinations.
+
+        Only the rows on the page are read from the data layer. Full rows reuse
+        their pre-encoded fragments; projected rows are encoded from just the
+        requested fields.
+
+        Args:
+            category: Filter by 'local' or 'famous'
+            photo_spot: Filter by photo spot availability
+            max_cost: Filter by maximum cost
+            after_id: Return destinations with an ID greater than this
+            limit: Maximum number of destinations, or None for the rest
+            fields: Fields to keep, or None for all fields
+
+        Returns:
+            Tuple of (UTF-8 JSON array bytes, ID to continue after or None on the last page)
+        """
+        self._ensure_fresh()
+        page, next_after = page_destinations(
+            category=category, photo_spot=photo_spot, max_cost=max_cost,
+            after_id=after_id, limit=limit, fields=fields
+        )
+        if fields is not None:
+            return encode_json(page), next_after
+
+        fragments = self._destination_json
+        return b"[" + b",".join(
+            fragments.get(d["id"]) or _encode_destination(d) for d in page
+        ) + b"]", next_after
+
+    def photo_spots_json(self) -> bytes:
+        """Return the JSON body for GET /api/destinations/photo-spots."""
+        self._ensure_fresh()
+        return self._photo_spots_json
+
+    def _ensure_fresh(self) -> None:
+        if self._version != get_destinations_version():
+            with self._lock:
+                if self._version != get_destinations_version():
+                    self._build()
+
+    def _build(self) -> None:
+        version = get_destinations_version()
+        destinations = get_all_destinations()
+
+        destination_json = {dest["id"]: _encode_destination(dest) for dest in destinations}
+        self._destination_json = destination_json
+        self._all_json = b"[" + b",".join(destination_json[d["id"]] for d in destinations) + b"]"
+        self._photo_spots_json = encode_json(build_photo_spots_payload(destinations))
+        self._fingerprint = hashlib.blake2b(self._all_json, digest_size=8).hexdigest()
+        self._version = version
+
+
+# Singleton instance
+catalog_snapshot = CatalogSnapshot()
+
+
+def get_catalog_snapshot() -> CatalogSnapshot:
+    """Factory function to get CatalogSnapshot instance."""
+    return catalog_snapshot
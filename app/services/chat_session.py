@@ -0,0 +1,180 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, NamedTuple, Optional, Tuple
+
+
+def _clip(text: str, limit: int) -> str:
+    """Collapse whitespace and cut text to at most `limit` characters."""
+    text = " ".join(text.split())
+    if len(text) <= limit:
+        return text
+    return text[:limit - 3].rstrip() + "..."
+
+
+class ChatHistory(NamedTuple):
+    """Read-only view of a session handed to the AI service."""
+    summary: str
+    turns: Tuple[Tuple[str, str], ...]
+
+
+@dataclass
+class ChatSession:
+    """Rolling conversation state for a single user."""
+    summary: str = ""
+    turns: Deque[Tuple[str, str]] = field(default_factory=deque)
+    last_access: float = field(default_factory=time.monotonic)
+    size: int = 0
+
+    def recompute_size(self) -> None:
+        self.size = len(self.summary) + sum(len(u) + len(a) for u, a in self.turns)
+
+
+class ChatSessionStore:
+    """
+    Bounded in-memory store of per-user chat sessions.
+
+    Each session keeps the last `max_turns` exchanges verbatim (clipped) and folds
+    older exchanges into a short rolling summary, so the context sent to Gemini
+    stays small no matter how long the conversation runs.
+
+    Sessions are evicted least-recently-used first when the store exceeds
+    `max_sessions` or `max_chars` (total characters held across all sessions),
+    and expire after `ttl_seconds` without activity.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        ttl_seconds: float = 1800,
+        max_turns: int = 4,
+        max_chars: int = 2_000_000,
+        max_summary_chars: int = 600,
+        max_turn_chars: int = 500
+    ):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self.max_chars = max_chars
+        self.max_summary_chars = max_summary_chars
+        self.max_turn_chars = max_turn_chars
+        self._sessions: "OrderedDict[int, ChatSession]" = OrderedDict()
+        self._total_chars = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get_history(self, user_id: int) -> Optional[ChatHistory]:
+        """
+        Return the compact history for a user, or None if there is no live session.
+
+        Args:
+            user_id: ID of the user
+
+        Returns:
+            ChatHistory with the rolling summary and recent turns
+        """
+        with self._lock:
+            session = self._touch(user_id)
+            if session is None or (not session.summary and not session.turns):
+                return None
+            return ChatHistory(summary=session.summary, turns=tuple(session.turns))
+
+    def record_turn(self, user_id: int, user_message: str, assistant_message: str) -> None:
+        """
+        Append an exchange to the user's session, folding the oldest turn into the summary.
+
+        Args:
+            user_id: ID of the user
+            user_message: Message the user sent
+            assistant_message: Reply the assistant returned
+        """
+        turn = (
+            _clip(user_message, self.max_turn_chars),
+            _clip(assistant_message, self.max_turn_chars)
+        )
+        with self._lock:
+            session = self._touch(user_id)
+            if session is None:
+                session = ChatSession()
+                self._sessions[user_id] = session
+
+            old_size = session.size
+            session.turns.append(turn)
+            while len(session.turns) > self.max_turns:
+                self._fold_into_summary(session, session.turns.popleft())
+            session.recompute_size()
+            self._total_chars += session.size - old_size
+
+            self._evict()
+
+    def clear(self, user_id: int) -> None:
+        """Drop the session for a user, if any."""
+        with self._lock:
+            self._remove(user_id)
+
+    def stats(self) -> Dict[str, int]:
+        """Return current occupancy of the store."""
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "total_chars": self._total_chars,
+                "max_sessions": self.max_sessions,
+                "max_chars": self.max_chars,
+                "evictions": self._evictions
+            }
+
+    def _touch(self, user_id: int) -> Optional[ChatSession]:
+        """Look up a session, expiring it if stale and marking it most recently used."""
+        session = self._sessions.get(user_id)
+        if session is None:
+            return None
+        now = time.monotonic()
+        if now - session.last_access > self.ttl_seconds:
+            self._remove(user_id)
+            return None
+        session.last_access = now
+        self._sessions.move_to_end(user_id)
+        return session
+
+    def _fold_into_summary(self, session: ChatSession, turn: Tuple[str, str]) -> None:
+        """Compress an evicted turn into one sentence of the rolling summary."""
+        user_message, assistant_message = turn
+        sentence = f"User asked: {_clip(user_message, 120)} / You answered: {_clip(assistant_message, 160)}"
+        summary = f"{session.summary}\n{sentence}" if session.summary else sentence
+        # Keep the most recent part of the summary when it grows past the cap
+        while len(summary) > self.max_summary_chars and "\n" in summary:
+            summary = summary.split("\n", 1)[1]
+        session.summary = summary[:self.max_summary_chars]
+
+    def _remove(self, user_id: int) -> None:
+        session = self._sessions.pop(user_id, None)
+        if session is not None:
+            self._total_chars -= session.size
+
+    def _evict(self) -> None:
+        """Evict expired sessions, then least-recently-used ones until within limits."""
+        now = time.monotonic()
+        while self._sessions:
+            user_id, session = next(iter(self._sessions.items()))
+            over_limit = len(self._sessions) > self.max_sessions or self._total_chars > self.max_chars
+            expired = now - session.last_access > self.ttl_seconds
+            if not (over_limit or expired):
+                break
+            self._remove(user_id)
+            self._evictions += 1
+
+
+# Singleton instance
+chat_session_store = ChatSessionStore(
+    max_sessions=int(os.getenv("CHAT_SESSION_MAX_USERS", "1000")),
+    ttl_seconds=float(os.getenv("CHAT_SESSION_TTL_SECONDS", "1800")),
+    max_turns=int(os.getenv("CHAT_SESSION_MAX_TURNS", "4")),
+    max_chars=int(os.getenv("CHAT_SESSION_MAX_CHARS", "2000000"))
+)
+
+
+def get_chat_session_store() -> ChatSessionStore:
+    """Factory function to get ChatSessionStore instance."""
+    return chat_session_store
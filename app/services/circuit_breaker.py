@@ -0,0 +1,132 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the circuit is open."""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    The circuit opens after `failure_threshold` consecutive failed or slow calls
+    (a call slower than `slow_call_seconds` counts as a failure even if it
+    succeeds). While open, callers fail fast with CircuitOpenError so they can
+    use local fallbacks. After `reset_timeout` seconds the circuit goes half-open
+    and lets up to `half_open_max_calls` probe calls through: a successful probe
+    closes the circuit, a failed one opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        slow_call_seconds: float = 10.0,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._times_opened = 0
+        self._short_circuited = 0
+        self._last_failure: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def before_call(self) -> None:
+        """
+        Admit a call or fail fast.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with all probes in flight
+        """
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and self._probes_in_flight < self.half_open_max_calls:
+                self._state = self.HALF_OPEN
+                self._probes_in_flight += 1
+                return
+            self._short_circuited += 1
+            retry_after = max(0.0, self._opened_at + self.reset_timeout - now)
+            raise CircuitOpenError(f"{self.name} circuit is open", retry_after=max(1.0, retry_after))
+
+    def record_success(self, duration: float) -> None:
+        """Record a completed call; slow calls count as failures."""
+        if duration > self.slow_call_seconds:
+            self.record_failure(f"slow call ({duration:.1f}s)")
+            return
+        with self._lock:
+            self._consecutive_failures = 0
+            if self._state == self.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            self._state = self.CLOSED
+
+    def record_failure(self, reason: str = "error") -> None:
+        """Record a failed call, opening the circuit when the threshold is reached."""
+        with self._lock:
+            self._consecutive_failures += 1
+            self._last_failure = reason
+            if self._state == self.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                self._open()
+            elif self._state == self.CLOSED and self._consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def record_ignored(self) -> None:
+        """Release an admitted call that never reached upstream (e.g. rejected locally)."""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the breaker state for health checks."""
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            return {
+                "name": self.name,
+                "state": state,
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "times_opened": self._times_opened,
+                "short_circuited_calls": self._short_circuited,
+                "last_failure": self._last_failure,
+                "retry_in_seconds": round(max(0.0, self._opened_at + self.reset_timeout - now), 1)
+                if state == self.OPEN else 0
+            }
+
+    def _current_state(self, now: float) -> str:
+        # An open circuit becomes half-open once the reset timeout has elapsed
+        if self._state == self.OPEN and now - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    def _open(self) -> None:
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probes_in_flight = 0
+        self._times_opened += 1
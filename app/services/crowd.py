@@ -0,0 +1,107 @@
+import os
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.data import get_all_destinations, get_destination_by_id, get_visit_count
+
+
+# Time slots in the order they happen during the day
+TIME_SLOTS = ("morning", "afternoon", "evening")
+
+
+class CrowdService:
+    """
+    Crowd levels per destination, date and time slot.
+
+    Reads the data layer's visit counters, which are updated on every itinerary
+    create and delete, so each (destination, date, slot) lookup is O(1) and no
+    request scans the itinerary list. A slot is "busy" from `busy_threshold`
+    planned visits and "crowded" from `crowded_threshold`.
+    """
+
+    def __init__(self, busy_threshold: int = 5, crowded_threshold: int = 10):
+        self.busy_threshold = busy_threshold
+        self.crowded_threshold = crowded_threshold
+
+    def level(self, visitors: int) -> str:
+        """Map a visit count to 'quiet', 'busy' or 'crowded'."""
+        if visitors >= self.crowded_threshold:
+            return "crowded"
+        if visitors >= self.busy_threshold:
+            return "busy"
+        return "quiet"
+
+    def slots(self, destination_id: int, visit_date: date) -> Dict[str, Dict[str, Any]]:
+        """Visitors and crowd level for each time slot of one destination and day."""
+        result = {}
+        for time_slot in TIME_SLOTS:
+            visitors = get_visit_count(destination_id, visit_date, time_slot)
+            result[time_slot] = {"visitors": visitors, "level": self.level(visitors)}
+        return result
+
+    def heatmap(
+        self,
+        visit_date: date,
+        destination_ids: Optional[Iterable[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Crowd levels of many destinations on one day, busiest first.
+
+        Args:
+            visit_date: Day to report
+            destination_ids: Destinations to include (all destinations by default)
+
+        Returns:
+            One entry per destination with per-slot visitors and levels
+        """
+        if destination_ids is None:
+            destinations = get_all_destinations()
+        else:
+            destinations = [d for d in map(get_destination_by_id, destination_ids) if d]
+
+        rows = []
+        for destination in destinations:
+            slots = self.slots(destination["id"], visit_date)
+            total = sum(slot["visitors"] for slot in slots.values())
+            rows.append({
+                "destination_id": destination["id"],
+                "name": destination["name"],
+                "total_visitors": total,
+                "peak_level": self.level(max(slot["visitors"] for slot in slots.values())),
+                "slots": slots
+            })
+        rows.sort(key=lambda row: row["total_visitors"], reverse=True)
+        return rows
+
+    def outlook(self, destination_id: int, from_date: date, to_date: date) -> List[Dict[str, Any]]:
+        """Per-day, per-slot crowd levels of one destination over a date range (inclusive)."""
+        days = []
+        current = from_date
+        while current <= to_date:
+            slots = self.slots(destination_id, current)
+            days.append({
+                "visit_date": current.isoformat(),
+                "slots": slots,
+                "quietest_slot": min(TIME_SLOTS, key=lambda slot: slots[slot]["visitors"])
+            })
+            current += timedelta(days=1)
+        return days
+
+    def quietest_slot(self, destination_id: int, visit_date: date) -> Tuple[str, int]:
+        """Return (time_slot, visitors) for the least visited slot; earlier slots win ties."""
+        return min(
+            ((slot, get_visit_count(destination_id, visit_date, slot)) for slot in TIME_SLOTS),
+            key=lambda item: item[1]
+        )
+
+
+# Singleton instance
+crowd_service = CrowdService(
+    busy_threshold=int(os.getenv("CROWD_BUSY_THRESHOLD", "5")),
+    crowded_threshold=int(os.getenv("CROWD_CROWDED_THRESHOLD", "10"))
+)
+
+
+def get_crowd_service() -> CrowdService:
+    """Factory function to get CrowdService instance."""
+    return crowd_service
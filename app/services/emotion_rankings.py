@@ -0,0 +1,293 @@
+import os
+import threading
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from app.data import get_all_destinations, get_destinations_version
+from app.services.ai_service import ai_service
+from app.services.ai_scheduler import PRIORITY_BACKGROUND
+
+
+PERSONALITY_TYPES = ("introvert", "extrovert")
+
+# How each emotion maps onto the catalog for the local scorer: description/name
+# keywords (Vietnamese catalog text), preferred category, and photo spot weight.
+EMOTION_PROFILES = {
+    "happy": {
+        "keywords": ("nhộn nhịp", "vườn hoa", "hoa", "vui chơi", "quảng trường", "cafe", "café", "sáng tạo"),
+        "category": "famous",
+        "photo_spot": 1.0,
+        "reason": "Vibrant, social place with great photo opportunities",
+        "analysis": "Happy moods suit lively, colorful places to share with others"
+    },
+    "sad": {
+        "keywords": ("yên tĩnh", "thanh tịnh", "thiên nhiên", "hồ", "đồi", "chè", "rừng", "chùa", "bình minh"),
+        "category": "local",
+        "photo_spot": 0.0,
+        "reason": "Peaceful, healing place close to nature",
+        "analysis": "When feeling down, calm natural surroundings help lift the spirit"
+    },
+    "stressed": {
+        "keywords": ("yên tĩnh", "thanh tịnh", "thiên nhiên", "hoang sơ", "hồ", "vườn cafe", "chùa", "đồi"),
+        "category": "local",
+        "photo_spot": 0.0,
+        "reason": "Quiet, relaxing spot away from the crowds",
+        "analysis": "Stress eases in quiet places away from crowds and noise"
+    },
+    "excited": {
+        "keywords": ("leo", "jeep", "thác", "roller", "trượt", "kayak", "cắm trại", "núi", "hùng vĩ", "trải nghiệm"),
+        "category": None,
+        "photo_spot": 0.5,
+        "reason": "Adventurous, energetic activity",
+        "analysis": "Excitement calls for adventure and active experiences"
+    },
+    "romantic": {
+        "keywords": ("lãng mạn", "cặp đôi", "hẹn hò", "hoàng hôn", "hoa", "hồ", "thuyền", "cối xay gió"),
+        "category": None,
+        "photo_spot": 1.0,
+        "reason": "Beautiful, intimate setting for couples",
+        "analysis": "Romantic moods suit scenic, intimate places for two"
+    },
+    "peaceful": {
+        "keywords": ("yên tĩnh", "thanh tịnh", "chùa", "hồ", "đồi chè", "thiên nhiên", "bình minh", "rừng thông"),
+        "category": "local",
+        "photo_spot": 0.0,
+        "reason": "Tranquil place to slow down and unwind",
+        "analysis": "Peaceful moods pair well with serene lakes, hills and temples"
+    }
+}
+
+# Bonus for destinations in the category a personality prefers
+PERSONALITY_CATEGORY = {"introvert": "local", "extrovert": "famous"}
+
+# Score added for each AI-recommended destination, by the priority Gemini gave it
+AI_PRIORITY_BONUS = {"high": 3.0, "medium": 2.0}
+
+
+def _score_destination(destination: Dict[str, Any], profile: Dict[str, Any], personality: str) -> float:
+    text = f"{destination['name']} {destination['description'] or ''}".lower()
+    score = float(sum(1 for keyword in profile["keywords"] if keyword in text))
+    if profile["category"] and destination["category"] == profile["category"]:
+        score += 1.0
+    if destination["photo_spot"]:
+        score += profile["photo_spot"]
+    if destination["category"] == PERSONALITY_CATEGORY.get(personality):
+        score += 0.5
+    return score
+
+
+class EmotionRankingTable:
+    """
+    Precomputed destination rankings for every emotion and personality type.
+
+    The chat route reads a ranking with a dict lookup instead of asking Gemini
+    per message. Rankings come from a local keyword scorer and are rebuilt
+    whenever the destination catalog version changes. When Gemini is available,
+    a background thread also asks it once per emotion per catalog version (at
+    background priority) and blends its picks and reasons into the table.
+    Emotions whose call failed keep the local ranking and are asked again on
+    the next refresh interval.
+    """
+
+    def __init__(self, top_k: int = 5, refresh_interval: float = 30.0, use_ai: bool = True):
+        self.top_k = top_k
+        self.refresh_interval = refresh_interval
+        self.use_ai = use_ai
+        # (emotion, personality) -> ranking; replaced as a whole on refresh
+        self._table: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._version: Optional[int] = None
+        self._ai_version: Optional[int] = None
+        # Gemini rankings gathered so far for _ai_picks_version; missing emotions are retried
+        self._ai_picks: Dict[str, Dict[str, Any]] = {}
+        self._ai_picks_version: Optional[int] = None
+        self._refreshes = 0
+        self._ai_refreshes = 0
+        self._failures = 0
+        self._last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def lookup(self, emotion: str, personality_type: str) -> Dict[str, Any]:
+        """
+        Return the ranking for an emotion and personality type.
+
+        Args:
+            emotion: One of the supported emotions (happy, sad, stressed, excited, romantic, peaceful)
+            personality_type: 'introvert' or 'extrovert'
+
+        Returns:
+            Dict with emotion_analysis, source ('local' or 'ai') and up to top_k
+            recommendations (destination, reason, priority), best first
+        """
+        if self._version != get_destinations_version():
+            self.refresh()
+        table = self._table
+        ranking = table.get((emotion, personality_type))
+        if ranking is None:
+            ranking = table.get((emotion, PERSONALITY_TYPES[0]), {
+                "emotion_analysis": f"Analyzing destinations for {emotion} emotion",
+                "source": "local",
+                "recommendations": []
+            })
+        return ranking
+
+    def refresh(self) -> None:
+        """Rebuild the local rankings from the current catalog and schedule AI enrichment."""
+        with self._lock:
+            version = get_destinations_version()
+            if version == self._version:
+                return
+            destinations = get_all_destinations()
+            self._table = {
+                (emotion, personality): self._rank(destinations, emotion, personality, {})
+                for emotion in EMOTION_PROFILES
+                for personality in PERSONALITY_TYPES
+            }
+            self._version = version
+            self._refreshes += 1
+        self._wake.set()
+
+    def start(self) -> None:
+        """Build the table and start the background refresh thread."""
+        self.refresh()
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="emotion-rankings", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background refresh thread."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return table size, refresh counters and the last background error."""
+        return {
+            "entries": len(self._table),
+            "catalog_version": self._version,
+            "ai_catalog_version": self._ai_version,
+            "ai_emotions": len(self._ai_picks) if self._ai_picks_version == self._version else 0,
+            "refreshes": self._refreshes,
+            "ai_refreshes": self._ai_refreshes,
+            "failures": self._failures,
+            "last_error": self._last_error,
+            "running": self._thread is not None and self._thread.is_alive()
+        }
+
+    def _rank(
+        self,
+        destinations: Sequence[Dict[str, Any]],
+        emotion: str,
+        personality: str,
+        ai_picks: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        profile = EMOTION_PROFILES[emotion]
+        ai_result = ai_picks.get(emotion)
+        ai_recommendations = {}
+        if ai_result:
+            ai_recommendations = {
+                rec.get("destination_name"): rec for rec in ai_result.get("recommendations", [])
+            }
+
+        scored = []
+        for position, destination in enumerate(destinations):
+            score = _score_destination(destination, profile, personality)
+            ai_rec = ai_recommendations.get(destination["name"])
+            if ai_rec:
+                score += AI_PRIORITY_BONUS.get(ai_rec.get("priority"), 2.0)
+            scored.append((-score, position, destination, ai_rec))
+        scored.sort(key=lambda item: item[:2])
+
+        recommendations = []
+        for rank, (_, _, destination, ai_rec) in enumerate(scored[:self.top_k]):
+            recommendations.append({
+                "destination": destination,
+                "reason": (ai_rec or {}).get("reason") or profile["reason"],
+                "priority": (ai_rec or {}).get("priority") or ("high" if rank < 2 else "medium")
+            })
+        return {
+            "emotion_analysis": (ai_result or {}).get("emotion_analysis") or profile["analysis"],
+            "source": "ai" if ai_result else "local",
+            "recommendations": recommendations
+        }
+
+    def _enrich_with_ai(self) -> None:
+        """
+        Blend one Gemini ranking per emotion into the table for the current catalog.
+
+        Only emotions without a ranking for this catalog version are asked; the
+        version counts as enriched once every emotion has one.
+        """
+        version = self._version
+        if not self.use_ai or not ai_service.available or version == self._ai_version:
+            return
+        ai_picks = dict(self._ai_picks) if self._ai_picks_version == version else {}
+        destinations = get_all_destinations()
+        catalog = [d.to_dict() for d in destinations]
+        added = 0
+        for emotion in EMOTION_PROFILES:
+            if emotion in ai_picks:
+                continue
+            if self._stop.is_set():
+                return
+            try:
+                ai_picks[emotion] = ai_service.rank_destinations_by_emotion(emotion, catalog, PRIORITY_BACKGROUND)
+                added += 1
+            except Exception as e:
+                # Keep the local ranking for this emotion; retried on the next refresh interval
+                self._record_error(f"AI ranking for {emotion}", e)
+        if not added:
+            return
+
+        with self._lock:
+            # Drop the result if the catalog changed while Gemini was answering
+            if version != self._version or get_destinations_version() != version:
+                return
+            self._table = {
+                (emotion, personality): self._rank(destinations, emotion, personality, ai_picks)
+                for emotion in EMOTION_PROFILES
+                for personality in PERSONALITY_TYPES
+            }
+            self._ai_picks, self._ai_picks_version = ai_picks, version
+            if len(ai_picks) == len(EMOTION_PROFILES):
+                self._ai_version = version
+            self._ai_refreshes += 1
+
+    def _record_error(self, context: str, error: Exception) -> None:
+        self._failures += 1
+        self._last_error = f"{context}: {type(error).__name__}: {error}"
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.refresh()
+                self._wake.clear()
+                self._enrich_with_ai()
+            except Exception as e:
+                self._record_error("Refresh", e)
+
+
+def _ai_enabled() -> bool:
+    return os.getenv("EMOTION_RANKINGS_USE_AI", "true").lower() not in ("0", "false", "no", "off")
+
+
+# Singleton instance
+emotion_rankings = EmotionRankingTable(
+    top_k=int(os.getenv("EMOTION_RANKINGS_TOP_K", "5")),
+    refresh_interval=float(os.getenv("EMOTION_RANKINGS_REFRESH_SECONDS", "30")),
+    use_ai=_ai_enabled()
+)
+
+
+def get_emotion_rankings() -> EmotionRankingTable:
+    """Factory function to get EmotionRankingTable instance."""
+    return emotion_rankings
@@ -0,0 +1,39 @@
+from typing import Any
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Build a strong ETag from its components, e.g. make_etag("catalog", "9f2c") -> '"catalog-9f2c"'.
+
+    Use content digests rather than per-process counters, so that every worker
+    behind a load balancer returns the same ETag for the same data.
+    """
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Check the request's If-None-Match header against an ETag.
+
+    Uses weak comparison (a W/ prefix is ignored), as RFC 9110 requires for
+    If-None-Match, and honours the "*" wildcard.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    if "*" in candidates:
+        return True
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def cache_headers(etag: str) -> dict:
+    """Headers sent with cacheable responses: clients may store them but must revalidate."""
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def not_modified(etag: str) -> Response:
+    """Return an empty 304 Not Modified response for the given ETag."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag))
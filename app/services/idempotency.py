@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+
+
+# Request header carrying the client's idempotency key
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+
+# Response header set when a stored response is replayed
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class IdempotencyError(Exception):
+    """Raised when an Idempotency-Key cannot be honoured for this request."""
+
+    def __init__(self, message: str, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+@dataclass
+class _Entry:
+    fingerprint: str
+    done: threading.Event = field(default_factory=threading.Event)
+    finished: bool = False
+    status_code: int = status.HTTP_200_OK
+    body: Any = None
+    expires_at: float = 0.0
+
+
+def fingerprint(payload: Any) -> str:
+    """Stable hash of a request payload, used to detect a key reused for a different request."""
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Bounded TTL store of in-progress and finished POST results, keyed by Idempotency-Key.
+
+    The first request with a key runs normally. A retry with the same key and
+    payload waits for the in-flight request (up to `wait_timeout` seconds) or
+    replays its stored response, so timeouts never cause a second AI call or a
+    duplicate row. Client errors (4xx) are replayed too; server errors release
+    the key so the retry runs again. Finished results are kept for
+    `ttl_seconds`, and at most `max_entries` keys are held.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 86400, wait_timeout: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.wait_timeout = wait_timeout
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._replays = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def run(
+        self,
+        scope: str,
+        key: Optional[str],
+        payload: Any,
+        fn: Callable[[], Any],
+        response: Optional[Response] = None,
+        status_code: int = status.HTTP_200_OK
+    ) -> Any:
+        """
+        Run `fn` once per (scope, key) and return its result to every retry.
+
+        Args:
+            scope: Endpoint the key belongs to, e.g. "POST /api/survey"
+            key: Idempotency-Key header value; None runs `fn` without deduplication
+            payload: Request body, compared across retries of the same key
+            fn: Handler body returning the JSON response content
+            response: Response to mark with the Idempotent-Replayed header on replays
+            status_code: Status code of a successful response
+
+        Raises:
+            IdempotencyError: 422 if the key was used with a different payload,
+                409 if the original request is still running after `wait_timeout`
+            HTTPException: Replayed 4xx errors, or errors raised by `fn`
+        """
+        if not key:
+            return fn()
+
+        entry_key = (scope, key)
+        request_fingerprint = fingerprint(payload)
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            with self._lock:
+                self._sweep()
+                entry = self._entries.get(entry_key)
+                if entry is None:
+                    entry = _Entry(fingerprint=request_fingerprint)
+                    self._entries[entry_key] = entry
+                    break
+                if entry.fingerprint != request_fingerprint:
+                    raise IdempotencyError(
+                        f"{IDEMPOTENCY_KEY_HEADER} was already used for a different request",
+                        status.HTTP_422_UNPROCESSABLE_ENTITY
+                    )
+                if entry.finished:
+                    self._replays += 1
+                    return self._replay(entry, response)
+
+            # Attach to the in-flight request, then re-check: it may have released the key
+            if not entry.done.wait(max(0.0, deadline - time.monotonic())):
+                raise IdempotencyError(
+                    "A request with this Idempotency-Key is still in progress",
+                    status.HTTP_409_CONFLICT,
+                    retry_after=1.0
+                )
+
+        try:
+            body = fn()
+        except HTTPException as e:
+            if e.status_code < 500:
+                self._finish(entry_key, entry, e.status_code, {"detail": e.detail})
+            else:
+                self._release(entry_key, entry)
+            raise
+        except BaseException:
+            self._release(entry_key, entry)
+            raise
+        self._finish(entry_key, entry, status_code, body)
+        return body
+
+    def stats(self) -> Dict[str, int]:
+        """Return store occupancy and replay counters."""
+        with self._lock:
+            return {
+                "keys": len(self._entries),
+                "in_progress": sum(1 for entry in self._entries.values() if not entry.finished),
+                "max_entries": self.max_entries,
+                "replays": self._replays,
+                "evictions": self._evictions
+            }
+
+    @staticmethod
+    def _replay(entry: _Entry, response: Optional[Response]) -> Any:
+        if entry.status_code >= 400:
+            raise HTTPException(
+                status_code=entry.status_code,
+                detail=entry.body["detail"],
+                headers={REPLAYED_HEADER: "true"}
+            )
+        if response is not None:
+            response.headers[REPLAYED_HEADER] = "true"
+        return entry.body
+
+    def _finish(self, entry_key: Tuple[str, str], entry: _Entry, status_code: int, body: Any) -> None:
+        with self._lock:
+            entry.status_code = status_code
+            entry.body = body
+            entry.finished = True
+            entry.expires_at = time.monotonic() + self.ttl_seconds
+            if self._entries.get(entry_key) is entry:
+                self._entries.move_to_end(entry_key)
+            self._sweep()
+        entry.done.set()
+
+    def _release(self, entry_key: Tuple[str, str], entry: _Entry) -> None:
+        with self._lock:
+            if self._entries.get(entry_key) is entry:
+                del self._entries[entry_key]
+        entry.done.set()
+
+    def _sweep(self) -> None:
+        """Drop expired results and the oldest finished ones over the bound. Call with the lock held."""
+        now = time.monotonic()
+        over = len(self._entries) - self.max_entries
+        doomed = []
+        for entry_key, entry in self._entries.items():
+            if not entry.finished:
+                continue
+            if entry.expires_at > now and over <= 0:
+                break
+            doomed.append(entry_key)
+            over -= 1
+        for entry_key in doomed:
+            if self._entries.pop(entry_key).expires_at > now:
+                self._evictions += 1
+
+# Singleton instance
+idempotency_store = IdempotencyStore(
+    max_entries=int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000")),
+    ttl_seconds=float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400")),
+    wait_timeout=float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+)
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    """Factory function to get IdempotencyStore instance."""
+    return idempotency_store
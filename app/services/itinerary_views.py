@@ -0,0 +1,380 @@
+import os
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.data import (
+    get_destination_by_id, get_itineraries_by_user, get_user_itineraries_version,
+    get_destinations_version, subscribe_itinerary_changes, project_fields
+)
+
+
+# Time slot order for sorting destinations within a day
+TIME_SLOT_ORDER = {
+    "morning": 1,
+    "afternoon": 2,
+    "evening": 3
+}
+
+
+class UserItineraryView:
+    """
+    Materialized itinerary view for one user: itineraries grouped by visit date,
+    with destination details joined in and per-day and overall totals.
+
+    Updates are copy-on-write: a change replaces the affected day dict and the
+    top-level list/summary instead of mutating them, so a response that already
+    holds references keeps seeing a consistent snapshot.
+    """
+
+    def __init__(self):
+        self.dates: List[str] = []                      # visit dates, ascending
+        self.days: Dict[str, Dict[str, Any]] = {}       # visit date -> response-shaped day
+        self._keys: Dict[str, List[Tuple[int, int]]] = {}   # visit date -> (slot order, itinerary id)
+        self._headers: Dict[str, Dict[int, Tuple[Optional[str], str]]] = {}  # visit date -> id -> (emotion_tag, created_at)
+        self._date_by_itinerary: Dict[int, str] = {}    # itinerary id -> visit date
+        self.itineraries: List[Dict[str, Any]] = []
+        self.summary: Dict[str, Any] = _summarize([])
+
+    @property
+    def size(self) -> int:
+        """Number of destination entries held, used for the cache memory cap."""
+        return len(self._date_by_itinerary)
+
+    @classmethod
+    def build(cls, itineraries: Sequence[Dict[str, Any]]) -> "UserItineraryView":
+        """
+        Build a view from all of a user's itineraries in one pass.
+
+        Itineraries are grouped by day, each day is sorted once and the top-level
+        list and summary are published once, so a cold build is O(n log n)
+        rather than one copy-on-write update per itinerary.
+        """
+        view = cls()
+        grouped: Dict[str, List[Tuple[Tuple[int, int], Dict[str, Any], Dict[str, Any]]]] = {}
+        for itinerary in itineraries:
+            destination = get_destination_by_id(itinerary["destination_id"])
+            if not destination or itinerary["id"] in view._date_by_itinerary:
+                continue
+            date_key = itinerary["visit_date"]
+            key = (TIME_SLOT_ORDER.get(itinerary["time_slot"], 0), itinerary["id"])
+            grouped.setdefault(date_key, []).append((key, itinerary, _entry(itinerary, destination)))
+            view._date_by_itinerary[itinerary["id"]] = date_key
+
+        for date_key in sorted(grouped):
+            items = sorted(grouped[date_key], key=lambda item: item[0])
+            view._keys[date_key] = [key for key, _, _ in items]
+            view._headers[date_key] = {
+                itinerary["id"]: (itinerary["emotion_tag"], itinerary["created_at"]) for _, itinerary, _ in items
+            }
+            destinations = [entry for _, _, entry in items]
+            view.dates.append(date_key)
+            view._set_day(
+                date_key,
+                destinations,
+                sum(entry["destination"]["estimated_cost"] for entry in destinations),
+                sum(entry["destination"]["estimated_time"] for entry in destinations)
+            )
+        view._publish()
+        return view
+
+    def add(self, itinerary: Dict[str, Any]) -> None:
+        """Insert one itinerary into its day, keeping destinations in time-slot order."""
+        destination = get_destination_by_id(itinerary["destination_id"])
+        if not destination or itinerary["id"] in self._date_by_itinerary:
+            return
+
+        date_key = itinerary["visit_date"]
+        entry = _entry(itinerary, destination)
+        dest_cost = entry["destination"]["estimated_cost"]
+        dest_time = entry["destination"]["estimated_time"]
+
+        key = (TIME_SLOT_ORDER.get(itinerary["time_slot"], 0), itinerary["id"])
+        keys = self._keys.setdefault(date_key, [])
+        position = bisect_left(keys, key)
+        keys.insert(position, key)
+        self._headers.setdefault(date_key, {})[itinerary["id"]] = (itinerary["emotion_tag"], itinerary["created_at"])
+        self._date_by_itinerary[itinerary["id"]] = date_key
+
+        day = self.days.get(date_key)
+        if day is None:
+            insort(self.dates, date_key)
+            destinations = [entry]
+            total_cost, total_time = dest_cost, dest_time
+        else:
+            destinations = day["destinations"][:position] + [entry] + day["destinations"][position:]
+            total_cost, total_time = day["total_cost"] + dest_cost, day["total_time"] + dest_time
+
+        self._replace_day(date_key, destinations, total_cost, total_time)
+
+    def remove(self, itinerary_id: int) -> None:
+        """Remove one itinerary from its day, dropping the day when it becomes empty."""
+        date_key = self._date_by_itinerary.pop(itinerary_id, None)
+        if date_key is None:
+            return
+
+        keys = self._keys[date_key]
+        position = next(i for i, (_, iid) in enumerate(keys) if iid == itinerary_id)
+        del keys[position]
+        del self._headers[date_key][itinerary_id]
+
+        day = self.days[date_key]
+        removed = day["destinations"][position]["destination"]
+        destinations = day["destinations"][:position] + day["destinations"][position + 1:]
+
+        if not destinations:
+            del self.days[date_key], self._keys[date_key], self._headers[date_key]
+            self.dates.remove(date_key)
+            self._publish()
+            return
+
+        self._replace_day(
+            date_key,
+            destinations,
+            day["total_cost"] - removed["estimated_cost"],
+            day["total_time"] - removed["estimated_time"]
+        )
+
+    def page(
+        self,
+        after_date: Optional[str] = None,
+        limit: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Return one page of days in visit-date order.
+
+        Args:
+            after_date: Return days after this visit date
+            limit: Maximum number of days, or None for the rest
+            fields: Destination fields to keep, or None for all fields
+            from_date: Earliest visit date to include (ISO format, inclusive)
+            to_date: Latest visit date to include (ISO format, inclusive)
+
+        Returns:
+            Tuple of (days, visit date to continue after or None on the last page)
+        """
+        itineraries = self.itineraries
+        start, stop = _date_bounds(itineraries, from_date, to_date)
+        if after_date is not None:
+            start = max(start, bisect_right(itineraries, after_date, key=_visit_date))
+        end = stop if limit is None else min(stop, start + limit)
+        days = [_project_day(day, fields) for day in itineraries[start:end]]
+        next_after = itineraries[end - 1]["visit_date"] if end < stop else None
+        return days, next_after
+
+    def summary_between(self, from_date: Optional[str] = None, to_date: Optional[str] = None) -> Dict[str, Any]:
+        """Return the summary for days within [from_date, to_date]; the cached summary when unbounded."""
+        if from_date is None and to_date is None:
+            return self.summary
+        itineraries = self.itineraries
+        start, stop = _date_bounds(itineraries, from_date, to_date)
+        return _summarize(itineraries[start:stop])
+
+    def _replace_day(self, date_key: str, destinations: List[Dict[str, Any]], total_cost: float, total_time: int) -> None:
+        """Write-through update of one day, then publish the new top-level list."""
+        self._set_day(date_key, destinations, total_cost, total_time)
+        self._publish()
+
+    def _set_day(self, date_key: str, destinations: List[Dict[str, Any]], total_cost: float, total_time: int) -> None:
+        # The day's emotion tag and created_at come from its earliest itinerary
+        emotion_tag, created_at = self._headers[date_key][min(self._headers[date_key])]
+        self.days[date_key] = {
+            "visit_date": date_key,
+            "emotion_tag": emotion_tag,
+            "destinations": destinations,
+            "total_cost": total_cost,
+            "total_time": total_time,
+            "created_at": created_at
+        }
+
+    def _publish(self) -> None:
+        """Swap in a fresh top-level list and summary for readers."""
+        self.itineraries = [self.days[d] for d in self.dates]
+        self.summary = _summarize(self.itineraries)
+
+
+def _entry(itinerary: Dict[str, Any], destination: Dict[str, Any]) -> Dict[str, Any]:
+    """Response-shaped destination entry of one itinerary."""
+    return {
+        "itinerary_id": itinerary["id"],
+        "destination": {
+            "id": destination["id"],
+            "name": destination["name"],
+            "location": destination["location"],
+            "category": destination["category"],
+            "photo_spot": destination["photo_spot"],
+            "estimated_cost": destination["estimated_cost"] or 0.0,
+            "estimated_time": destination["estimated_time"] or 0,
+            "description": destination["description"]
+        },
+        "time_slot": itinerary["time_slot"]
+    }
+
+
+def _visit_date(day: Dict[str, Any]) -> str:
+    return day["visit_date"]
+
+
+def _date_bounds(itineraries: List[Dict[str, Any]], from_date: Optional[str], to_date: Optional[str]) -> Tuple[int, int]:
+    """Slice bounds of the days within [from_date, to_date], found by bisection."""
+    start = bisect_left(itineraries, from_date, key=_visit_date) if from_date is not None else 0
+    stop = bisect_right(itineraries, to_date, key=_visit_date) if to_date is not None else len(itineraries)
+    return start, max(start, stop)
+
+
+def _project_day(day: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """Copy a day keeping only the requested destination fields (no copy without a projection)."""
+    if fields is None:
+        return day
+    return {
+        **day,
+        "destinations": [
+            {**entry, "destination": project_fields(entry["destination"], fields)}
+            for entry in day["destinations"]
+        ]
+    }
+
+
+def _summarize(itineraries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Calculate overall statistics for a list of day itineraries."""
+    total_cost = sum(itin["total_cost"] for itin in itineraries)
+    total_destinations = sum(len(itin["destinations"]) for itin in itineraries)
+    return {
+        "total_itineraries": len(itineraries),
+        "total_destinations": total_destinations,
+        "total_cost": round(total_cost, 2),
+        "average_cost_per_day": round(total_cost / len(itineraries), 2) if itineraries else 0
+    }
+
+
+class ItineraryViewCache:
+    """
+    LRU cache of per-user itinerary views with write-through maintenance.
+
+    Views are built on first read. Afterwards, create_itinerary and
+    delete_itinerary update the cached view of the affected user incrementally,
+    through the data layer's change notifications, so reads never regroup or
+    re-join a user's itineraries. Least-recently-used views are evicted when the
+    cache holds more than `max_users` views or `max_entries` destination entries
+    in total. All views are dropped when the destination catalog changes, since
+    they embed destination details.
+    """
+
+    def __init__(self, max_users: int = 10000, max_entries: int = 500000):
+        self.max_users = max_users
+        self.max_entries = max_entries
+        self._views: "OrderedDict[int, UserItineraryView]" = OrderedDict()
+        self._entries = 0
+        self._catalog_version = get_destinations_version()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.RLock()
+        subscribe_itinerary_changes(self._on_itinerary_change)
+
+    def get(self, user_id: int) -> UserItineraryView:
+        """
+        Return the view for a user, building it on a cache miss.
+
+        The build runs outside the cache lock, so a cold read never blocks
+        itinerary writes (whose change listeners take that lock). The view is
+        cached only if neither the user's itineraries nor the catalog changed
+        while it was built.
+
+        Args:
+            user_id: ID of the user
+
+        Returns:
+            UserItineraryView (treat as read-only)
+        """
+        with self._lock:
+            self._check_catalog()
+            view = self._views.get(user_id)
+            if view is not None:
+                self._views.move_to_end(user_id)
+                self._hits += 1
+                return view
+            self._misses += 1
+            catalog_version = self._catalog_version
+
+        version = get_user_itineraries_version(user_id)
+        view = UserItineraryView.build(get_itineraries_by_user(user_id))
+
+        with self._lock:
+            # Only cache if no write or catalog change raced with the build
+            if get_user_itineraries_version(user_id) != version or get_destinations_version() != catalog_version:
+                return view
+            self._check_catalog()
+            cached = self._views.get(user_id)
+            if cached is not None:
+                # Another reader installed the same user's view first
+                return cached
+            self._views[user_id] = view
+            self._entries += view.size
+            self._evict()
+            return view
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Drop one user's view, or every view when user_id is None."""
+        with self._lock:
+            if user_id is None:
+                self._views.clear()
+                self._entries = 0
+                return
+            view = self._views.pop(user_id, None)
+            if view is not None:
+                self._entries -= view.size
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache occupancy and hit counters."""
+        with self._lock:
+            return {
+                "users": len(self._views),
+                "entries": self._entries,
+                "max_users": self.max_users,
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions
+            }
+
+    def _on_itinerary_change(self, event: str, itinerary: Dict[str, Any]) -> None:
+        with self._lock:
+            view = self._views.get(itinerary["user_id"])
+            if view is None:
+                return
+            before = view.size
+            if event == "create":
+                view.add(itinerary)
+            elif event == "delete":
+                view.remove(itinerary["id"])
+            self._entries += view.size - before
+            self._evict()
+
+    def _check_catalog(self) -> None:
+        version = get_destinations_version()
+        if version != self._catalog_version:
+            self.invalidate()
+            self._catalog_version = version
+
+    def _evict(self) -> None:
+        while self._views and (len(self._views) > self.max_users or self._entries > self.max_entries):
+            _, view = self._views.popitem(last=False)
+            self._entries -= view.size
+            self._evictions += 1
+
+
+# Singleton instance
+itinerary_view_cache = ItineraryViewCache(
+    max_users=int(os.getenv("ITINERARY_VIEW_CACHE_USERS", "10000")),
+    max_entries=int(os.getenv("ITINERARY_VIEW_CACHE_MAX_ENTRIES", "500000"))
+)
+
+
+def get_itinerary_view_cache() -> ItineraryViewCache:
+    """Factory function to get ItineraryViewCache instance."""
+    return itinerary_view_cache
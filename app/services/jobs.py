@@ -0,0 +1,306 @@
+import http.client
+import ipaddress
+import json
+import os
+import socket
+import threading
+import time
+import urllib.request
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, Optional
+from urllib.parse import urlsplit
+
+from fastapi import HTTPException
+
+
+class WebhookURLError(ValueError):
+    """Raised when a webhook URL points somewhere the server must not send requests."""
+
+
+class JobQueueFullError(Exception):
+    """Raised when too many jobs are queued or running to accept another."""
+
+    def __init__(self, message: str, retry_after: float = 5.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class Job:
+    """State of one background job, as reported by the polling endpoint."""
+    id: str
+    kind: str
+    webhook_url: Optional[str] = None
+    status: str = "queued"
+    stage: str = "queued"
+    progress: float = 0.0
+    result: Any = None
+    error: Optional[Dict[str, Any]] = None
+    webhook_status: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def report(self, progress: float, stage: str) -> None:
+        """Record progress (0.0-1.0) and the current stage; called from the job function."""
+        self.progress = round(min(max(progress, 0.0), 1.0), 2)
+        self.stage = stage
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "webhook_status": self.webhook_status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+def _check_address(address: str) -> None:
+    """Reject loopback, private, link-local (e.g. 169.254.169.254) and other non-public addresses."""
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    if not ip.is_global or ip.is_multicast:
+        raise WebhookURLError(f"Webhook address {ip} is not a public address")
+
+
+def check_webhook_url(url: str, allowed_hosts: FrozenSet[str] = frozenset()) -> None:
+    """
+    Validate a client-supplied webhook URL before a job is queued.
+
+    The host must be in `allowed_hosts` when that set is not empty, and every
+    address it resolves to must be public.
+
+    Raises:
+        WebhookURLError: If the URL must not be delivered to
+    """
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if parts.scheme not in ("http", "https") or not host:
+        raise WebhookURLError("Webhook URL must be an absolute http(s) URL")
+    if allowed_hosts and host not in allowed_hosts:
+        raise WebhookURLError(f"Webhook host {host} is not in JOB_WEBHOOK_ALLOWED_HOSTS")
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parts.port or 443, type=socket.SOCK_STREAM)}
+    except OSError:
+        raise WebhookURLError(f"Webhook host {host} cannot be resolved") from None
+    for address in addresses:
+        _check_address(address)
+
+
+def _create_checked_connection(*args, **kwargs) -> socket.socket:
+    """socket.create_connection that refuses non-public peers, checked on the connected socket (no DNS rebinding)."""
+    sock = socket.create_connection(*args, **kwargs)
+    try:
+        _check_address(sock.getpeername()[0])
+    except WebhookURLError:
+        sock.close()
+        raise
+    return sock
+
+
+class _CheckedHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _create_checked_connection
+
+
+class _CheckedHTTPSConnection(http.client.HTTPSConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _create_checked_connection
+
+
+class _CheckedHTTPHandler(urllib.request.HTTPHandler):
+    def http_open(self, req):
+        return self.do_open(_CheckedHTTPConnection, req)
+
+
+class _CheckedHTTPSHandler(urllib.request.HTTPSHandler):
+    def https_open(self, req):
+        return self.do_open(_CheckedHTTPSConnection, req, context=self._context)
+
+
+class _NoRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """Turn redirects into errors, so a webhook cannot bounce the request to another host."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+_webhook_opener = urllib.request.build_opener(_CheckedHTTPHandler, _CheckedHTTPSHandler, _NoRedirectHandler)
+
+
+def post_webhook(url: str, payload: Dict[str, Any], timeout: float) -> None:
+    """
+    POST a JSON payload to a webhook URL; raises on network errors and non-2xx replies.
+
+    Redirects are not followed and connections to non-public addresses are refused.
+    """
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    with _webhook_opener.open(request, timeout=timeout) as response:
+        if not 200 <= response.status < 300:
+            raise RuntimeError(f"Webhook returned HTTP {response.status}")
+
+
+class JobManager:
+    """
+    Bounded worker pool for long-running requests such as AI itinerary generation.
+
+    Submitting returns a Job immediately; a pool of `max_workers` threads runs the
+    work and clients poll the job (or receive a webhook) for the result, so the
+    HTTP request never waits on Gemini. At most `max_pending` jobs may be queued
+    or running at once. Finished jobs are kept for `ttl_seconds` (and at most
+    `max_finished` of them), then dropped.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_pending: int = 100,
+        ttl_seconds: float = 3600,
+        max_finished: int = 10000,
+        webhook_timeout: float = 5.0,
+        webhook_sender: Callable[[str, Dict[str, Any], float], None] = post_webhook,
+        webhook_allowed_hosts: FrozenSet[str] = frozenset()
+    ):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self.max_finished = max_finished
+        self.webhook_timeout = webhook_timeout
+        self.webhook_sender = webhook_sender
+        self.webhook_allowed_hosts = webhook_allowed_hosts
+        self._jobs: Dict[str, Job] = {}
+        # Finished job id -> expiry (monotonic), oldest first
+        self._expiry: "OrderedDict[str, float]" = OrderedDict()
+        self._pending = 0
+        self._submitted = 0
+        self._rejected = 0
+        self._expired = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jobs")
+
+    def submit(self, kind: str, fn: Callable[[Job], Any], webhook_url: Optional[str] = None) -> Job:
+        """
+        Queue `fn(job)` on the worker pool and return its Job right away.
+
+        Args:
+            kind: Short job type label, e.g. "itinerary_generation"
+            fn: Work to run; receives the Job to report progress and returns the result
+            webhook_url: Optional URL that receives the finished job as JSON
+
+        Raises:
+            WebhookURLError: If webhook_url is not allowed (see check_webhook_url)
+            JobQueueFullError: If `max_pending` jobs are already queued or running
+        """
+        if webhook_url:
+            check_webhook_url(webhook_url, self.webhook_allowed_hosts)
+        with self._lock:
+            self._sweep()
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise JobQueueFullError(f"{self._pending} jobs are already queued or running")
+            job = Job(id=uuid.uuid4().hex, kind=kind, webhook_url=webhook_url)
+            self._jobs[job.id] = job
+            self._pending += 1
+            self._submitted += 1
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return a job by id, or None if it never existed or has expired."""
+        with self._lock:
+            self._sweep()
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        """Return pool occupancy and job counters."""
+        with self._lock:
+            self._sweep()
+            return {
+                "workers": self.max_workers,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "retained": len(self._jobs),
+                "submitted": self._submitted,
+                "rejected": self._rejected,
+                "expired": self._expired
+            }
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]) -> None:
+        job.started_at = time.time()
+        job.status = "running"
+        job.report(0.0, "running")
+        try:
+            job.result = fn(job)
+            job.status = "succeeded"
+            job.report(1.0, "done")
+        except HTTPException as e:
+            job.error = {"status_code": e.status_code, "detail": e.detail}
+            job.status = "failed"
+            job.stage = "failed"
+        except Exception as e:
+            job.error = {"status_code": 500, "detail": str(e)}
+            job.status = "failed"
+            job.stage = "failed"
+        job.finished_at = time.time()
+
+        if job.webhook_url:
+            try:
+                self.webhook_sender(job.webhook_url, job.to_dict(), self.webhook_timeout)
+                job.webhook_status = "delivered"
+            except Exception as e:
+                job.webhook_status = f"failed: {e}"
+
+        with self._lock:
+            self._pending -= 1
+            self._expiry[job.id] = time.monotonic() + self.ttl_seconds
+            self._sweep()
+
+    def _sweep(self) -> None:
+        """Drop expired finished jobs, oldest first. Call with the lock held."""
+        now = time.monotonic()
+        while self._expiry:
+            job_id, expires_at = next(iter(self._expiry.items()))
+            if expires_at > now and len(self._expiry) <= self.max_finished:
+                break
+            self._expiry.popitem(last=False)
+            self._jobs.pop(job_id, None)
+            self._expired += 1
+
+
+# Singleton instance
+job_manager = JobManager(
+    max_workers=int(os.getenv("JOB_WORKERS", "4")),
+    max_pending=int(os.getenv("JOB_MAX_PENDING", "100")),
+    ttl_seconds=float(os.getenv("JOB_TTL_SECONDS", "3600")),
+    webhook_timeout=float(os.getenv("JOB_WEBHOOK_TIMEOUT_SECONDS", "5")),
+    webhook_allowed_hosts=frozenset(
+        host.strip().lower() for host in os.getenv("JOB_WEBHOOK_ALLOWED_HOSTS", "").split(",") if host.strip()
+    )
+)
+
+
+def get_job_manager() -> JobManager:
+    """Factory function to get JobManager instance."""
+    return job_manager
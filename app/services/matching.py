@@ -4,7 +4,7 @@ from collections import defaultdict
 
 from app.data import (
     get_user_by_id, get_all_users, get_destination_by_id,
-    get_itineraries_by_user, filter_itineraries
+    get_itineraries_in_date_range
 )
 
 
@@ -20,7 +20,9 @@ class MatchingService:
         user_id: int, 
         destination_id: int, 
         time_slot: str,
-        visit_date: Optional[date] = None
+        visit_date: Optional[date] = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None
     ) -> List[Dict[str, Any]]:
         """
         Find users with same destination and time preferences for potential travel buddies.
@@ -30,6 +32,8 @@ class MatchingService:
             destination_id: Destination to match
             time_slot: Time slot to match (morning/afternoon/evening)
             visit_date: Optional specific date to match
+            from_date: Optional start of a visit-date range to match (inclusive)
+            to_date: Optional end of a visit-date range to match (inclusive)
         
         Returns:
             List of potential travel buddies with their profiles and compatibility info
@@ -39,8 +43,14 @@ class MatchingService:
         if not current_user:
             return []
         
-        # Get all itineraries
-        all_itineraries = filter_itineraries(destination_id=destination_id)
+        # An exact visit_date is a one-day range
+        if visit_date:
+            from_date = to_date = visit_date
+        
+        # Itineraries at this destination within the date range, via the sorted date index
+        all_itineraries = get_itineraries_in_date_range(
+            destination_id=destination_id, from_date=from_date, to_date=to_date
+        )
         
         # Filter by time_slot and exclude current user
         matching_itineraries = [
@@ -48,11 +58,6 @@ class MatchingService:
             if i["user_id"] != user_id and i["time_slot"] == time_slot
         ]
         
-        # Filter by date if provided
-        if visit_date:
-            date_str = visit_date.isoformat() if isinstance(visit_date, date) else visit_date
-            matching_itineraries = [i for i in matching_itineraries if i["visit_date"] == date_str]
-        
         matching_travelers = []
         for itinerary in matching_itineraries:
             user = get_user_by_id(itinerary["user_id"])
@@ -119,10 +124,9 @@ class MatchingService:
         # Get all itineraries for these users on the target date
         all_itineraries = []
         for uid in user_ids:
-            user_itineraries = get_itineraries_by_user(uid)
-            for itin in user_itineraries:
-                if itin["visit_date"] == target_date_str:
-                    all_itineraries.append(itin)
+            all_itineraries.extend(
+                get_itineraries_in_date_range(user_id=uid, from_date=target_date_str, to_date=target_date_str)
+            )
         
         # Organize itineraries by time slot
         time_slot_data = {
@@ -0,0 +1,78 @@
+import base64
+import json
+from typing import Any, Iterable, Optional, Tuple
+
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidQueryError(ValueError):
+    """Raised for a malformed cursor or an unknown projection field."""
+
+
+def encode_cursor(kind: str, after: Any) -> str:
+    """
+    Build an opaque cursor pointing just past `after` in a listing.
+
+    Args:
+        kind: Listing the cursor belongs to, so cursors cannot be mixed up
+        after: Sort key of the last row on the current page
+
+    Returns:
+        URL-safe cursor string
+    """
+    raw = json.dumps([kind, after], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: Optional[str], kind: str, key_type: type) -> Any:
+    """
+    Return the sort key stored in a cursor, or None when no cursor was given.
+
+    Args:
+        cursor: Cursor from a previous page, if any
+        kind: Listing the cursor must belong to
+        key_type: Expected type of the sort key
+
+    Raises:
+        InvalidQueryError: If the cursor is malformed or belongs to another listing
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_kind, after = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidQueryError("Invalid cursor")
+    if cursor_kind != kind or not isinstance(after, key_type):
+        raise InvalidQueryError("Cursor does not belong to this listing")
+    return after
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str], always: Iterable[str] = ()) -> Optional[Tuple[str, ...]]:
+    """
+    Parse a comma-separated `fields=` parameter into a projection.
+
+    Args:
+        fields: Raw parameter value, e.g. "name,estimated_cost"
+        allowed: Field names that may be requested, in output order
+        always: Fields included even when not requested (e.g. the row id)
+
+    Returns:
+        Tuple of field names in `allowed` order, or None for "all fields"
+
+    Raises:
+        InvalidQueryError: If an unknown field is requested
+    """
+    if not fields:
+        return None
+    allowed = tuple(allowed)
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(requested.difference(allowed))
+    if unknown:
+        raise InvalidQueryError(
+            f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}"
+        )
+    requested.update(always)
+    return tuple(name for name in allowed if name in requested)
@@ -0,0 +1,253 @@
+import heapq
+import math
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.data import (
+    get_all_itineraries, get_destination_by_id, get_user_by_id, subscribe_itinerary_changes
+)
+
+
+# Weight of each user segment in the affinity part of the score. Segments are
+# keyed by the user's survey answers and by the itinerary's emotion tag.
+SEGMENT_WEIGHTS = {
+    "personality_type": 0.5,
+    "travel_style": 0.3,
+    "emotion_tag": 0.5
+}
+
+
+class DestinationRecommender:
+    """
+    Personalized destination ranking learned from saved itineraries, without an AI call.
+
+    Two signals are kept up to date on every itinerary create and delete:
+
+    - Co-visits: a sparse destination x destination matrix counting users who
+      planned both destinations. A user's own destinations vote for their
+      neighbours with cosine weights (item-to-item collaborative filtering).
+    - Segment affinity: per segment (personality type, travel style, emotion tag),
+      the share of that segment's itinerary entries going to each destination.
+
+    Only the changed user's row of the matrix is touched per write, and a query
+    walks the neighbours of the user's destinations plus a handful of segment
+    counters, so ranking a catalog of a few hundred destinations stays well
+    under a millisecond. With no history, candidates keep their given order.
+    """
+
+    def __init__(self, co_visit_weight: float = 1.0, segment_weight: float = 1.0):
+        self.co_visit_weight = co_visit_weight
+        self.segment_weight = segment_weight
+        # user_id -> destination_id -> itinerary entries
+        self._user_visits: Dict[int, Dict[int, int]] = {}
+        # user_id -> emotion tag -> itinerary entries
+        self._user_emotions: Dict[int, Dict[str, int]] = {}
+        # destination_id -> distinct users planning it
+        self._visitors: Dict[int, int] = {}
+        # destination_id -> destination_id -> users planning both (symmetric, no diagonal)
+        self._co_visits: Dict[int, Dict[int, int]] = {}
+        # (segment, value) -> destination_id -> itinerary entries, plus per-segment totals
+        self._segment_visits: Dict[Tuple[str, str], Dict[int, int]] = {}
+        self._segment_totals: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.RLock()
+        with self._lock:
+            subscribe_itinerary_changes(self._on_itinerary_change)
+            for itinerary in get_all_itineraries():
+                self._apply(itinerary, 1)
+
+    def recommend(
+        self,
+        user: Dict[str, Any],
+        candidates: Sequence[Dict[str, Any]],
+        k: int = 5,
+        emotion: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank candidate destinations for a user.
+
+        Args:
+            user: User record (its survey answers pick the segments)
+            candidates: Destinations to choose from, in fallback order
+            k: Number of recommendations to return
+            emotion: Emotion to weigh in; defaults to the user's most frequent itinerary emotion
+
+        Returns:
+            Up to k entries with destination, score and reason, best first. Places
+            the user has not planned yet come before ones already in their itineraries.
+        """
+        with self._lock:
+            visits = self._user_visits.get(user["id"], {})
+            if emotion is None:
+                emotion = self._dominant_emotion(user["id"])
+
+            co_scores, co_sources = self._co_visit_scores(visits)
+            segments = [
+                (name, user[name] if name != "emotion_tag" else emotion)
+                for name in SEGMENT_WEIGHTS
+            ]
+            segment_scores = self._segment_scores(segments)
+
+        ranked = []
+        for position, destination in enumerate(candidates):
+            destination_id = destination["id"]
+            co_score = co_scores.get(destination_id, 0.0)
+            affinity = segment_scores.get(destination_id, 0.0)
+            score = self.co_visit_weight * co_score + self.segment_weight * affinity
+            # Unvisited places first, then by score; the candidate order breaks ties
+            ranked.append((destination_id not in visits, score, -position, destination, co_score, affinity))
+
+        recommendations = []
+        for unvisited, score, _, destination, co_score, affinity in heapq.nlargest(k, ranked, key=lambda r: r[:3]):
+            recommendations.append({
+                "destination": destination,
+                "score": round(score, 4),
+                "reason": self._reason(user, emotion, co_sources.get(destination["id"]), co_score, affinity, unvisited)
+            })
+        return recommendations
+
+    def stats(self) -> Dict[str, int]:
+        """Return the size of the learned model."""
+        with self._lock:
+            return {
+                "users": len(self._user_visits),
+                "destinations": len(self._visitors),
+                "co_visit_pairs": sum(len(row) for row in self._co_visits.values()) // 2,
+                "segments": len(self._segment_totals)
+            }
+
+    def _co_visit_scores(self, visits: Dict[int, int]) -> Tuple[Dict[int, float], Dict[int, int]]:
+        """Cosine co-visit score per neighbour of the user's destinations, and its strongest source."""
+        scores: Dict[int, float] = {}
+        sources: Dict[int, Tuple[float, int]] = {}
+        for source in visits:
+            row = self._co_visits.get(source)
+            if not row:
+                continue
+            source_visitors = self._visitors[source]
+            for neighbour, both in row.items():
+                weight = both / math.sqrt(source_visitors * self._visitors[neighbour])
+                scores[neighbour] = scores.get(neighbour, 0.0) + weight
+                if weight > sources.get(neighbour, (0.0, 0))[0]:
+                    sources[neighbour] = (weight, source)
+        return scores, {neighbour: source for neighbour, (_, source) in sources.items()}
+
+    def _segment_scores(self, segments: Sequence[Tuple[str, Optional[str]]]) -> Dict[int, float]:
+        """Weighted share of each segment's entries going to each destination."""
+        scores: Dict[int, float] = {}
+        for name, value in segments:
+            key = (name, value)
+            total = self._segment_totals.get(key)
+            if value is None or not total:
+                continue
+            weight = SEGMENT_WEIGHTS[name] / total
+            for destination_id, count in self._segment_visits[key].items():
+                scores[destination_id] = scores.get(destination_id, 0.0) + weight * count
+        return scores
+
+    def _dominant_emotion(self, user_id: int) -> Optional[str]:
+        emotions = self._user_emotions.get(user_id)
+        if not emotions:
+            return None
+        return max(emotions, key=emotions.get)
+
+    def _reason(
+        self,
+        user: Dict[str, Any],
+        emotion: Optional[str],
+        source_id: Optional[int],
+        co_score: float,
+        affinity: float,
+        unvisited: bool
+    ) -> str:
+        if not unvisited:
+            return "Already in your itineraries and worth another visit"
+        source = get_destination_by_id(source_id) if source_id is not None else None
+        if source and co_score >= affinity:
+            return f"Often planned together with {source['name']}, already in your itineraries"
+        if affinity > 0:
+            if emotion:
+                return f"Popular with {user['personality_type']} travelers who felt {emotion}"
+            return f"Popular with {user['personality_type']} travelers"
+        return f"Matches your {user['personality_type']} personality"
+
+    def _segments_of(self, user: Optional[Dict[str, Any]], itinerary: Dict[str, Any]) -> List[Tuple[str, str]]:
+        segments = []
+        if user is not None:
+            segments.append(("personality_type", user["personality_type"]))
+            segments.append(("travel_style", user["travel_style"]))
+        if itinerary["emotion_tag"]:
+            segments.append(("emotion_tag", itinerary["emotion_tag"]))
+        return segments
+
+    def _apply(self, itinerary: Dict[str, Any], delta: int) -> None:
+        """Add (delta=1) or remove (delta=-1) one itinerary entry. Call with the lock held."""
+        user_id = itinerary["user_id"]
+        destination_id = itinerary["destination_id"]
+
+        visits = self._user_visits.setdefault(user_id, {})
+        before = visits.get(destination_id, 0)
+        after = before + delta
+        if after > 0:
+            visits[destination_id] = after
+        else:
+            visits.pop(destination_id, None)
+
+        # Co-visits change only when the destination enters or leaves the user's set
+        if before == 0 and after > 0:
+            self._visitors[destination_id] = self._visitors.get(destination_id, 0) + 1
+            for other in visits:
+                if other != destination_id:
+                    self._bump_pair(destination_id, other, 1)
+        elif before > 0 and after <= 0:
+            for other in visits:
+                self._bump_pair(destination_id, other, -1)
+            self._bump(self._visitors, destination_id, -1)
+        if not visits:
+            del self._user_visits[user_id]
+
+        if itinerary["emotion_tag"]:
+            emotions = self._user_emotions.setdefault(user_id, {})
+            self._bump(emotions, itinerary["emotion_tag"], delta)
+            if not emotions:
+                del self._user_emotions[user_id]
+
+        for key in self._segments_of(get_user_by_id(user_id), itinerary):
+            self._bump(self._segment_visits.setdefault(key, {}), destination_id, delta)
+            self._bump(self._segment_totals, key, delta)
+            if not self._segment_visits[key]:
+                del self._segment_visits[key]
+
+    def _bump_pair(self, first: int, second: int, delta: int) -> None:
+        self._bump(self._co_visits.setdefault(first, {}), second, delta)
+        self._bump(self._co_visits.setdefault(second, {}), first, delta)
+        for key in (first, second):
+            if not self._co_visits[key]:
+                del self._co_visits[key]
+
+    @staticmethod
+    def _bump(counts: Dict[Any, int], key: Any, delta: int) -> None:
+        count = counts.get(key, 0) + delta
+        if count > 0:
+            counts[key] = count
+        else:
+            counts.pop(key, None)
+
+    def _on_itinerary_change(self, event: str, itinerary: Dict[str, Any]) -> None:
+        with self._lock:
+            if event == "create":
+                self._apply(itinerary, 1)
+            elif event == "delete":
+                self._apply(itinerary, -1)
+
+
+# Singleton instance
+destination_recommender = DestinationRecommender(
+    co_visit_weight=float(os.getenv("RECOMMENDER_CO_VISIT_WEIGHT", "1.0")),
+    segment_weight=float(os.getenv("RECOMMENDER_SEGMENT_WEIGHT", "1.0"))
+)
+
+
+def get_destination_recommender() -> DestinationRecommender:
+    """Factory function to get DestinationRecommender instance."""
+    return destination_recommender
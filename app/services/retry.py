@@ -0,0 +1,114 @@
+import random
+import threading
+import time
+from collections import deque
+from typing import Deque, Optional
+
+
+# HTTP status codes worth retrying: throttling and transient upstream failures
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class DeadlineExceededError(TimeoutError):
+    """Raised when a request-level time budget runs out."""
+
+
+class Deadline:
+    """Absolute point in time by which a request must finish."""
+
+    def __init__(self, budget_seconds: float):
+        self.budget = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout_for_attempt(self, attempt_cap: float) -> float:
+        """
+        Time allowed for one upstream attempt.
+
+        Raises:
+            DeadlineExceededError: If no time is left
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceededError(f"Request budget of {self.budget:.1f}s exhausted")
+        return min(attempt_cap, remaining)
+
+
+class RetryBudget:
+    """
+    Process-wide cap on retries.
+
+    Every request deposits `ratio` tokens and every retry (or hedged call) spends
+    one, so retries stay at roughly `ratio` of traffic and cannot multiply load
+    during an outage. `min_tokens` lets low-traffic periods still retry.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_tokens: float = 10, max_tokens: float = 100):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = float(min_tokens)
+        self._spent = 0
+        self._denied = 0
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        """Take a retry token, returning False if the budget is exhausted."""
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self._spent += 1
+                return True
+            self._denied += 1
+            return False
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "tokens": round(self._tokens, 2),
+                "retries_spent": self._spent,
+                "retries_denied": self._denied
+            }
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies used to pick the hedge delay."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Return the q-th percentile (0-1), or None until enough samples exist."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def backoff_delay(attempt: int, base: float = 0.2, cap: float = 2.0) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (1-based)."""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+def is_retryable(error: Exception) -> bool:
+    """Retry throttling, 5xx and network errors; never retry other 4xx responses."""
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code in RETRYABLE_STATUS_CODES
+    return True
@@ -0,0 +1,72 @@
+"""
+Startup-time benchmark for DasiLari workers.
+
+Measures how long a fresh interpreter takes to import the FastAPI app and
+answer its first request, which is what a newly scaled-out worker pays
+before it can serve traffic. Each run uses a new subprocess so import
+caches do not carry over.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10] [--with-key]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    client.get("/api/destinations")
+served = time.perf_counter()
+print(json.dumps({
+    "import_seconds": imported - started,
+    "first_request_seconds": served - started,
+    "genai_loaded": "google.genai" in sys.modules
+}))
+"""
+
+
+def run_once(with_key: bool) -> dict:
+    env = dict(os.environ)
+    if with_key:
+        env.setdefault("GEMINI_API_KEY", "benchmark-placeholder")
+    else:
+        env.pop("GEMINI_API_KEY", None)
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="Number of cold starts to measure")
+    parser.add_argument("--with-key", action="store_true", help="Start with a GEMINI_API_KEY set")
+    args = parser.parse_args()
+
+    results = [run_once(args.with_key) for _ in range(args.runs)]
+    imports = [r["import_seconds"] * 1000 for r in results]
+    firsts = [r["first_request_seconds"] * 1000 for r in results]
+
+    print(f"Cold starts: {args.runs} ({'with' if args.with_key else 'without'} GEMINI_API_KEY)")
+    print(f"  import main        median {statistics.median(imports):8.1f} ms   max {max(imports):8.1f} ms")
+    print(f"  first request      median {statistics.median(firsts):8.1f} ms   max {max(firsts):8.1f} ms")
+    print(f"  google.genai loaded at startup: {any(r['genai_loaded'] for r in results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,26 @@
-from fastapi import FastAPI, Request, status
+from fastapi import Depends, FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from contextlib import asynccontextmanager
 from pydantic import ValidationError
+import os
 import traceback
 
 from app.routes import users_router, destinations_router, chat_router, itineraries_router
+from app.data import SharedStore, WriteAheadLog
+from app.data.snapshot import configured_snapshot_path
+from app.services.ai_service import ai_service
+from app.services.ai_scheduler import AIOverloadedError
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.chat_session import chat_session_store
+from app.services.catalog import catalog_snapshot
+from app.services.itinerary_views import itinerary_view_cache
+from app.services.recommender import destination_recommender
+from app.services.emotion_rankings import emotion_rankings
+from app.services.jobs import JobQueueFullError, WebhookURLError, job_manager
+from app.services.idempotency import IdempotencyError, REPLAYED_HEADER, idempotency_store
+from app.services.pagination import InvalidQueryError, NEXT_CURSOR_HEADER
 
 
 @asynccontextmanager
@@ -16,12 +30,60 @@ async def lifespan(app: FastAPI):
     """
     # Startup
     print("Starting DasiLari application...")
-    print("Using mock data (no database)")
+    shared_db_path = os.getenv("SHARED_DB_PATH")
+    write_log_path = os.getenv("DATA_WAL_PATH")
+    app.state.write_log = None
+    if shared_db_path:
+        # Multi-worker mode: users and itineraries are shared through one SQLite file
+        app.state.shared_store = SharedStore(shared_db_path)
+        app.state.shared_store.attach()
+        app.state.shared_store.start_polling(float(os.getenv("SHARED_DB_POLL_SECONDS", "0.5")))
+        print(f"Using shared data store at {shared_db_path} (pid {os.getpid()})")
+        if write_log_path:
+            print("DATA_WAL_PATH ignored - the shared data store is already durable")
+    elif write_log_path:
+        # In-memory data made durable by an append-only write log plus periodic snapshots
+        app.state.shared_store = None
+        app.state.write_log = WriteAheadLog(
+            write_log_path,
+            snapshot_path=configured_snapshot_path(),
+            sync_interval=float(os.getenv("DATA_WAL_SYNC_SECONDS", "0.1")),
+            compact_every=int(os.getenv("DATA_WAL_COMPACT_ENTRIES", "100000"))
+        )
+        app.state.write_log.open()
+        print(f"Using in-memory data with write log {write_log_path}")
+    else:
+        app.state.shared_store = None
+        print("Using mock data (no database)")
+        if int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+            print("WARNING: WEB_CONCURRENCY > 1 without SHARED_DB_PATH - each worker keeps its own data")
+    catalog_snapshot.refresh()
+    emotion_rankings.start()
+    if not ai_service.available:
+        print("GEMINI_API_KEY not set - starting in degraded mode, AI features use local fallbacks")
     
     yield
     
     # Shutdown: cleanup if needed
     print("Shutting down application...")
+    emotion_rankings.stop()
+    if app.state.shared_store:
+        app.state.shared_store.close()
+    if app.state.write_log:
+        app.state.write_log.close()
+
+
+def sync_shared_store(request: Request) -> None:
+    """
+    In multi-worker mode, pick up other workers' writes before handling a request.
+    A plain def dependency, so FastAPI runs it in the threadpool and the SQLite read
+    and change listeners never block the event loop. Costs one PRAGMA read when
+    nothing changed; skipped if this worker is already syncing (the poller thread
+    or a writer applies the changes then).
+    """
+    shared_store = getattr(request.app.state, "shared_store", None)
+    if shared_store is not None:
+        shared_store.sync_if_changed(blocking=False)
 
 
 # Initialize FastAPI app with custom documentation
@@ -67,7 +129,8 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
-    lifespan=lifespan
+    lifespan=lifespan,
+    dependencies=[Depends(sync_shared_store)]
 )
 
 # Configure CORS middleware for frontend access
@@ -89,6 +152,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all methods (GET, POST, PUT, DELETE, etc.)
     allow_headers=["*"],  # Allow all headers
+    expose_headers=[NEXT_CURSOR_HEADER, REPLAYED_HEADER],  # Let browsers read pagination cursors and replay markers
 )
 
 # Error Handling Middleware
@@ -117,6 +181,109 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 
+@app.exception_handler(InvalidQueryError)
+async def invalid_query_exception_handler(request: Request, exc: InvalidQueryError):
+    """
+    Handle malformed pagination cursors, unknown fields= names and bad ids= lists.
+    Returns 400 with the reason.
+    """
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={
+            "error": "Invalid Query",
+            "message": "A query parameter (cursor, fields or ids) is not valid for this endpoint.",
+            "details": str(exc)
+        }
+    )
+
+
+@app.exception_handler(AIOverloadedError)
+async def ai_overloaded_exception_handler(request: Request, exc: AIOverloadedError):
+    """
+    Handle requests rejected by the AI scheduler.
+    Returns 429 with Retry-After instead of a generic 503 so clients back off.
+    """
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        headers={"Retry-After": str(max(1, int(exc.retry_after)))},
+        content={
+            "error": "AI Service Busy",
+            "message": "The AI service is handling too many requests. Please retry shortly.",
+            "details": str(exc),
+            "fallback": "You can still browse destinations and create manual itineraries."
+        }
+    )
+
+
+@app.exception_handler(JobQueueFullError)
+async def job_queue_full_exception_handler(request: Request, exc: JobQueueFullError):
+    """
+    Handle job submissions rejected because the worker pool is saturated.
+    Returns 503 with Retry-After so clients resubmit later.
+    """
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(max(1, int(exc.retry_after)))},
+        content={
+            "error": "Job Queue Full",
+            "message": "Too many itinerary jobs are in progress. Please retry shortly.",
+            "details": str(exc)
+        }
+    )
+
+
+@app.exception_handler(WebhookURLError)
+async def webhook_url_exception_handler(request: Request, exc: WebhookURLError):
+    """
+    Handle job submissions whose webhook_url points at a private, loopback or
+    otherwise disallowed address. Returns 400; nothing is queued.
+    """
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={
+            "error": "Invalid Webhook URL",
+            "message": "webhook_url must point to a public host the server is allowed to call.",
+            "details": str(exc)
+        }
+    )
+
+
+@app.exception_handler(IdempotencyError)
+async def idempotency_exception_handler(request: Request, exc: IdempotencyError):
+    """
+    Handle Idempotency-Key reuse with a different body (422) and retries that
+    gave up waiting for the original request (409 with Retry-After).
+    """
+    headers = {"Retry-After": str(max(1, int(exc.retry_after)))} if exc.retry_after else None
+    return JSONResponse(
+        status_code=exc.status_code,
+        headers=headers,
+        content={
+            "error": "Idempotency Key Conflict",
+            "message": str(exc),
+            "details": request.headers.get("idempotency-key")
+        }
+    )
+
+
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_exception_handler(request: Request, exc: CircuitOpenError):
+    """
+    Handle AI calls short-circuited while Gemini is failing.
+    Returns 503 with Retry-After without waiting on the upstream.
+    """
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(max(1, int(exc.retry_after)))},
+        content={
+            "error": "AI Service Degraded",
+            "message": "The AI service is temporarily unavailable. Please try again.",
+            "details": str(exc),
+            "fallback": "You can still browse destinations and create manual itineraries."
+        }
+    )
+
+
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     """
@@ -175,13 +342,38 @@ app.include_router(itineraries_router)
 def health_check():
     """
     Health check endpoint to verify the API is running.
-    Returns status and version information.
+    Returns status and version information, plus AI availability.
+    While the AI circuit breaker is open the API keeps serving local fallbacks.
     """
     return {
         "status": "healthy",
         "service": "DasiLari API",
         "version": "1.0.0",
-        "message": "Da Lat Travel Assistant is running smoothly!"
+        "message": "Da Lat Travel Assistant is running smoothly!",
+        "ai_service": ai_service.status()
+    }
+
+
+# Metrics endpoint
+@app.get("/metrics", tags=["Health"])
+def metrics():
+    """
+    Runtime metrics for monitoring.
+    Reports AI scheduler queue depth, wait times and rejections, plus chat session,
+    itinerary view cache, recommender, emotion ranking, background job and idempotency key usage,
+    and the shared store or write log state.
+    """
+    return {
+        "ai_scheduler": ai_service.scheduler.metrics(),
+        "ai_latency": ai_service.latency_metrics(),
+        "chat_sessions": chat_session_store.stats(),
+        "itinerary_views": itinerary_view_cache.stats(),
+        "recommender": destination_recommender.stats(),
+        "emotion_rankings": emotion_rankings.stats(),
+        "jobs": job_manager.stats(),
+        "idempotency": idempotency_store.stats(),
+        "shared_store": app.state.shared_store.stats() if getattr(app.state, "shared_store", None) else None,
+        "write_log": app.state.write_log.stats() if getattr(app.state, "write_log", None) else None
     }
 
 
@@ -196,12 +388,16 @@ def root():
         "description": "AI-powered travel assistant for exploring Da Lat, Vietnam",
         "documentation": "/docs",
         "health_check": "/health",
+        "metrics": "/metrics",
         "endpoints": {
             "survey": "POST /api/survey - Submit user preferences",
+            "survey_bulk": "POST /api/survey/bulk - Import surveys as NDJSON",
+            "users": "GET /api/users?ids=1,2,3 - Look up many users",
             "chat": "POST /api/chat - Chat with AI assistant",
             "destinations": "GET /api/destinations - Browse destinations",
             "photo_spots": "GET /api/destinations/photo-spots - Find photo spots",
             "generate_itinerary": "POST /api/itineraries/generate - Create itinerary",
+            "itinerary_jobs": "POST /api/itineraries/jobs - Create itinerary in the background",
             "user_itineraries": "GET /api/itineraries/{user_id} - View saved itineraries"
         }
     }
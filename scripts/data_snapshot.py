@@ -0,0 +1,85 @@
+"""
+Export, import and inspect binary data snapshots.
+
+A snapshot holds destinations, users and itineraries in the columnar format
+of app/data/snapshot.py. Workers started with DATA_SNAPSHOT_PATH pointing at
+one memory-map it at import time instead of building the built-in sample data,
+so a catalog of hundreds of thousands of rows is validated once, here, rather
+than on every boot.
+
+Usage:
+    python scripts/data_snapshot.py export data.snap
+    python scripts/data_snapshot.py import data.snap [--destinations FILE] [--users FILE] [--itineraries FILE]
+    python scripts/data_snapshot.py info data.snap
+
+`export` writes the data the app currently starts with (the built-in sample,
+or the snapshot named by DATA_SNAPSHOT_PATH). `import` reads rows from JSON
+arrays or NDJSON files (one object per line, same fields as the API records);
+tables that are not given keep the current data.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.data import get_all_destinations, get_all_itineraries, get_all_users  # noqa: E402
+from app.data.snapshot import TABLES, SnapshotError, read_header, write_snapshot  # noqa: E402
+
+
+def read_rows(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".ndjson", ".jsonl")):
+            return [json.loads(line) for line in f if line.strip()]
+        rows = json.load(f)
+    if not isinstance(rows, list):
+        raise SnapshotError(f"{path}: expected a JSON array of objects")
+    return rows
+
+
+def print_info(path: str) -> None:
+    header = read_header(path)
+    print(f"{path}: {os.path.getsize(path)} bytes, created {header['created_at']}")
+    for table, meta in header["tables"].items():
+        print(f"  {table:<14} {meta['rows']:>10} rows   next_id {meta['next_id']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="Write the current data to a snapshot")
+    export.add_argument("path")
+    build = commands.add_parser("import", help="Build a snapshot from JSON/NDJSON rows")
+    build.add_argument("path")
+    for table in TABLES:
+        build.add_argument(f"--{table}", metavar="FILE", help=f"{table} rows (.json array or .ndjson)")
+    info = commands.add_parser("info", help="Show the tables of a snapshot")
+    info.add_argument("path")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "info":
+            print_info(args.path)
+            return
+        tables = {
+            "destinations": list(get_all_destinations()),
+            "users": get_all_users(),
+            "itineraries": get_all_itineraries()
+        }
+        if args.command == "import":
+            for table in TABLES:
+                source = getattr(args, table)
+                if source:
+                    tables[table] = read_rows(source)
+        started = time.perf_counter()
+        write_snapshot(args.path, tables)
+        print(f"Wrote snapshot in {(time.perf_counter() - started) * 1000:.1f} ms")
+        print_info(args.path)
+    except (SnapshotError, OSError, ValueError) as e:
+        parser.exit(1, f"error: {e}\n")
+
+
+if __name__ == "__main__":
+    main()